@@ -0,0 +1,109 @@
+"""Validation report of the accuracy settings of the Bessel line functions.
+
+Each setting of `ACCURACY` is compared with the reference data of the line-sink
+and line-doublet functions in `notebooks/besselaesnew_test_data` (computed on a
+grid of 20 by 20 points with labdas 0.4 and 4 and orders 0 to 2, see
+`notebooks/timml_besselaesnew_test.ipynb`), and the time per point is measured
+for random points around the element. Run as::
+
+    python benchmarks/benchmark_accuracy.py --npoints 10000
+
+The errors are the maximum absolute difference with the reference data divided by
+the maximum absolute value of the reference data, for the modified Helmholtz parts
+only (the Laplace part does not depend on the setting).
+"""
+
+import argparse
+import pathlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from timml.besselaesnumba import besselaesnumba as ba
+
+DATADIR = pathlib.Path(__file__).parents[1] / "notebooks" / "besselaesnew_test_data"
+
+# geometry of the reference data
+Z1, Z2 = -2 - 4j, 3 + 1j
+LAB = np.array([0.0, 0.4, 4.0])
+NX, NY = 20, 20
+
+FUNCTIONS = {"ls": ba.potdisbeslsvarray, "ld": ba.potdisbesldvarray}
+
+
+def referenceerrors(accuracy, datadir=DATADIR):
+    """Relative errors of setting `accuracy` for each function, order and labda.
+
+    Returns
+    -------
+    dict
+        error by (function, order, labda) with functions 'potls', 'qxls', 'qyls',
+        'potld', 'qxld' and 'qyld'
+    """
+    x, y = np.meshgrid(np.linspace(-10, 10, NX), np.linspace(-10, 10, NY))
+    errors = {}
+    for name, func in FUNCTIONS.items():
+        for order in range(3):
+            rv = func(x.ravel(), y.ravel(), Z1, Z2, LAB, order, 1, 3, accuracy=accuracy)
+            for iq, quantity in enumerate(["pot", "qx", "qy"]):
+                # highest order of each quantity
+                values = rv[iq * (order + 1) + order].reshape(len(LAB), NY, NX)
+                for i in range(1, len(LAB)):
+                    fname = f"{quantity}{name}_order{order}_lab{i}.txt"
+                    ref = np.loadtxt(datadir / fname)
+                    error = np.max(np.abs(values[i] - ref)) / np.max(np.abs(ref))
+                    errors[(quantity + name, order, LAB[i])] = error
+    return errors
+
+
+def timeperpoint(accuracy, npoints=10000, order=0, repeat=3, seed=1):
+    """Time per point in microseconds of `potdisbeslsv` and `potdisbesldv`."""
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(-15.0, 15.0, npoints)
+    y = rng.uniform(-15.0, 15.0, npoints)
+    near = np.ones(npoints, dtype="bool")
+    plan = ba.lineplan(Z1, Z2, LAB)
+    rv = np.zeros((3 * (order + 1), len(LAB), npoints))
+    timings = {}
+    for name, kind in [("ls", ba.POTDISBESLSV), ("ld", ba.POTDISBESLDV)]:
+        args = (kind, x, y, Z1, Z2, LAB, order, 1, len(LAB), near, rv, plan)
+        ba.besselvarray(kind, x[:1], y[:1], *args[3:], accuracy)  # compile
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            ba.besselvarray(*args, accuracy)
+            times.append(time.perf_counter() - t0)
+        timings[name] = min(times) / npoints * 1e6
+    return timings
+
+
+def accuracyreport(npoints=10000, datadir=DATADIR):
+    """Maximum errors and time per point of each setting of the accuracy.
+
+    Returns
+    -------
+    pandas.DataFrame
+        settings as index; columns are the maximum relative error of each function
+        over the orders and labdas, and the time per point in microseconds
+        ('time ls' and 'time ld', computed serially)
+    """
+    rows = {}
+    for setting, accuracy in ba.ACCURACY.items():
+        errors = pd.Series(referenceerrors(accuracy, datadir))
+        row = errors.groupby(level=0).max().to_dict()
+        for name, t in timeperpoint(accuracy, npoints).items():
+            row["time " + name] = t
+        rows[setting] = row
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--npoints", type=int, default=10000)
+    args = parser.parse_args()
+    report = accuracyreport(args.npoints)
+    formatters = {
+        c: ("{:.1f}" if c.startswith("time") else "{:.1e}").format for c in report
+    }
+    print(report.to_string(formatters=formatters))
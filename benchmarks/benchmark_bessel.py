@@ -0,0 +1,120 @@
+"""Benchmark of the time per call of the Bessel functions of the line elements.
+
+Each function is evaluated at points around a line element, with the arrays
+allocated in every call (allocating), with one preallocated workspace and result
+array for all points (workspace) and in addition with the plan of the line element
+(plan, see `lineplan`). The functions `potdisbeslsv` and `potdisbesldv` compute
+the potential and the discharge together. Run as::
+
+    python benchmarks/benchmark_bessel.py --npoints 10000 --order 0 --extent 100
+
+The points are uniformly distributed in a square of size `2 extent` around a line
+element of length 20. The plan saves most for labdas that are small compared to
+the length of the line element (e.g. `--labda 0.3 2`).
+"""
+
+import argparse
+import time
+
+import numba
+import numpy as np
+
+from timml.besselaesnumba import besselaesnumba as ba
+
+FUNCTIONS = {
+    "potbeslsv": ba.POTBESLSV,
+    "disbeslsv": ba.DISBESLSV,
+    "potbesldv": ba.POTBESLDV,
+    "disbesldv": ba.DISBESLDV,
+    "potdisbeslsv": ba.POTDISBESLSV,
+    "potdisbesldv": ba.POTDISBESLDV,
+}
+
+# number of rows of the result per order
+NROW = {ba.POTBESLSV: 1, ba.POTBESLDV: 1, ba.POTDISBESLSV: 3, ba.POTDISBESLDV: 3}
+
+
+@numba.njit(cache=True)
+def allocating(kind, x, y, z1, z2, lab, order, ilap, naq):
+    # allocates the result and the coefficient arrays for every point
+    total = 0.0
+    for i in range(len(x)):
+        if kind == ba.POTBESLSV:
+            rv = ba.potbeslsv(x[i], y[i], z1, z2, lab, order, ilap, naq)
+        elif kind == ba.DISBESLSV:
+            rv = ba.disbeslsv(x[i], y[i], z1, z2, lab, order, ilap, naq)
+        elif kind == ba.POTBESLDV:
+            rv = ba.potbesldv(x[i], y[i], z1, z2, lab, order, ilap, naq)
+        elif kind == ba.DISBESLDV:
+            rv = ba.disbesldv(x[i], y[i], z1, z2, lab, order, ilap, naq)
+        elif kind == ba.POTDISBESLSV:
+            rv = ba.potdisbeslsv(x[i], y[i], z1, z2, lab, order, ilap, naq)
+        else:
+            rv = ba.potdisbesldv(x[i], y[i], z1, z2, lab, order, ilap, naq)
+        total += rv[-1, -1]
+    return total
+
+
+def preallocated(kind, x, y, z1, z2, lab, order, ilap, naq, plan=None):
+    nrow = NROW.get(kind, 2) * (order + 1)
+    rv = np.zeros((nrow, naq, len(x)))
+    near = np.ones(len(x), dtype="bool")
+    ba.besselvarray(kind, x, y, z1, z2, lab, order, ilap, naq, near, rv, plan)
+
+
+def planned(kind, x, y, z1, z2, lab, order, ilap, naq):
+    plan = ba.lineplan(z1, z2, lab)
+    preallocated(kind, x, y, z1, z2, lab, order, ilap, naq, plan)
+
+
+def benchmark_bessel(
+    npoints=10000, order=0, extent=100.0, labda=(2.0, 10.0), repeat=3, seed=1
+):
+    """Time per call of the Bessel functions with and without workspace and plan.
+
+    Returns
+    -------
+    dict
+        time per call in microseconds for each function and method
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(-extent, extent, npoints)
+    y = rng.uniform(-extent, extent, npoints)
+    z1, z2 = complex(-10.0, -2.0), complex(10.0, 3.0)
+    lab = np.array([0.0, *labda])
+    timings = {}
+    for name, kind in FUNCTIONS.items():
+        timings[name] = {}
+        for label, func in [
+            ("allocating", allocating),
+            ("workspace", preallocated),
+            ("plan", planned),
+        ]:
+            args = (kind, x, y, z1, z2, lab, order, 1, len(lab))
+            func(*args[:1], x[:1], y[:1], *args[3:])  # compile
+            times = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                func(*args)
+                times.append(time.perf_counter() - t0)
+            timings[name][label] = min(times) / npoints * 1e6
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--npoints", type=int, default=10000)
+    parser.add_argument("--order", type=int, default=0)
+    parser.add_argument("--extent", type=float, default=100.0)
+    parser.add_argument("--labda", type=float, nargs="+", default=[2.0, 10.0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    timings = benchmark_bessel(
+        args.npoints, args.order, args.extent, args.labda, args.repeat
+    )
+    for name, times in timings.items():
+        print(
+            f"{name:12s} allocating {times['allocating']:7.2f} us   "
+            f"workspace {times['workspace']:7.2f} us   "
+            f"plan {times['plan']:7.2f} us"
+        )
@@ -0,0 +1,83 @@
+"""Benchmark of the time to import timml and to answer a first head query.
+
+Every case runs in a new Python process, so that nothing is imported yet. The
+cases are
+
+- 'import': ``import timml``;
+- 'eager import': ``import timml`` followed by the imports that ``import timml``
+  did before they became lazy (all classes and functions, matplotlib.pyplot,
+  scipy.integrate and the numba kernels);
+- 'head query': ``import timml``, build and solve a small model with a well and a
+  line-sink and compute the head at one point (the numba kernels are loaded from
+  the cache; run ``python -m timml.jitcache`` first).
+
+Run as::
+
+    python benchmarks/benchmark_import.py --repeat 5
+"""
+
+import argparse
+import subprocess
+import sys
+
+# modules that are only imported when needed
+HEAVY = ("matplotlib", "scipy.integrate", "numba")
+
+CASES = {
+    "import": "import timml",
+    "eager import": """
+import timml
+from timml import *
+import matplotlib.pyplot
+import scipy.integrate
+import timml.besselaesnumba.besselaesnumba
+""",
+    "head query": """
+import timml
+ml = timml.ModelMaq(kaq=[10, 20], z=[20, 12, 10, 0], c=[100])
+timml.Well(ml, 0, 0, Qw=100, layers=0)
+timml.HeadLineSink(ml, -100, -80, 100, -90, hls=12, layers=0)
+timml.Constant(ml, xr=500, yr=500, hr=10, layer=0)
+ml.solve(silent=True)
+ml.head(10.0, 20.0)
+""",
+}
+
+TEMPLATE = """
+import sys
+import time
+t0 = time.perf_counter()
+{code}
+t = time.perf_counter() - t0
+print(t, *[m for m in {heavy} if m in sys.modules])
+"""
+
+
+def runcase(code):
+    """Wall time in seconds of `code` in a new process and the heavy modules."""
+    script = TEMPLATE.format(code=code, heavy=HEAVY)
+    out = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(out[0]), out[1:]
+
+
+def importreport(repeat=5):
+    """Minimum wall time of each case and the heavy modules it imported."""
+    report = {}
+    for name, code in CASES.items():
+        times = []
+        for _ in range(repeat):
+            t, modules = runcase(code)
+            times.append(t)
+        report[name] = (min(times), modules)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    runcase(CASES["head query"])  # compile or load the kernels once
+    for name, (t, modules) in importreport(args.repeat).items():
+        print(f"{name:>12}: {t:6.3f} s  imports {', '.join(modules) or '-'}")
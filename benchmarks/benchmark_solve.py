@@ -0,0 +1,220 @@
+"""Benchmark of the assembly and solution of the matrix.
+
+The models are the benchmark models of `notebooks/benchmarking_besselaes.ipynb`,
+plus a larger model with many line-sinks where the assembly of the matrix
+dominates the solution time. Run as::
+
+    python benchmarks/benchmark_solve.py --nproc 2 4 8
+
+where `--nproc` is the number of processes or threads.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import timml
+
+
+def model_linesinks():
+    ml = timml.ModelMaq(
+        kaq=[2, 6, 4], z=[165, 140, 120, 80, 60, 0], c=[2000, 20000], npor=0.3
+    )
+    timml.Constant(ml, xr=20000, yr=20000, hr=175, layer=0)
+    timml.CircAreaSink(ml, xc=10000, yc=10000, R=15000, N=0.0002, layer=0)
+    timml.Well(ml, xw=10000, yw=8000, Qw=1000, rw=0.3, layers=0, label="well 1")
+    timml.Well(ml, xw=12100, yw=10700, Qw=5000, rw=0.3, layers=2, label="well 2")
+    timml.Well(ml, xw=10000, yw=4600, Qw=5000, rw=0.3, layers=[1, 2], label="maq well")
+    xy1 = [
+        (833, 14261),
+        (3229, 14843),
+        (6094, 15885),
+        (8385, 15677),
+        (10781, 14895),
+        (12753, 14976),
+    ]
+    xy2 = [
+        (356, 6976),
+        (4043, 7153),
+        (6176, 8400),
+        (9286, 9820),
+        (12266, 9686),
+        (15066, 9466),
+    ]
+    xy3 = [
+        (1376, 1910),
+        (4176, 2043),
+        (6800, 1553),
+        (9953, 2086),
+        (14043, 2043),
+        (17600, 976),
+    ]
+    xy4 = [
+        (9510, 19466),
+        (12620, 17376),
+        (12753, 14976),
+        (13020, 12176),
+        (15066, 9466),
+        (16443, 7910),
+        (17510, 5286),
+        (17600, 976),
+    ]
+    hls4 = [170, np.nan, 166, np.nan, 162, np.nan, np.nan, 156]
+    timml.HeadLineSinkString(ml, xy=xy1, hls=[176, 166], layers=0)
+    timml.HeadLineSinkString(ml, xy=xy2, hls=[174, 162], layers=0)
+    timml.HeadLineSinkString(ml, xy=xy3, hls=[170, 156], layers=0)
+    timml.HeadLineSinkString(ml, xy=xy4, hls=hls4, layers=0)
+    return ml
+
+
+def model_buildingpit():
+    kh = 2.0  # m/day
+    kv = 0.05 * kh
+    ctop = 800.0  # resistance top leaky layer in days
+    z_dw = -15.0  # bottom elevation of sheetpile wall
+    length = 40.0  # length building pit in m
+    width = 30.0  # width building pit in m
+    h_bem = -6.21  # m
+    offset = 5.0  # distance extraction element from sheetpiles in m
+    xy = [
+        (-length / 2, -width / 2),
+        (length / 2, -width / 2),
+        (length / 2, width / 2),
+        (-length / 2, width / 2),
+        (-length / 2, -width / 2),
+    ]
+    z = np.array([1.0, 0.0, z_dw, z_dw, z_dw - 15.0, z_dw - 15.0, -60.0])
+    dz = z[1::2] - z[2::2]
+    kh_arr = kh * np.ones(dz.shape)
+    c = np.r_[np.array([ctop]), dz[:-1] / (2 * kv) + dz[1:] / (2 * kv)]
+    ml = timml.ModelMaq(kaq=kh_arr, z=z, c=c, topboundary="semi", hstar=0.0)
+    layers = np.arange(np.sum(z_dw <= ml.aq.zaqbot))
+    timml.BuildingPitMaq(
+        ml,
+        xy,
+        kaq=kh_arr,
+        z=z[1:],
+        topboundary="conf",
+        c=c[1:],
+        order=4,
+        ndeg=3,
+        layers=layers,
+    )
+    for y in [width / 2 - offset, 0.0, -width / 2 + offset]:
+        timml.HeadLineSink(
+            ml,
+            x1=-length / 2 + offset,
+            y1=y,
+            x2=length / 2 - offset,
+            y2=y,
+            hls=h_bem,
+            layers=np.arange(layers[-1] + 1),
+        )
+    return ml
+
+
+def model_inhoms():
+    ml = timml.ModelMaq(kaq=[10, 20], z=[20, 0, -10, -30], c=[4000])
+    xy1 = [
+        (0, 600),
+        (-100, 400),
+        (-100, 200),
+        (100, 100),
+        (300, 100),
+        (500, 100),
+        (700, 300),
+        (700, 500),
+        (600, 700),
+        (400, 700),
+        (200, 600),
+    ]
+    timml.PolygonInhomMaq(
+        ml, xy=xy1, kaq=[2, 80], z=[20, 0, -10, -30], c=[500], order=4, ndeg=2
+    )
+    xy2 = [
+        (0, 600),
+        (200, 600),
+        (400, 700),
+        (400, 900),
+        (200, 1100),
+        (0, 1000),
+        (-100, 800),
+    ]
+    timml.PolygonInhomMaq(
+        ml, xy=xy2, kaq=[2, 8], z=[20, 0, -10, -30], c=[50], order=4, ndeg=2
+    )
+    timml.Constant(ml, xr=1000, yr=0, hr=40)
+    timml.Uflow(ml, slope=0.002, angle=-45)
+    timml.Well(ml, xw=400, yw=400, Qw=500, rw=0.2, layers=0)
+    return ml
+
+
+def model_large(nls=400, nwells=100, seed=1):
+    """Model with many randomly placed line-sinks and wells."""
+    rng = np.random.default_rng(seed)
+    ml = timml.ModelMaq(kaq=[10, 20, 5], z=[20, 0, -10, -30, -40, -60], c=[400, 800])
+    for x, y, angle in rng.uniform([0, 0, 0], [10000, 10000, np.pi], (nls, 3)):
+        dx, dy = 50 * np.cos(angle), 50 * np.sin(angle)
+        timml.HeadLineSink(
+            ml, x - dx, y - dy, x + dx, y + dy, hls=10, order=2, layers=0
+        )
+    for x, y in rng.uniform(0, 10000, (nwells, 2)):
+        timml.Well(ml, x, y, Qw=100, rw=0.2, layers=[1, 2])
+    timml.Constant(ml, xr=20000, yr=20000, hr=12, layer=0)
+    return ml
+
+
+models = {
+    "linesinks": model_linesinks,
+    "buildingpit": model_buildingpit,
+    "inhoms": model_inhoms,
+    "large": model_large,
+}
+
+
+def timeit(func, repeat=3, **kwargs):
+    """Minimum time of `repeat` calls to `func` with keyword arguments `kwargs`."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(**kwargs)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def benchmark_solve(nproc_list=(2, 4), repeat=3):
+    """Time `solve`, `solve` with threads and `solve_mp` for the benchmark models.
+
+    Returns
+    -------
+    dict
+        time in seconds for each model and method
+    """
+    timings = {}
+    for name, create in models.items():
+        ml = create()
+        ml.solve(silent=True)  # compile numba functions
+        timings[name] = {"solve": timeit(ml.solve, repeat, silent=True)}
+        for nproc in nproc_list:
+            with ml.threads(nproc):
+                label = f"solve(n_threads={nproc})"
+                timings[name][label] = timeit(ml.solve, repeat, silent=True)
+            for chunksize in [None, int(np.ceil(ml.neq / nproc))]:
+                label = f"solve_mp(nproc={nproc}, chunksize={chunksize})"
+                timings[name][label] = timeit(
+                    ml.solve_mp, repeat, nproc=nproc, silent=True, chunksize=chunksize
+                )
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nproc", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for name, times in benchmark_solve(args.nproc, args.repeat).items():
+        print(name)
+        for label, t in times.items():
+            speedup = times["solve"] / t
+            print(f"    {label:40s} {t:8.3f} s   speedup {speedup:5.2f}")
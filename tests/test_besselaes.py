@@ -112,3 +112,74 @@ def test_disbesldv():
         qxqyv[3],
         np.array([0.10617613097471285, 0.11627387807684744, 0.10674211206906066]),
     )
+
+
+def test_lineplan():
+    z1, z2 = complex(-3.0, -1.0), complex(2.0, 2.0)
+    lab = np.array([0.0, 0.5, 2.0])
+    plan = besselaesnew.lineplan(z1, z2, lab)
+    for x, y in [(2.0, 1.0), (-0.5, 0.6), (4.0, -3.0), (30.0, 20.0)]:
+        for func in [
+            besselaesnew.potbeslsv,
+            besselaesnew.disbeslsv,
+            besselaesnew.potbesldv,
+            besselaesnew.disbesldv,
+        ]:
+            rv = func(x, y, z1, z2, lab, 2, 1, 3)
+            assert_allclose(func(x, y, z1, z2, lab, 2, 1, 3, plan=plan), rv, rtol=0)
+
+
+def test_potdisbesselv():
+    z1, z2 = complex(-3.0, -1.0), complex(2.0, 2.0)
+    lab = np.array([0.0, 0.5, 2.0])
+    x = np.array([2.0, -0.5, 4.0, 30.0])
+    y = np.array([1.0, 0.6, -3.0, 20.0])
+    for potdis, pot, dis in [
+        (besselaesnew.potdisbeslsv, besselaesnew.potbeslsv, besselaesnew.disbeslsv),
+        (besselaesnew.potdisbesldv, besselaesnew.potbesldv, besselaesnew.disbesldv),
+    ]:
+        for i in range(len(x)):
+            args = (x[i], y[i], z1, z2, lab, 2, 1, 3)
+            rv = np.vstack((pot(*args), dis(*args)))
+            assert_allclose(potdis(*args), rv, rtol=0)
+    rv = besselaesnew.potdisbesldvarray(x, y, z1, z2, lab, 2, 1, 3)
+    assert_allclose(rv[:3], besselaesnew.potbesldvarray(x, y, z1, z2, lab, 2, 1, 3))
+    assert_allclose(rv[3:], besselaesnew.disbesldvarray(x, y, z1, z2, lab, 2, 1, 3))
+
+
+def test_accuracy():
+    z1, z2 = complex(-3.0, -1.0), complex(2.0, 2.0)
+    lab = np.array([0.0, 0.5, 2.0])
+    x = np.array([2.0, -0.5, 4.0, 30.0])
+    y = np.array([1.0, 0.6, -3.0, 20.0])
+    for func in [besselaesnew.potdisbeslsvarray, besselaesnew.potdisbesldvarray]:
+        rv = func(x, y, z1, z2, lab, 2, 1, 3)
+        for accuracy in besselaesnew.ACCURACY.values():
+            rvacc = func(x, y, z1, z2, lab, 2, 1, 3, accuracy=accuracy)
+            assert_allclose(rvacc, rv, rtol=0, atol=1e-3 * np.abs(rv).max())
+
+
+def test_linetable():
+    z1, z2 = complex(-3.0, -1.0), complex(2.0, 2.0)
+    lab = np.array([0.0, 0.5, 2.0])
+    biglab = 2 * lab[1:] / abs(z2 - z1)
+    rng = np.random.default_rng(1)
+    x = rng.uniform(-6.0, 6.0, 200)
+    y = rng.uniform(-5.0, 6.0, 200)
+    for lstype, func, kind in [
+        (1, besselaesnew.potdisbeslsvarray, besselaesnew.POTDISBESLSV),
+        (2, besselaesnew.potdisbesldvarray, besselaesnew.POTDISBESLDV),
+    ]:
+        values, params, error = besselaesnew.linetable(lstype, 1, biglab)
+        assert np.all(error < 1e-3)
+        table = (values, params)
+        rv = func(x, y, z1, z2, lab, 1, 1, 3)
+        rvtab = func(x, y, z1, z2, lab, 1, 1, 3, table=table)
+        assert_allclose(rvtab, rv, rtol=0, atol=1e-3 * np.abs(rv).max())
+        # pointwise functions give the same values as the array functions
+        for i in [0, 17, 123]:
+            rvi = np.zeros((6, 3))
+            besselaesnew.tablev(
+                kind, x[i], y[i], z1, z2, lab, 1, 1, 3, rvi, None, None, 0, table
+            )
+            assert_allclose(rvi, rvtab[:, :, i], rtol=1e-12, atol=1e-14)
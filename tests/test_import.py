@@ -1,8 +1,37 @@
+import subprocess
+import sys
+
+
 def test_import():
     import timml
 
     print(timml.__version__)
 
 
+def test_lazy_import():
+    # matplotlib, scipy.integrate and numba are imported when they are needed
+    code = "import sys, timml; print(*sorted(m for m in {} if m in sys.modules))"
+    heavy = ["matplotlib", "scipy.integrate", "numba"]
+    out = subprocess.run(
+        [sys.executable, "-c", code.format(heavy)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert out.strip() == ""
+
+
+def test_warmup():
+    import timml
+
+    compiled = timml.warmup()
+    for name in [
+        "besselaesnumba.besselvarrayparallel",
+        "evaluator.potentialkernel",
+        "treecode.treekernelparallel",
+    ]:
+        assert compiled[name] > 0
+
+
 if __name__ == "__main__":
     test_import()
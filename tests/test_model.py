@@ -0,0 +1,591 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+import timml
+from timml import equation
+from timml.linedoublet import LeakyLineDoublet
+from timml.linesink import HeadLineSinkZero
+
+
+def model_confined():
+    ml = timml.ModelMaq(kaq=[10, 20], z=[20, 12, 10, 0], c=[100], npor=0.3)
+    timml.Uflow(ml, slope=0.002, angle=30)
+    timml.Well(ml, 50, 20, Qw=200, rw=0.2, layers=[0, 1])
+    timml.HeadWell(ml, 20, -60, hw=5, layers=0)
+    timml.HeadLineSinkString(
+        ml, xy=[(0, 100), (40, 120), (90, 110)], hls=[4, 3], layers=0, order=1
+    )
+    timml.ImpLineDoublet(ml, x1=100, y1=-50, x2=120, y2=0, layers=[0, 1], order=2)
+    timml.Constant(ml, xr=500, yr=500, hr=10, layer=0)
+    return ml
+
+
+def model_inhom():
+    ml = timml.ModelMaq(
+        kaq=[10, 5],
+        z=[21, 20, 10, 8, 0],
+        c=[100, 300],
+        topboundary="semi",
+        hstar=15,
+    )
+    timml.PolygonInhomMaq(
+        ml,
+        xy=[(-50, -50), (50, -50), (60, 50), (-40, 60)],
+        kaq=[4, 2],
+        z=[21, 20, 10, 8, 0],
+        c=[200, 100],
+        topboundary="semi",
+        hstar=13,
+        order=2,
+        ndeg=2,
+    )
+    timml.Well(ml, 0, 0, Qw=100, layers=0)
+    timml.HeadLineSink(ml, -100, -80, 100, -90, hls=12, layers=0, order=2)
+    return ml
+
+
+def test_headgrid_vectorized():
+    for ml in [model_confined(), model_inhom()]:
+        ml.solve(silent=True)
+        xg = np.linspace(-115, 115, 7)
+        yg = np.linspace(-110, 110, 5)
+        h = ml.headgrid(xg, yg)
+        qxqy = ml.disvec(xg[np.newaxis, :], yg[:, np.newaxis])
+        for j in range(len(yg)):
+            for i in range(len(xg)):
+                assert_allclose(h[:, j, i], ml.head(xg[i], yg[j]), rtol=1e-12)
+                assert_allclose(
+                    qxqy[:, :, j, i], ml.disvec(xg[i], yg[j]), rtol=1e-10, atol=1e-12
+                )
+        assert ml.headgrid(xg, yg, layers=1).shape == (1, 5, 7)
+        assert ml.headalongline(xg, 0.0).shape == (2, 7)
+
+
+def test_find_aquifer_data_array():
+    ml = model_inhom()
+    timml.BuildingPitMaq(
+        ml,
+        xy=[(70, 0), (100, 0), (100, 30)],
+        kaq=[4, 2],
+        z=[21, 20, 10, 8, 0],
+        c=[200, 100],
+        topboundary="semi",
+        hstar=13,
+        order=1,
+    )
+    ml1d = timml.ModelMaq(kaq=[1, 2], z=[3, 2, 1, 0], c=[1000])
+    for x1, x2 in [(-np.inf, -50), (-50, 50), (50, np.inf)]:
+        timml.StripInhomMaq(ml1d, x1=x1, x2=x2, kaq=[1, 2], z=[3, 2, 1, 0], c=[1000])
+    # grid, random points and corners and sides of the polygons
+    x, y = np.meshgrid(np.linspace(-60, 110, 35), np.linspace(-60, 110, 35))
+    rng = np.random.default_rng(0)
+    x = np.hstack((x.ravel(), [-50, 50, 60, 70, 100, 85], rng.uniform(-70, 120, 500)))
+    y = np.hstack((y.ravel(), [-50, -50, 50, 0, 30, 0], rng.uniform(-70, 120, 500)))
+    for model in [ml, ml1d]:
+        model.initialize()
+        groups = model.aq.find_aquifer_data_array(x, y)
+        assert len(groups) == 3
+        iaq = np.full(len(x), -1)
+        for i, (aq, index) in enumerate(groups):
+            iaq[index] = i
+            for j in index:
+                assert model.aq.find_aquifer_data(x[j], y[j]) is aq
+        assert np.all(iaq >= 0)
+
+
+def test_evaluator():
+    for ml in [model_confined(), model_inhom()]:
+        ml.solve(silent=True)
+        ev = ml.evaluator()
+        xg = np.linspace(-115, 115, 7)
+        yg = np.linspace(-110, 110, 5)
+        assert_allclose(ev.headgrid(xg, yg), ml.headgrid(xg, yg), rtol=1e-10)
+        x, y = xg[np.newaxis, :], yg[:, np.newaxis]
+        assert_allclose(ev.disvec(x, y), ml.disvec(x, y), rtol=1e-8, atol=1e-10)
+        assert ev.head(10.0, 20.0, layers=[1]).shape == (1,)
+
+
+def test_threads():
+    ml = model_inhom()
+    mat, rhs = ml.solve(printmat=1, silent=True)
+    ml.solve(silent=True)
+    xg = np.linspace(-115, 115, 7)
+    yg = np.linspace(-110, 110, 5)
+    h = ml.headgrid(xg, yg)
+    with ml.threads(3):
+        mat2, rhs2 = ml.solve(printmat=1, silent=True)
+        ml.solve(silent=True)
+        h2 = ml.headgrid(xg, yg)
+    assert ml.n_threads == 1
+    assert_allclose(mat2, mat, rtol=0, atol=0)
+    assert_allclose(h2, h, rtol=0, atol=0)
+
+
+def test_resolve():
+    ml = model_confined()
+    ml.solve(silent=True)
+    fingerprint = ml.lufingerprint
+    ml.elementlist[1].Qw = np.array([300.0])  # Well
+    ml.elementlist[3].hls = np.array([5.0, 2.0])  # HeadLineSinkString
+    ml.elementlist[0].slope = 0.004  # Uflow
+    ml.resolve(silent=True)
+    assert ml.lufingerprint == fingerprint
+    h = ml.headgrid([-50.0, 50.0], [-40.0, 40.0])
+    ml.solve(silent=True)
+    assert_allclose(h, ml.headgrid([-50.0, 50.0], [-40.0, 40.0]), rtol=1e-12)
+    ml.elementlist[4].x2 = 125.0  # ImpLineDoublet
+    ml.resolve(silent=True)
+    assert ml.lufingerprint != fingerprint
+
+
+def test_resolve_update():
+    ml = model_inhom()
+    ml.solve(silent=True)
+    xg = np.linspace(-115, 115, 4)
+    yg = np.linspace(-110, 110, 3)
+    well = timml.HeadWell(ml, 20, 10, hw=12, layers=[0, 1])
+    ml.resolve(silent=True)
+    assert ml.luupdate[1].nupdate == 2
+    h = ml.headgrid(xg, yg)
+    ml.solve(silent=True)
+    assert_allclose(h, ml.headgrid(xg, yg), rtol=1e-10)
+    ml.remove_element(ml.elementlist[2])  # HeadLineSink
+    well.xw = -20.0
+    ml.resolve(silent=True, maxupdate=0.5)
+    assert ml.luupdate[1].nupdate == 7
+    h = ml.headgrid(xg, yg)
+    ml.solve(silent=True)
+    assert_allclose(h, ml.headgrid(xg, yg), rtol=1e-10)
+
+
+def test_solve_scenarios():
+    ml = model_inhom()
+    well, ls = ml.elementlist[1], ml.elementlist[2]
+    scenarios = {(well, "Qw"): [100, 250, 0], (ls, "hls"): [12, 11, 14]}
+    sol = ml.solve_scenarios(scenarios, silent=True)
+    assert sol.shape == (ml.neq, 3)
+    xg = np.linspace(-115, 115, 4)
+    yg = np.linspace(-110, 110, 3)
+    h = ml.headgrid(xg, yg)
+    assert h.shape == (3, 2, 3, 4)
+    assert ml.head(10.0, 20.0, layers=[1]).shape == (3, 1)
+    assert ml.disvec(10.0, 20.0).shape == (3, 2, 2)
+    for k in range(3):
+        well.Qw = np.array([scenarios[(well, "Qw")][k]], dtype="d")
+        ls.hls = np.array([scenarios[(ls, "hls")][k]], dtype="d")
+        ml.solve(silent=True)
+        assert_allclose(h[k], ml.headgrid(xg, yg), rtol=1e-10)
+
+
+def test_observation_points():
+    ml = model_confined()
+    ml.solve(silent=True)
+    x, y = np.array([-50.0, 10.0, 80.0]), np.array([-40.0, 60.0, 0.0])
+    obs = timml.ObservationPoints(ml, x, y, layers=[1])
+    assert_allclose(obs.head(), ml.head(x, y, layers=[1]), rtol=1e-12)
+    infmat = obs.infmat
+    ml.elementlist[1].Qw = np.array([300.0])  # Well
+    ml.elementlist[0].slope = 0.004  # Uflow
+    ml.solve(silent=True)
+    assert_allclose(obs.head(), ml.head(x, y, layers=[1]), rtol=1e-12)
+    assert obs.infmat is infmat
+    ml.elementlist[1].xw = 40.0
+    ml.solve(silent=True)
+    assert_allclose(obs.head(), ml.head(x, y, layers=[1]), rtol=1e-12)
+    assert obs.infmat is not infmat
+    fingerprint = ml.fingerprint
+    ml.fingerprint = None  # compared once per solve only
+    obs.head()
+    ml.fingerprint = fingerprint
+
+
+def test_farfield():
+    ml = timml.ModelMaq(
+        kaq=[10, 20], z=[21, 20, 0, -10, -30], c=[10, 50], topboundary="semi", hstar=5
+    )
+    ls1 = timml.HeadLineSink(ml, -10, 0, 10, 0, hls=4, order=2, layers=0)
+    ls2 = timml.HeadLineSink(ml, 2990, 0, 3010, 0, hls=3, order=2, layers=0)
+    ml.solve(silent=True)
+    assert ml.aq.nearelements(0.0, 5.0) == [ml.aq.constantstar, ls1]
+    assert ls2.farfieldbox()[0] > 0.0
+    x = np.array([0.0, 1500.0, 3000.0])
+    h = ml.head(x, 5.0)
+    for i in range(3):
+        assert_allclose(h[:, i], ml.head(x[i], 5.0), rtol=1e-12)
+    ml = model_confined()  # Laplace part, all elements are near
+    ml.solve(silent=True)
+    assert ml.aq.elementindex is None
+
+
+def test_treecode():
+    ml = model_confined()
+    for x in np.linspace(-1000, 1000, 40):
+        timml.HeadLineSink(ml, x, 300, x + 20, 320, hls=9, order=2, layers=0)
+    ml.solve(silent=True)
+    xg = np.linspace(-1100, 1100, 12)
+    yg = np.linspace(-210, 390, 9)
+    h = ml.headgrid(xg, yg)
+    qxqy = ml.disvec(xg[np.newaxis, :], yg[:, np.newaxis])
+    with ml.treecode(tol=1e-10):
+        assert_allclose(ml.headgrid(xg, yg), h, rtol=1e-9)
+        assert_allclose(
+            ml.disvec(xg[np.newaxis, :], yg[:, np.newaxis]), qxqy, atol=1e-9
+        )
+        assert len(ml.laplacetreecode(ml.aq).elements) == 44
+    # the treecode is built again after the input changed
+    ml.elementlist[-1].x2 += 5.0
+    ml.solve(silent=True)
+    h = ml.headgrid(xg, yg)
+    with ml.treecode(tol=1e-10):
+        assert_allclose(ml.headgrid(xg, yg), h, rtol=1e-9)
+
+
+def test_treecode_threads():
+    # the parallel kernels may not be called from several threads at the same time;
+    # this failed or hung at exit with some threading layers of numba
+    code = """
+import numpy as np
+import timml
+ml = timml.ModelMaq(kaq=[10, 20], z=[20, 12, 10, 0], c=[100])
+for x in np.linspace(-1000, 1000, 40):
+    timml.HeadLineSink(ml, x, 300, x + 20, 320, hls=9, layers=0)
+timml.Constant(ml, xr=0, yr=0, hr=10, layer=0)
+ml.solve(silent=True)
+xg, yg = np.linspace(-1100, 1100, 100), np.linspace(-210, 390, 8)
+h = ml.headgrid(xg, yg)
+with ml.threads(4), ml.treecode(1e-10):
+    htree = ml.headgrid(xg, yg)
+print(np.abs(htree - h).max())
+"""
+    env = dict(os.environ, NUMBA_THREADING_LAYER="workqueue")
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=900,
+        env=env,
+    ).stdout
+    assert float(out) < 1e-8
+
+
+def test_solve_mp_exit():
+    # a forked worker hung at exit after a parallel kernel ran in headgrid
+    code = """
+import numpy as np
+import timml
+ml = timml.ModelMaq(kaq=[10, 20], z=[20, 12, 10, 0], c=[100])
+timml.HeadLineSink(ml, -100, -80, 100, -90, hls=12, layers=0)
+timml.Constant(ml, xr=500, yr=500, hr=10, layer=0)
+sol = ml.solve(silent=True, sendback=True)
+ml.headgrid(np.linspace(-110, 110, 20), np.linspace(-100, 120, 20))
+print(np.abs(ml.solve_mp(nproc=1, silent=True, sendback=True) - sol).max())
+"""
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=120,
+    ).stdout
+    assert float(out) < 1e-12
+
+
+def test_solve_iterative():
+    for ml in [model_confined(), model_inhom()]:
+        sol = ml.solve(silent=True, sendback=True)
+        for method in ["gmres", "bicgstab"]:
+            soliter = ml.solve_iterative(method=method, silent=True, sendback=True)
+            assert not ml.solverinfo["direct"]
+            assert ml.solverinfo["residual"] < 1e-10
+            assert_allclose(soliter, sol, rtol=1e-8, atol=1e-8 * np.abs(sol).max())
+    for store in [False, True]:
+        soliter = ml.solve_iterative(
+            method="bicgstab", maxiter=2, store=store, silent=True, sendback=True
+        )
+        assert ml.solverinfo["direct"]
+        assert_allclose(soliter, sol, rtol=1e-10)
+
+
+def test_solve_iterative_treecode():
+    mlconfined = model_confined()
+    for x in np.linspace(-1000, 1000, 40):
+        timml.HeadLineSink(mlconfined, x, 300, x + 20, 320, hls=9, order=2, layers=0)
+    timml.LeakyLineDoubletString(
+        mlconfined, xy=[(0, 200), (50, 210), (90, 230)], res=5, layers=[0, 1]
+    )
+    for ml in [mlconfined, model_inhom()]:
+        sol = ml.solve(silent=True, sendback=True)
+        with ml.treecode(tol=1e-12):
+            soliter = ml.solve_iterative(store=False, silent=True, sendback=True)
+        assert not ml.solverinfo["direct"]
+        assert ml.solverinfo["residual"] < 1e-10
+        assert_allclose(soliter, sol, rtol=1e-8, atol=1e-8 * np.abs(sol).max())
+    assert mlconfined.solverinfo["compression"] < 1.0
+
+
+def test_solve_compressed():
+    ml = model_confined()
+    for x in np.linspace(-5000, -4000, 80):
+        timml.HeadLineSink(ml, x, 0, x + 20, 10, hls=9, order=1, layers=0)
+    for x in np.linspace(4000, 5000, 80):
+        timml.HeadLineSink(ml, x, 0, x + 20, 10, hls=9, order=1, layers=0)
+    sol = ml.solve(silent=True, sendback=True)
+    bordercolumns = ml.bordercolumns
+    nevaluated = 0
+
+    def block(rowelements, colelements):  # count the evaluated entries
+        nonlocal nevaluated
+        rows = bordercolumns(rowelements, colelements)
+        nevaluated += rows.size
+        return rows
+
+    ml.bordercolumns = block
+    solh = ml.solve_iterative(compress=1e-10, silent=True, sendback=True)
+    assert ml.solverinfo["compression"] < 0.8
+    assert nevaluated < 0.8 * ml.neq**2
+    assert_allclose(solh, sol, rtol=1e-8, atol=1e-8 * np.abs(sol).max())
+
+
+def test_solve_outofcore():
+    ml = model_inhom()
+    sol = ml.solve(silent=True, sendback=True)
+    solooc = ml.solve_outofcore(blocksize=16, silent=True, sendback=True)
+    assert_allclose(solooc, sol, rtol=1e-10, atol=1e-10 * np.abs(sol).max())
+    ml.elementlist[1].Qw = np.array([200.0])  # well
+    sol = ml.resolve(silent=True, sendback=True)
+    assert type(ml.lu).__name__ == "OutOfCoreLU"
+    assert_allclose(sol, ml.solve(silent=True, sendback=True), rtol=1e-10)
+
+
+def test_solve_mp():
+    ml = model_inhom()
+    sol = ml.solve(silent=True, sendback=True)
+    for chunksize in [None, 10]:
+        solmp = ml.solve_mp(nproc=2, chunksize=chunksize, silent=True, sendback=True)
+        assert_allclose(solmp, sol, rtol=1e-12, atol=1e-12 * np.abs(sol).max())
+    assert type(ml.lu).__name__ == "SharedMemoryLU"
+    ml.elementlist[1].Qw = np.array([200.0])  # well
+    sol = ml.resolve(silent=True, sendback=True)
+    assert_allclose(sol, ml.solve(silent=True, sendback=True), rtol=1e-10)
+
+
+def test_solve_mixed():
+    ml = model_inhom()
+    sol = ml.solve(silent=True, sendback=True)
+    for store in [False, True]:
+        solmixed = ml.solve_mixed(tol=1e-12, store=store, silent=True, sendback=True)
+        assert not ml.solverinfo["direct"]
+        assert ml.solverinfo["history"][0] > 1e-9  # single precision
+        assert ml.solverinfo["residual"] < 1e-12
+        assert_allclose(solmixed, sol, rtol=1e-10, atol=1e-10 * np.abs(sol).max())
+    solmixed = ml.solve_mixed(maxiter=0, silent=True, sendback=True)
+    assert ml.solverinfo["direct"]
+    assert_allclose(solmixed, sol, rtol=1e-10)
+
+
+def test_profile():
+    ml = model_inhom()
+    with ml.profile() as prof:
+        ml.solve(silent=True)
+    times = prof.report()
+    assert "factorization" in times.index
+    assert "assembly HeadLineSink" in times.index
+    calls = prof.callreport()
+    assert calls.loc["HeadLineSink", "potinfarray"] > 0
+    assert calls.loc["HeadLineSink", "potbeslsvarray"] > 0
+    assert ml.profiler is None
+    # calls of another model are not counted, also when profiled at the same time
+    ml2 = model_confined()
+    funcs = timml.HeadLineSink.potinfarray, timml.bessel.bessel
+    profile, profile2 = ml.profile(), ml2.profile()
+    prof, prof2 = profile.__enter__(), profile2.__enter__()
+    ml2.solve(silent=True)
+    profile.__exit__(None, None, None)  # out of order
+    profile2.__exit__(None, None, None)
+    assert prof.calls == {}
+    assert prof2.callreport().loc["ImpLineDoublet", "disvecinfarray"] > 0
+    with ml.profile() as prof:
+        ml2.solve(silent=True)
+    assert prof.calls == {}
+    assert timml.HeadLineSink.potinfarray is funcs[0]
+    assert timml.bessel.bessel is funcs[1]
+
+
+def test_accuracy():
+    ml = model_confined()
+    ml.solve(silent=True)
+    h = ml.headgrid(np.linspace(1, 101, 11), np.linspace(-51, 119, 11))
+    with ml.accuracy("medium"):
+        ml.solve(silent=True)
+        hmedium = ml.headgrid(np.linspace(1, 101, 11), np.linspace(-51, 119, 11))
+    assert ml.besselaccuracy == 0
+    assert_allclose(hmedium, h, atol=1e-3)
+    with pytest.raises(ValueError, match="setting"):
+        with ml.accuracy("fast"):
+            pass
+
+
+def test_tabulate():
+    ml = model_confined()
+    ml.solve(silent=True)
+    x, y = np.linspace(1, 101, 11), np.linspace(-51, 119, 11)
+    h = ml.headgrid(x, y)
+    with ml.tabulate():
+        assert ml.elementlist[3].lslist[0].table is not None
+        htab = ml.headgrid(x, y)
+    assert all(ls.table is None for ls in ml.elementlist[3].lslist)
+    assert_allclose(htab, h, atol=1e-3)
+
+
+def equationmixin(e):
+    """Mix-in class of timml.equation that provides `e.equation`, or None."""
+    return next((m for m in type(e).__mro__ if m.__module__ == equation.__name__), None)
+
+
+def pointrows(c, icp, e):
+    """Rows of condition element `c` at control point `icp` for element `e`.
+
+    Influences if `e` has unknowns, contribution to the right-hand side otherwise,
+    computed with one call per control point as `equation` did before the
+    influences were computed for all control points at once.
+    """
+    eq = equation
+    mixin = equationmixin(c)
+    if e.nunknowns > 0:
+        pot, disvec, T = e.potinflayers, e.disvecinflayers, "Tcol"
+    else:
+        pot, disvec, T = e.potentiallayers, e.disveclayers, "T"
+
+    def head(x, y, aq):
+        return pot(x, y, c.layers, aq=aq) / getattr(aq, T)[c.layers]
+
+    def qn(x, y, aq=None):
+        qx, qy = disvec(x, y, c.layers, aq=aq)
+        return qx * c.cosnorm[icp] + qy * c.sinnorm[icp]
+
+    def inthead(x, y, aq):
+        seg = (x[icp], y[icp], x[icp + 1], y[icp + 1], c.layers)
+        return c.intpot(pot, *seg, aq=aq) / getattr(aq, T)[c.layers]
+
+    def intflux(x, y, aq):
+        seg = (x[icp], y[icp], x[icp + 1], y[icp + 1], c.layers)
+        return c.intflux(disvec, *seg, aq=aq)
+
+    if mixin in (eq.PotentialEquation, eq.HeadEquationNoRes):
+        return pot(c.xc[icp], c.yc[icp], c.layers)
+    if mixin is eq.HeadEquation:
+        return head(c.xc[icp], c.yc[icp], c.aq)
+    if mixin is eq.DisvecEquation:
+        return qn(c.xc[icp], c.yc[icp])
+    if mixin is eq.DisvecEquationOut:
+        return qn(c.xcout[icp], c.ycout[icp])
+    if mixin is eq.LeakyWallEquation:
+        dh = head(c.xcin[icp], c.ycin[icp], c.aq) - head(
+            c.xcout[icp], c.ycout[icp], c.aq
+        )
+        if e.nunknowns > 0:
+            return qn(c.xc[icp], c.yc[icp]) - c.resfac[:, np.newaxis] * dh
+        return qn(c.xc[icp], c.yc[icp]) + c.resfac * dh  # sign as in equation
+    if mixin is eq.HeadDiffEquation:
+        return head(c.xcin[icp], c.ycin[icp], c.aqin) - head(
+            c.xcout[icp], c.ycout[icp], c.aqout
+        )
+    if mixin is eq.HeadDiffEquation2:
+        return inthead(c.xcin, c.ycin, c.aqin) - inthead(c.xcout, c.ycout, c.aqout)
+    if mixin is eq.DisvecDiffEquation:
+        return qn(c.xcin[icp], c.ycin[icp], c.aqin) - qn(
+            c.xcout[icp], c.ycout[icp], c.aqout
+        )
+    if mixin is eq.DisvecDiffEquation2:
+        return intflux(c.xcin, c.ycin, c.aqin) - intflux(c.xcout, c.ycout, c.aqout)
+    if mixin is eq.IntDisVecEquation:
+        return intflux(c.xc, c.yc, c.aq)
+    if mixin is eq.IntLeakyWallEquation:
+        dh = inthead(c.xcin, c.ycin, c.aqin) - inthead(c.xcout, c.ycout, c.aqout)
+        resfac = c.resfac if e.nunknowns > 0 else c.resfac.squeeze()
+        return intflux(c.xc, c.yc, c.aq) - resfac * dh
+
+
+def looprows(c):
+    """Matrix rows and right-hand side of element `c`, one control point at a time."""
+    mixin = equationmixin(c)
+    mat = np.empty((c.nunknowns, c.model.neq))
+    rhs = np.zeros(c.nunknowns)
+    for icp in range(c.ncp):
+        rows = slice(icp * c.nlayers, (icp + 1) * c.nlayers)
+        for e in c.model.elementlist:
+            if e.nunknowns > 0:
+                cols = slice(e.jcol, e.jcol + e.nunknowns)
+                mat[rows, cols] = pointrows(c, icp, e)
+                if e is c and mixin in (
+                    equation.PotentialEquation,
+                    equation.HeadEquation,
+                ):
+                    mat[rows, cols] -= c.resfac[icp]
+            else:
+                rhs[rows] -= pointrows(c, icp, e)
+    if mixin is equation.PotentialEquation:
+        rhs += c.pc
+    elif mixin is equation.HeadEquation:
+        rhs += c.hc
+    elif mixin is equation.HeadEquationNoRes:
+        rhs += np.tile(c.pc, c.ncp)
+    return mat, rhs
+
+
+def test_batched_equation():
+    # no element uses these two mix-ins, so they are combined with similar elements
+    class HeadLineSinkNoRes(equation.HeadEquationNoRes, HeadLineSinkZero):
+        pass
+
+    class ImpLineDoubletOut(equation.DisvecEquationOut, LeakyLineDoublet):
+        pass
+
+    ml = model_inhom()
+    HeadLineSinkNoRes(ml, x1=-80, y1=-20, x2=-60, y2=-40, hls=12, layers=[0])
+    ImpLineDoubletOut(ml, x1=80, y1=20, x2=60, y2=80, res=np.inf, order=2)
+    timml.LeakyLineDoublet(ml, x1=-80, y1=20, x2=-60, y2=80, res=10, order=2)
+    kwargs = {"kaq": [10, 5], "z": [20, 10, 8, 0], "c": [300], "order": 2, "ndeg": 2}
+    timml.BuildingPitMaq(ml, xy=[(200, 0), (300, 0), (300, 80)], **kwargs)
+    timml.LeakyBuildingPitMaq(
+        ml, xy=[(200, 200), (300, 200), (300, 280)], res=[10, 20, 30], **kwargs
+    )
+    ml1d = timml.ModelMaq(
+        kaq=[1, 2], z=[4, 3, 2, 1, 0], c=[1000, 1000], topboundary="semi", hstar=5
+    )
+    timml.StripInhomMaq(
+        ml1d,
+        x1=-50,
+        x2=50,
+        kaq=[1, 2],
+        z=[4, 3, 2, 1, 0],
+        c=[1000, 1000],
+        topboundary="semi",
+        hstar=13,
+    )
+    timml.LeakyLineDoublet1D(ml1d, xld=80, res=10, layers=[0, 1])
+    timml.HeadLineSink1D(ml1d, xls=-80, hls=2, layers=0)
+    batched = {
+        mixin
+        for name, mixin in vars(equation).items()
+        if isinstance(mixin, type) and not name.startswith("Mscreen")
+    }  # the Mscreen conditions are only applied at the first control point
+    tested = set()
+    for model in [model_confined(), ml, ml1d]:
+        model.initialize()
+        for e in model.elementlist:
+            mixin = equationmixin(e)
+            if e.nunknowns == 0 or mixin not in batched:
+                continue
+            tested.add(mixin)
+            mat, rhs = e.equation()
+            matloop, rhsloop = looprows(e)
+            assert np.array_equal(mat, matloop), e.name
+            assert np.array_equal(rhs, rhsloop), e.name
+    assert tested == batched
@@ -12,43 +12,57 @@ analytic elements and consists of a library of Python scripts and FORTRAN extens
 # --version number
 __name__ = "timml"
 __author__ = "Mark Bakker"
-# Import all classes and functions
-from timml.inhomogeneity1d import StripInhom3D, StripInhomMaq
-from timml.linedoublet import (
-    ImpLineDoublet,
-    ImpLineDoubletString,
-    LeakyLineDoublet,
-    LeakyLineDoubletString,
-)
-from timml.linedoublet1d import ImpLineDoublet1D, LeakyLineDoublet1D
-from timml.linesink import (
-    HeadLineSink,
-    HeadLineSinkContainer,
-    HeadLineSinkString,
-    HeadLineSinkZero,
-    LineSinkBase,
-    LineSinkDitch,
-    LineSinkDitchString,
-)
-from timml.linesink1d import HeadLineSink1D, LineSink1D
-from timml.model import Model, Model3D, ModelMaq
-from timml.stripareasink import StripAreaSink
-from timml.trace import timtraceline, timtracelines
-from timml.uflow import Uflow
+from importlib import import_module
+
 from timml.version import __version__
-from timml.well import HeadWell, LargeDiameterWell, Well, WellBase
 
 from . import bessel
-from .circareasink import CircAreaSink
-from .constant import Constant, ConstantStar
-from .inhomogeneity import (
-    BuildingPit3D,
-    BuildingPitMaq,
-    LeakyBuildingPit3D,
-    LeakyBuildingPitMaq,
-    PolygonInhom3D,
-    PolygonInhomMaq,
-)
+
+# module of each class and function; a module is imported when one of its names is
+# first used (see `__getattr__`), so that `import timml` is fast and does not import
+# matplotlib, scipy.integrate or numba
+_modules = {
+    "CircAreaSink": "circareasink",
+    "Constant": "constant",
+    "ConstantStar": "constant",
+    "BuildingPit3D": "inhomogeneity",
+    "BuildingPitMaq": "inhomogeneity",
+    "LeakyBuildingPit3D": "inhomogeneity",
+    "LeakyBuildingPitMaq": "inhomogeneity",
+    "PolygonInhom3D": "inhomogeneity",
+    "PolygonInhomMaq": "inhomogeneity",
+    "StripInhom3D": "inhomogeneity1d",
+    "StripInhomMaq": "inhomogeneity1d",
+    "ImpLineDoublet": "linedoublet",
+    "ImpLineDoubletString": "linedoublet",
+    "LeakyLineDoublet": "linedoublet",
+    "LeakyLineDoubletString": "linedoublet",
+    "ImpLineDoublet1D": "linedoublet1d",
+    "LeakyLineDoublet1D": "linedoublet1d",
+    "HeadLineSink": "linesink",
+    "HeadLineSinkContainer": "linesink",
+    "HeadLineSinkString": "linesink",
+    "HeadLineSinkZero": "linesink",
+    "LineSinkBase": "linesink",
+    "LineSinkDitch": "linesink",
+    "LineSinkDitchString": "linesink",
+    "HeadLineSink1D": "linesink1d",
+    "LineSink1D": "linesink1d",
+    "Model": "model",
+    "Model3D": "model",
+    "ModelMaq": "model",
+    "ModelEvaluator": "evaluator",
+    "ObservationPoints": "observation",
+    "StripAreaSink": "stripareasink",
+    "timtraceline": "trace",
+    "timtracelines": "trace",
+    "Uflow": "uflow",
+    "HeadWell": "well",
+    "LargeDiameterWell": "well",
+    "Well": "well",
+    "WellBase": "well",
+    "warmup": "jitcache",
+}
 
 __all__ = [
     "CircAreaSink",
@@ -80,6 +94,8 @@ __all__ = [
     "Model",
     "Model3D",
     "ModelMaq",
+    "ModelEvaluator",
+    "ObservationPoints",
     "StripAreaSink",
     "timtraceline",
     "timtracelines",
@@ -89,7 +105,17 @@ __all__ = [
     "LargeDiameterWell",
     "Well",
     "WellBase",
+    "warmup",
 ]
 
-# default bessel module is numba
-bessel.set_bessel_method(method="numba")
+
+def __getattr__(name):
+    if name in _modules:
+        value = getattr(import_module("." + _modules[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -3,6 +3,7 @@ import inspect  # Used for storing the input
 import numpy as np
 
 from .constant import ConstantStar
+from .spatialindex import GridIndex
 
 
 class AquiferData:
@@ -72,6 +73,7 @@ class AquiferData:
 
     def initialize(self):
         self.elementlist = []  # Elementlist of aquifer
+        self.elementindex = None  # Set in initialize_elementindex
         d0 = 1.0 / (self.c * self.T)
         d0[:-1] += 1.0 / (self.c[1:] * self.T[:-1])
         dp1 = -1.0 / (self.c[1:] * self.T[1:])
@@ -104,9 +106,47 @@ class AquiferData:
         if isinstance(e, ConstantStar):
             self.hstar = e.hstar
 
+    def initialize_elementindex(self):
+        """Build a spatial index of the far-field boxes of the elements.
+
+        Must be called after all elements are added to the aquifer. See
+        `Element.farfieldbox`. The index is only built without a Laplace part, as
+        `nearelements` returns all elements otherwise.
+        """
+        self.elementindex = None
+        if self.ilap:
+            return
+        boxes = [e.farfieldbox() for e in self.elementlist]
+        self.inear = np.array([i for i, b in enumerate(boxes) if b is None], "int")
+        self.ifar = np.array([i for i, b in enumerate(boxes) if b is not None], "int")
+        if len(self.ifar) > 0:
+            self.elementindex = GridIndex([boxes[i] for i in self.ifar])
+
+    def nearelements(self, x, y):
+        """Elements with a nonzero influence at the point `x`, `y`.
+
+        Without a Laplace part (when the top of the aquifer is leaky), an element
+        has no influence outside its far-field box and is left out. Otherwise all
+        elements are returned, as the Laplace part is not zero anywhere.
+        """
+        if self.ilap or self.elementindex is None:
+            return self.elementlist
+        ifar = self.ifar[self.elementindex.query(x, y)]
+        return [self.elementlist[i] for i in np.union1d(self.inear, ifar)]
+
     def isinside(self, x, y):
         raise Exception("Must overload AquiferData.isinside()")
 
+    def isinside_array(self, x, y):
+        """Boolean array that is True for the points of arrays `x`, `y` inside.
+
+        Calls `isinside` for every point; overloaded with a vectorized test by the
+        inhomogeneities.
+        """
+        return np.array(
+            [bool(self.isinside(xi, yi)) for xi, yi in zip(x, y, strict=True)], bool
+        )
+
     def storeinput(self, frame):
         self.inputargs, _, _, self.inputvalues = inspect.getargvalues(frame)
 
@@ -133,11 +173,13 @@ class Aquifer(AquiferData):
 
     def initialize(self):
         # cause we are going to call initialize for inhoms
-        AquiferData.initialize(self)
-        for inhom in self.inhomlist:
-            inhom.initialize()
-        for inhom in self.inhomlist:
-            inhom.create_elements()
+        with self.model.phase("initialize aquifers"):
+            AquiferData.initialize(self)
+            for inhom in self.inhomlist:
+                inhom.initialize()
+        with self.model.phase("create inhomogeneity elements"):
+            for inhom in self.inhomlist:
+                inhom.create_elements()
 
     def add_inhom(self, inhom):
         self.inhomlist.append(inhom)
@@ -150,6 +192,54 @@ class Aquifer(AquiferData):
                 if inhom.area < rv.area:
                     rv = inhom
         return rv
+
+    def find_aquifer_data_array(self, x, y):
+        """Group points by the aquifer they are located in.
+
+        Parameters
+        ----------
+        x, y : arrays
+            coordinates of the points
+
+        Returns
+        -------
+        list of tuples (aq, index)
+            aquifer data and index array of the points located in it
+        """
+        if len(self.inhomlist) == 0:
+            return [(self, slice(None))]
+        # same choice as find_aquifer_data: the first inhom with the smallest area
+        area = np.full(len(x), self.area)
+        iaq = np.full(len(x), -1)  # index in inhomlist, -1 for the background
+        for i, inhom in enumerate(self.inhomlist):
+            inside = inhom.isinside_array(x, y)
+            inside &= inhom.area < area
+            area[inside] = inhom.area
+            iaq[inside] = i
+        return [
+            (self if i < 0 else self.inhomlist[i], np.flatnonzero(iaq == i))
+            for i in np.unique(iaq)
+        ]
+
+    def evaluate_by_aquifer(self, func, x, y, **kwargs):
+        """Evaluate `func` for arrays `x` and `y` with points grouped by aquifer.
+
+        `func` is called as ``func(x, y, aq=aq, **kwargs)`` for the points in each
+        aquifer and must return an array with the points along the last axis.
+        """
+        x = np.asarray(x, dtype="d")
+        y = np.asarray(y, dtype="d")
+        groups = self.find_aquifer_data_array(x, y)
+        if len(groups) == 1:
+            aq, index = groups[0]
+            return func(x[index], y[index], aq=aq, **kwargs)
+        rv = None
+        for aq, index in groups:
+            val = func(x[index], y[index], aq=aq, **kwargs)
+            if rv is None:
+                rv = np.zeros(val.shape[:-1] + (len(x),))
+            rv[..., index] = val
+        return rv
         # Not used anymore I think 5 Nov 2015
         # def find_aquifer_number(self, x, y):
         #    rv = -1
@@ -1,13 +1,15 @@
 from importlib import import_module
 from warnings import warn
 
+import numpy as np
+
 
 def set_bessel_method(method="numba"):
     global bessel
     if method == "fortran":
         try:
             besselaesnew = import_module("timml.src.besselaesnew")
-            bessel = besselaesnew.besselaesnew
+            bessel = PointwiseArrays(besselaesnew.besselaesnew)
             bessel.initialize()
         except ImportError:
             warn(
@@ -22,4 +24,195 @@ def set_bessel_method(method="numba"):
         raise ValueError("method must be one of ['fortran', 'numba']")
 
 
-bessel = None  # is set in timml.__init__ or modified by set_bessel_method()
+def __getattr__(name):
+    # `bessel` is set by set_bessel_method(); the default numba module is imported
+    # when `bessel` is first used
+    if name == "bessel":
+        set_bessel_method(method="numba")
+        return bessel
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class PointwiseArrays:
+    """Bessel module with array versions of the functions that loop over points.
+
+    Used for modules without the array versions of `besselaesnumba`. The module
+    has no plans and tables of line elements (`lineplan` and `linetable` return
+    None) and only one setting of the accuracy; the `plan`, `accuracy` and `table`
+    arguments are ignored.
+    """
+
+    def __init__(self, module):
+        self.module = module
+
+    def __getattr__(self, name):
+        return getattr(self.module, name)
+
+    def lineplan(self, z1, z2, lab):
+        return None
+
+    def linetable(self, lstype, order, biglab):
+        return None
+
+    def potbeslsho(self, x, y, z1, z2, lab, order, ilap, naq, plan=None, accuracy=0):
+        return self.module.potbeslsho(x, y, z1, z2, lab, order, ilap, naq)
+
+    def disbeslsho(self, x, y, z1, z2, lab, order, ilap, naq, plan=None, accuracy=0):
+        return self.module.disbeslsho(x, y, z1, z2, lab, order, ilap, naq)
+
+    def potbeslsv(
+        self, x, y, z1, z2, lab, order, ilap, naq, plan=None, accuracy=0, table=None
+    ):
+        return self.module.potbeslsv(x, y, z1, z2, lab, order, ilap, naq)
+
+    def disbeslsv(
+        self, x, y, z1, z2, lab, order, ilap, naq, plan=None, accuracy=0, table=None
+    ):
+        return self.module.disbeslsv(x, y, z1, z2, lab, order, ilap, naq)
+
+    def potbesldv(
+        self, x, y, z1, z2, lab, order, ilap, naq, plan=None, accuracy=0, table=None
+    ):
+        return self.module.potbesldv(x, y, z1, z2, lab, order, ilap, naq)
+
+    def disbesldv(
+        self, x, y, z1, z2, lab, order, ilap, naq, plan=None, accuracy=0, table=None
+    ):
+        return self.module.disbesldv(x, y, z1, z2, lab, order, ilap, naq)
+
+    def potdisbeslsho(self, x, y, z1, z2, lab, order, ilap, naq, plan=None, accuracy=0):
+        args = (x, y, z1, z2, lab, order, ilap, naq)
+        return np.vstack((self.module.potbeslsho(*args), self.module.disbeslsho(*args)))
+
+    def potdisbesldho(self, x, y, z1, z2, lab, order, ilap, naq, plan=None, accuracy=0):
+        args = (x, y, z1, z2, lab, order, ilap, naq)
+        return np.vstack((self.module.potbesldho(*args), self.module.disbesldho(*args)))
+
+    def potdisbeslsv(
+        self, x, y, z1, z2, lab, order, ilap, naq, plan=None, accuracy=0, table=None
+    ):
+        args = (x, y, z1, z2, lab, order, ilap, naq)
+        return np.vstack((self.module.potbeslsv(*args), self.module.disbeslsv(*args)))
+
+    def potdisbesldv(
+        self, x, y, z1, z2, lab, order, ilap, naq, plan=None, accuracy=0, table=None
+    ):
+        args = (x, y, z1, z2, lab, order, ilap, naq)
+        return np.vstack((self.module.potbesldv(*args), self.module.disbesldv(*args)))
+
+    def pointwise(self, func, nrow, x, y, z1, z2, lab, order, ilap, naq, near):
+        rv = np.zeros((nrow, naq, len(x)))
+        for i in range(len(x)):
+            if near is None or near[i]:
+                rv[:, :, i] = func(x[i], y[i], z1, z2, lab, order, ilap, naq)
+            elif ilap:  # only Laplace part in far field
+                rv[:, :1, i] = func(x[i], y[i], z1, z2, lab[:1], order, 1, 1)
+        return rv
+
+    def potbeslsvarray(
+        self,
+        x,
+        y,
+        z1,
+        z2,
+        lab,
+        order,
+        ilap,
+        naq,
+        near=None,
+        plan=None,
+        accuracy=0,
+        table=None,
+    ):
+        args = (x, y, z1, z2, lab, order, ilap, naq, near)
+        return self.pointwise(self.module.potbeslsv, order + 1, *args)
+
+    def disbeslsvarray(
+        self,
+        x,
+        y,
+        z1,
+        z2,
+        lab,
+        order,
+        ilap,
+        naq,
+        near=None,
+        plan=None,
+        accuracy=0,
+        table=None,
+    ):
+        args = (x, y, z1, z2, lab, order, ilap, naq, near)
+        return self.pointwise(self.module.disbeslsv, 2 * (order + 1), *args)
+
+    def potbesldvarray(
+        self,
+        x,
+        y,
+        z1,
+        z2,
+        lab,
+        order,
+        ilap,
+        naq,
+        near=None,
+        plan=None,
+        accuracy=0,
+        table=None,
+    ):
+        args = (x, y, z1, z2, lab, order, ilap, naq, near)
+        return self.pointwise(self.module.potbesldv, order + 1, *args)
+
+    def disbesldvarray(
+        self,
+        x,
+        y,
+        z1,
+        z2,
+        lab,
+        order,
+        ilap,
+        naq,
+        near=None,
+        plan=None,
+        accuracy=0,
+        table=None,
+    ):
+        args = (x, y, z1, z2, lab, order, ilap, naq, near)
+        return self.pointwise(self.module.disbesldv, 2 * (order + 1), *args)
+
+    def potdisbeslsvarray(
+        self,
+        x,
+        y,
+        z1,
+        z2,
+        lab,
+        order,
+        ilap,
+        naq,
+        near=None,
+        plan=None,
+        accuracy=0,
+        table=None,
+    ):
+        args = (x, y, z1, z2, lab, order, ilap, naq, near)
+        return self.pointwise(self.potdisbeslsv, 3 * (order + 1), *args)
+
+    def potdisbesldvarray(
+        self,
+        x,
+        y,
+        z1,
+        z2,
+        lab,
+        order,
+        ilap,
+        naq,
+        near=None,
+        plan=None,
+        accuracy=0,
+        table=None,
+    ):
+        args = (x, y, z1, z2, lab, order, ilap, naq, near)
+        return self.pointwise(self.potdisbesldv, 3 * (order + 1), *args)
@@ -1,3 +1,6 @@
+import cmath
+import threading
+
 import numba
 import numpy as np
 
@@ -10,8 +13,28 @@ __all__ = [
     "disbeslsho",
     "disbesldv",
     "disbeslsv",
+    "potbeslsvarray",
+    "disbeslsvarray",
+    "potbesldvarray",
+    "disbesldvarray",
+    "potdisbeslsho",
+    "potdisbesldho",
+    "potdisbeslsv",
+    "potdisbesldv",
+    "potdisbeslsvarray",
+    "potdisbesldvarray",
+    "lineplan",
+    "linetable",
+    "ACCURACY",
 ]
 
+# kinds of functions of the array versions
+POTBESLSV, DISBESLSV, POTBESLDV, DISBESLDV = 0, 1, 2, 3
+POTDISBESLSV, POTDISBESLDV = 4, 5
+
+# minimum number of points for which the array versions use numba.prange
+PARALLELSIZE = 64
+
 
 def initialize():
     pass
@@ -79,6 +102,115 @@ BC1[7] = -0.159531523882074e-12
 AC1[8] = 0.573031034976631e-15
 BC1[8] = -0.340195779923156e-14
 
+# Settings of the accuracy of the modified Helmholtz parts (argument `accuracy` of
+# the functions). Each setting has the number of terms of the series of K0 and K1
+# (at most NTERMS), the radius of convergence for order <= 5 and order > 5, and
+# the coefficients of the series, fitted up to one more than the radius of
+# convergence. "high" uses the coefficients of Table 1 and K1 above. The radius of
+# convergence is the same for all settings, as the part of the element beyond it is
+# neglected and a smaller radius costs more accuracy than it saves time. There is no
+# setting with fewer terms than "medium": with 4 terms the error doubled for about
+# 20% less time, and a fit with 3 terms is 20 times less accurate than with 4 (see
+# `benchmarks/benchmark_accuracy.py` for the errors and times of the settings).
+ACCURACY = {"high": 0, "medium": 1}
+NTERMSACC = np.array([NTERMS, 5])
+RCONVACC = np.array([[7.0, 5.0], [7.0, 5.0]])
+ACACC = np.zeros((2, NTERMS + 1))
+BCACC = np.zeros((2, NTERMS + 1))
+AC1ACC = np.zeros((2, NTERMS + 1))
+BC1ACC = np.zeros((2, NTERMS + 1))
+ACACC[0] = AC
+BCACC[0] = BC
+AC1ACC[0] = AC1
+BC1ACC[0] = BC1
+# Coefficients of "medium", fitted for 0 <= r <= 8 (maximum errors 5e-07 and 4e-08)
+ACACC[1, :6] = [
+    -4.999999740825629e-01,
+    -1.249751853089801e-01,
+    -7.738631767118215e-03,
+    -1.923573931000572e-04,
+    -1.714994946695347e-06,
+    -2.870978255088731e-09,
+]
+BCACC[1, :6] = [
+    1.159322374982811e-01,
+    2.790480370779062e-01,
+    2.523728827894042e-02,
+    7.979424074632697e-04,
+    9.242485886755764e-06,
+    2.214735783904564e-08,
+]
+AC1ACC[1, :6] = [
+    2.499999975514838e-01,
+    3.124767949277170e-02,
+    1.295261733350438e-03,
+    2.489220363161658e-05,
+    1.923794061948399e-07,
+    3.006958864132610e-10,
+]
+BC1ACC[1, :6] = [
+    -3.079658260116815e-01,
+    -8.537678739202603e-02,
+    -4.641007214988662e-03,
+    -1.081231774127546e-04,
+    -1.055598620886682e-06,
+    -2.333494199805432e-09,
+]
+# Hat coefficients of integral g2 of IntegralG, for lstype 1 (line-sink) and lstype
+# 2 (line-doublet) of each accuracy; they only depend on lstype so are computed once
+CAHAT = np.zeros((2, 2, 2 * (NTERMS - 1) + 1))
+CBHAT = np.zeros((2, 2, 2 * (NTERMS - 1) + 1))
+for n in range(0, NTERMS):
+    CAHAT[:, 0, n] = float(n + 1) * ACACC[:, n + 1]
+    CBHAT[:, 0, n] = ACACC[:, n + 1] + float(n + 1) * BCACC[:, n + 1]
+    CAHAT[:, 1, n] = float(n + 1) * AC1ACC[:, n + 1]
+    CBHAT[:, 1, n] = AC1ACC[:, n + 1] + float(n + 1) * BC1ACC[:, n + 1]
+
+
+@numba.njit(nogil=True, cache=True)
+def worksize(order):
+    """Size of the complex workspace of the functions up to order `order`."""
+    return (NTERMS + 1) * (NTERMS + 2) + 4 * (2 * NTERMS + 1) + 4 * order + 4
+
+
+@numba.njit(nogil=True, cache=True)
+def workspace(order):
+    """Complex workspace of the functions up to order `order`.
+
+    The workspace is used instead of allocating the arrays of the coefficients
+    in each call of `IntegralF`, `IntegralG` and `IntegralLapLineDipole`. The
+    values in the workspace on entry are not used.
+    """
+    return np.empty(worksize(order), dtype=np.complex128)
+
+
+@numba.njit(nogil=True, cache=True)
+def splitwork(work, order):
+    """Arrays of the coefficients of order `order` in workspace `work`.
+
+    Returns
+    -------
+    czmzbarp, cgamma, calphat, cbetat, cc, calpha, cbeta, cg
+    """
+    n0 = NTERMS + 1
+    n1 = n0 + (NTERMS + 1) ** 2
+    n2 = n1 + 2 * NTERMS + 1
+    n3 = n2 + 2 * NTERMS + 1
+    n4 = n3 + order + 2
+    n5 = n4 + 2 * NTERMS + order + 1
+    n6 = n5 + 2 * NTERMS + order + 1
+    n7 = n6 + order + 2
+    return (
+        work[:n0],
+        work[n0:n1].reshape((NTERMS + 1, NTERMS + 1)),
+        work[n1:n2],
+        work[n2:n3],
+        work[n3:n4],
+        work[n4:n5],
+        work[n5:n6],
+        work[n6:n7],
+    )
+
 
 @numba.njit(nogil=True, cache=True)
 def prepare_z(x, y, z1, z2):
@@ -98,34 +230,20 @@ def prepare_z(x, y, z1, z2):
 
 
 @numba.njit(nogil=True, cache=True)
-def potbeslsho(x, y, z1, z2, labda, order, ilap, naq):
-    """potbeslsho.
-
-    Parameters
-    ----------
-       x,y: Point where potential is computed
-       z1: Complex begin point of line-sink
-       z2: Complex end point of line-sink
-       labda(naq): labda's (zero for first labda if Laplace)
-       order: Order of the line-sink
-       ilap: equals 1 when first value is Laplace line-sink and first labda equals zero
-       naq: Number of aquifers
-       rv(naq): Array to store return value (must be pre-allocated)
-
-    Returns
-    -------
-       rv(naq): Potentials. First spot is Laplace value if ilap=1
-    """
-    rv = np.zeros(naq)
+def linesinkho(x, y, z1, z2, labda, order, ilap, naq, pot, qxqy, work, plan, accuracy):
+    # Potential in pot(naq) and discharge in qxqy(2, naq) of line-sink of order
+    # `order` at x, y. Either one may be None, in which case it is not computed.
+    # When both are computed, the coefficients of the modified Helmholtz parts are
+    # computed once. See `potbeslsho` and `disbeslsho` for the other arguments.
 
     # lstype = 1 means line-sink
     lstype = 1
 
     # Radius of convergence
     if order > 5:
-        Rconv = 5.0
+        Rconv = RCONVACC[accuracy, 1]
     else:
-        Rconv = 7.0
+        Rconv = RCONVACC[accuracy, 0]
 
     # if (ilap==1) :
     #    istart = 1
@@ -134,19 +252,44 @@ def potbeslsho(x, y, z1, z2, labda, order, ilap, naq):
     zin, z1in, z2in, Lin, z, zplus1, zmin1 = prepare_z(x, y, z1, z2)
     # Laplace linesink
     if ilap == 1:
-        power = order + 1
-        pcor = complex(0.0, 0.0)
-        for n in range(1, int((power + 1) / 2) + 1):
-            pcor = pcor + z ** (power - 2 * n + 1) / (2 * n - 1)
-        pcor = 2.0 * pcor
-        comega = (
-            z**power * np.log((zmin1) / (zplus1))
-            + pcor
-            - np.log(zmin1)
-            + (-1.0) ** power * np.log(zplus1)
-        )
-        comega = -comega * Lin / (4.0 * np.pi * power)
-        rv[0] = np.real(comega)
+        if pot is not None:
+            power = order + 1
+            pcor = complex(0.0, 0.0)
+            for n in range(1, int((power + 1) / 2) + 1):
+                pcor = pcor + z ** (power - 2 * n + 1) / (2 * n - 1)
+            pcor = 2.0 * pcor
+            comega = (
+                z**power * np.log((zmin1) / (zplus1))
+                + pcor
+                - np.log(zmin1)
+                + (-1.0) ** power * np.log(zplus1)
+            )
+            comega = -comega * Lin / (4.0 * np.pi * power)
+            pot[0] = np.real(comega)
+        if qxqy is not None:
+            pcor = complex(0.0, 0.0)
+            for n in range(1, int((order + 1) / 2) + 1):
+                pcor = pcor + float(order - 2 * n + 2) * z ** (
+                    order + 1 - 2 * n
+                ) / float(2 * n - 1)
+
+            pcor = 2.0 * pcor
+
+            cdum = 1.0 / (
+                order + 1
+            )  # Without this intermediate statement it didn't seem to work
+            wdis = float(order + 1) * z**order * np.log((zmin1) / (zplus1)) + pcor
+
+            wdis = (
+                wdis
+                + (z ** (order + 1) - 1.0) / zmin1
+                - (z ** (order + 1) - (-1.0) ** (order + 1)) / zplus1
+            )
+
+            wdis = wdis * Lin / 2.0 / (z2in - z1in) / np.pi * cdum
+
+            qxqy[0, 0] = np.real(wdis)
+            qxqy[1, 0] = -np.imag(wdis)
     # N-1 leakage factors
     for i in range(ilap, naq):
         # Check whether entire linesink is outside radius of convergence
@@ -156,24 +299,92 @@ def potbeslsho(x, y, z1, z2, labda, order, ilap, naq):
         z = (2.0 * zin - (z1in + z2in)) / (z2in - z1in) / biglab
 
         if abs(z) < (Rconv + 1.0 / biglab):
-            pot = IntegralF(zin, z1in, z2in, Lin, labda[i], order, Rconv, lstype)
-            rv[i] = -Lin / 2.0 * pot
+            args = (zin, z1in, z2in, Lin, labda[i], order, Rconv, lstype, work)
+            if pot is None:
+                wdis = IntegralG(*args, plan, i, accuracy)
+            elif qxqy is None:
+                pot[i] = -Lin / 2.0 * IntegralF(*args, plan, i, accuracy)
+            else:
+                potf, wdis = IntegralFG(*args, plan, i, accuracy)
+                pot[i] = -Lin / 2.0 * potf
+            if qxqy is not None:
+                wdis = 2.0 * Lin / (z2in - z1in) / biglab * wdis
+                qxqy[0, i] = np.real(wdis)
+                qxqy[1, i] = -np.imag(wdis)
         else:
-            rv[i] = 0.0
+            if pot is not None:
+                pot[i] = 0.0
+            if qxqy is not None:
+                qxqy[0, i] = 0.0
+                qxqy[1, i] = 0.0
+
+
+@numba.njit(nogil=True, cache=True)
+def potbeslsho(
+    x, y, z1, z2, labda, order, ilap, naq, rv=None, work=None, plan=None, accuracy=0
+):
+    """potbeslsho.
+
+    Parameters
+    ----------
+       x,y: Point where potential is computed
+       z1: Complex begin point of line-sink
+       z2: Complex end point of line-sink
+       labda(naq): labda's (zero for first labda if Laplace)
+       order: Order of the line-sink
+       ilap: equals 1 when first value is Laplace line-sink and first labda equals zero
+       naq: Number of aquifers
+       rv(naq): Array to store return value (allocated if None)
+       work: Workspace of order `order` or higher (allocated if None)
+       plan: Plan of the line-sink and labda (see `lineplan`), optional
+
+    Returns
+    -------
+       rv(naq): Potentials. First spot is Laplace value if ilap=1
+    """
+    if rv is None:
+        rv = np.zeros(naq)
+    if work is None:
+        work = workspace(order)
+    linesinkho(x, y, z1, z2, labda, order, ilap, naq, rv, None, work, plan, accuracy)
     return rv
 
 
 @numba.njit(nogil=True, cache=True)
-def potbeslsv(x, y, z1, z2, lab, order, ilap, naq):
+def potbeslsv(
+    x,
+    y,
+    z1,
+    z2,
+    lab,
+    order,
+    ilap,
+    naq,
+    pot=None,
+    work=None,
+    plan=None,
+    accuracy=0,
+    table=None,
+):
     # Check if endpoints need to be adjusted using the largest labda (the first one)
-    pot = np.zeros((order + 1, naq))
+    # pot(order + 1, naq) and work are allocated if None; plan is optional
+    if pot is None:
+        pot = np.zeros((order + 1, naq))
+    if work is None:
+        work = workspace(order)
+    if table is not None:
+        args = (x, y, z1, z2, lab, order, ilap, naq, pot, work, plan, accuracy)
+        tablev(POTBESLSV, *args, table)
+        return pot
     for n in range(0, order + 1):
-        pot[n, 0 : naq + 1] = potbeslsho(x, y, z1, z2, lab, n, ilap, naq)
+        potbeslsho(x, y, z1, z2, lab, n, ilap, naq, pot[n], work, plan, accuracy)
     return pot
 
 
 @numba.njit(nogil=True, cache=True)
-def disbeslsho(x, y, z1, z2, labda, order, ilap, naq):
+def disbeslsho(
+    x, y, z1, z2, labda, order, ilap, naq, rv=None, work=None, plan=None, accuracy=0
+):
     # Input:
     #   x,y: Point where discharge is computed
     #   z1: Complex begin point of line-sink
@@ -181,105 +392,119 @@ def disbeslsho(x, y, z1, z2, labda, order, ilap, naq):
     #   labdain(Naquifers): Array with zero in first spot and labda's in remaining spots
     #   order: Order of the line-sink
     #   Naquifers: Number of aquifers
-    #   rvx(Naquifers),rvy(Naquifers): Arrays to store return values
+    #   rv(2, Naquifers): Array to store return values (allocated if None)
+    #   work: Workspace of order `order` or higher (allocated if None)
+    #   plan: Plan of the line element and labda (see `lineplan`), optional
     # Output:
-    #   rvx(Naquifers),rvy(Naquifers): Values of Qx and Qy with Laplace value in first
+    #   rv(2, Naquifers): Values of Qx and Qy with Laplace value in first
     # spot and mod.Helmholtz potentials in remaining spots
 
-    rv = np.zeros((2, naq))
-    # Radius of convergence
-    if order > 5:
-        Rconv = 5.0
-    else:
-        Rconv = 7.0
-
-    # lstype = 1 means line-sink
-    lstype = 1
-
-    zin, z1in, z2in, Lin, z, zplus1, zmin1 = prepare_z(x, y, z1, z2)
-
-    pcor = 0.0
-    # Laplace linesink
-    if ilap == 1:
-        pcor = complex(0.0, 0.0)
-        for n in range(1, int((order + 1) / 2) + 1):
-            pcor = pcor + float(order - 2 * n + 2) * z ** (order + 1 - 2 * n) / float(
-                2 * n - 1
-            )
-
-        pcor = 2.0 * pcor
+    if rv is None:
+        rv = np.zeros((2, naq))
+    if work is None:
+        work = workspace(order)
+    linesinkho(x, y, z1, z2, labda, order, ilap, naq, None, rv, work, plan, accuracy)
+    return rv
 
-        cdum = 1.0 / (
-            order + 1
-        )  # Without this intermediate statement it didn't seem to work
-        wdis = float(order + 1) * z**order * np.log((zmin1) / (zplus1)) + pcor
 
-        wdis = (
-            wdis
-            + (z ** (order + 1) - 1.0) / zmin1
-            - (z ** (order + 1) - (-1.0) ** (order + 1)) / zplus1
+@numba.njit(nogil=True, cache=True)
+def disbeslsv(
+    x,
+    y,
+    z1,
+    z2,
+    lab,
+    order,
+    ilap,
+    naq,
+    qxqy=None,
+    work=None,
+    plan=None,
+    accuracy=0,
+    table=None,
+):
+    # qxqy(2 * (order + 1), naq) and work are allocated if None; plan is optional
+    if qxqy is None:
+        qxqy = np.zeros((2 * (order + 1), naq))
+    if work is None:
+        work = workspace(order)
+    if table is not None:
+        args = (x, y, z1, z2, lab, order, ilap, naq, qxqy, work, plan, accuracy)
+        tablev(DISBESLSV, *args, table)
+        return qxqy
+    # Check if endpoints need to be adjusted using the largest labda (the first one)
+    for n in range(0, order + 1):
+        # rows n and n + order + 1
+        disbeslsho(
+            x, y, z1, z2, lab, n, ilap, naq, qxqy[n :: order + 1], work, plan, accuracy
         )
+    return qxqy
 
-        wdis = wdis * Lin / 2.0 / (z2in - z1in) / np.pi * cdum
-
-        rv[0, 0] = np.real(wdis)
-        rv[1, 0] = -np.imag(wdis)
-
-    for i in range(ilap, naq):
-        wdis = complex(0.0, 0.0)
-
-        # Check whether entire linesink is outside radius of convergence
-        # Outside if |z-zc|>L/2+7lab, and thus |Z|>1+7lab*2/L,
-        # or |zeta|>1/biglab+7 (zeta is called z here)
-        biglab = 2.0 * labda[i] / Lin
-        z = (2.0 * zin - (z1in + z2in)) / (z2in - z1in) / biglab
-
-        if abs(z) < (Rconv + 1.0 / biglab):
-            wdis = IntegralG(zin, z1in, z2in, Lin, labda[i], order, Rconv, lstype)
-            wdis = 2.0 * Lin / (z2in - z1in) / biglab * wdis
-
-            rv[0, i] = np.real(wdis)
-            rv[1, i] = -np.imag(wdis)
-        else:
-            rv[0, i] = 0.0
-            rv[1, i] = 0.0
 
+@numba.njit(nogil=True, cache=True)
+def potdisbeslsho(
+    x, y, z1, z2, labda, order, ilap, naq, rv=None, work=None, plan=None, accuracy=0
+):
+    # Potential and discharge of a line-sink, see `potbeslsho` and `disbeslsho`
+    # Output:
+    #   rv(3, naq): Potentials in first row, Qx and Qy in second and third row
+    if rv is None:
+        rv = np.zeros((3, naq))
+    if work is None:
+        work = workspace(order)
+    linesinkho(
+        x, y, z1, z2, labda, order, ilap, naq, rv[0], rv[1:], work, plan, accuracy
+    )
     return rv
 
 
 @numba.njit(nogil=True, cache=True)
-def disbeslsv(x, y, z1, z2, lab, order, ilap, naq):
-    # locals
-    qxqy = np.zeros((2 * (order + 1), naq))
-    # Check if endpoints need to be adjusted using the largest labda (the first one)
+def potdisbeslsv(
+    x,
+    y,
+    z1,
+    z2,
+    lab,
+    order,
+    ilap,
+    naq,
+    rv=None,
+    work=None,
+    plan=None,
+    accuracy=0,
+    table=None,
+):
+    # Potentials in rows 0 to order, Qx in rows order + 1 to 2 * order + 1 and Qy
+    # in rows 2 * order + 2 to 3 * order + 2 of rv(3 * (order + 1), naq)
+    if rv is None:
+        rv = np.zeros((3 * (order + 1), naq))
+    if work is None:
+        work = workspace(order)
+    if table is not None:
+        args = (x, y, z1, z2, lab, order, ilap, naq, rv, work, plan, accuracy)
+        tablev(POTDISBESLSV, *args, table)
+        return rv
     for n in range(0, order + 1):
-        rv = disbeslsho(x, y, z1, z2, lab, n, ilap, naq)
-        qxqy[n, 0 : naq + 1] = rv[0, 0 : naq + 1]
-        qxqy[n + order + 1, 0 : naq + 1] = rv[1, 0 : naq + 1]
-    return qxqy
+        potdisbeslsho(
+            x, y, z1, z2, lab, n, ilap, naq, rv[n :: order + 1], work, plan, accuracy
+        )
+    return rv
 
 
 @numba.njit(nogil=True, cache=True)
-def potbesldho(x, y, z1, z2, labda, order, ilap, naq):
-    # Input:
-    #   x,y: Point where potential is computed
-    #   z1: Complex begin point of line-doublet
-    #   z2: Complex end point of line-doublet
-    #   labda(naq): labda's (zero for first labda if Laplace)
-    #   order: Order of the line-doublet
-    #   ilap: equals 1 when first value is Laplace line-doublet and first labda is zero
-    #   naq: Number of aquifers
-    #   rv(naq): Array to store return value (must be pre-allocated)
-    # Output:
-    #   rv(naq): Potentials. First spot is Laplace value if ilap=1
-
-    rv = np.zeros(naq)
+def linedoubletho(
+    x, y, z1, z2, labda, order, ilap, naq, pot, qxqy, work, plan, accuracy
+):
+    # Potential in pot(naq) and discharge in qxqy(2, naq) of line-doublet of order
+    # `order` at x, y. Either one may be None, in which case it is not computed.
+    # When both are computed, the coefficients of the modified Helmholtz parts are
+    # computed once. See `potbesldho` and `disbesldho` for the other arguments.
 
     # Radius of convergence
     if order > 5:
-        Rconv = 5.0
+        Rconv = RCONVACC[accuracy, 1]
     else:
-        Rconv = 7.0
+        Rconv = RCONVACC[accuracy, 0]
 
     # lstype=2 means line-doublet
     lstype = 2
@@ -287,17 +512,36 @@ def potbesldho(x, y, z1, z2, labda, order, ilap, naq):
 
     # Laplace line-doublet
     if ilap == 1:
-        comega = z**order * np.log(zmin1 / zplus1)
-        qm = complex(0.0, 0.0)
-        for n in range(1, int((order + 1) / 2) + 1):
-            qm = qm + z ** (order - 2.0 * float(n) + 1.0) / (2.0 * float(n) - 1.0)
+        if pot is not None:
+            comega = z**order * np.log(zmin1 / zplus1)
+            qm = complex(0.0, 0.0)
+            for n in range(1, int((order + 1) / 2) + 1):
+                qm = qm + z ** (order - 2.0 * float(n) + 1.0) / (2.0 * float(n) - 1.0)
+
+            comega = 1.0 / (2.0 * np.pi * complex(0.0, 1.0)) * (comega + 2.0 * qm)
+            pot[0] = np.real(comega)
+        if qxqy is not None:
+            if order == 0:
+                wdis = -(1.0 / zmin1 - 1.0 / zplus1) / (
+                    np.pi * complex(0.0, 1.0) * (z2in - z1in)
+                )
+            else:
+                wdis = float(order) * z ** (order - 1) * np.log(zmin1 / zplus1)
+                wdis = wdis + z**order * (1.0 / zmin1 - 1.0 / zplus1)
+                qm = complex(0.0, 0.0)
+                if order > 1:  # To avoid a possible problem of 0 * 0^(-1)
+                    for n in range(1, int(order / 2) + 1):
+                        qm = qm + float(order - 2 * n + 1) * z ** (
+                            order - 2 * n
+                        ) / float(2 * n - 1)
 
-        comega = 1.0 / (2.0 * np.pi * complex(0.0, 1.0)) * (comega + 2.0 * qm)
-        rv[0] = np.real(comega)
+                wdis = -(wdis + 2.0 * qm) / (np.pi * complex(0.0, 1.0) * (z2in - z1in))
 
-    # N-1 leakage factors
+            qxqy[0, 0] = np.real(wdis)
+            qxqy[1, 0] = -np.imag(wdis)
+
+    # N-1 or N leakage factors
     for i in range(ilap, naq):
-        pot = 0.0
         # Check whether entire linedoublet is outside radius of convergence
         # Outside if |z-zc|>L/2+7lab, and thus |Z|>1+7lab*2/L,
         # or |zeta|>1/biglab+7 (zeta is called z here)
@@ -305,36 +549,108 @@ def potbesldho(x, y, z1, z2, labda, order, ilap, naq):
         z = (2.0 * zin - (z1in + z2in)) / (z2in - z1in) / biglab
 
         if abs(z) < (Rconv + 1.0 / biglab):
-            m1, m2, NLS = findm1m2(zin, z1in, z2in, Lin, labda[i], Rconv)
+            m1, m2, NLS = findm1m2(zin, z1in, z2in, Lin, labda[i], Rconv, plan, i)
             comega = complex(0.0, 0.0)
+            wdis1 = complex(0.0, 0.0)
             if m1 > 0:  # Otherwise outside radius of convergence
                 z1new = z1in + float(m1 - 1) / float(NLS) * (z2in - z1in)
                 z2new = z1in + float(m2) / float(NLS) * (z2in - z1in)
                 del0 = float(1 - m1 - m2 + NLS) / float(1 - m1 + m2)
                 ra = float(NLS) / float(1 + m2 - m1)
-                comega = IntegralLapLineDipole(zin, z1new, z2new, del0, ra, order)
+                cg = splitwork(work, order)[7]
+                if pot is not None:
+                    comega = IntegralLapLineDipole(
+                        zin, z1new, z2new, del0, ra, order, cg
+                    )
+                if qxqy is not None:
+                    wdis1 = IntegralLapLineDipoleDis(
+                        zin, z1new, z2new, del0, ra, order, cg
+                    )
+                    wdis1 = -2.0 * wdis1 / (complex(0.0, 1.0) * (z2new - z1new))
 
-            pot = IntegralF(zin, z1in, z2in, Lin, labda[i], order, Rconv, lstype)
-            rv[i] = (
-                np.real(comega / complex(0.0, 1.0)) + np.imag(z) / biglab * pot
-            )  # Note that z is really zeta in analysis
+            args = (zin, z1in, z2in, Lin, labda[i], order, Rconv, lstype, work)
+            if qxqy is None:
+                potf = IntegralF(*args, plan, i, accuracy)
+            else:
+                potf, wdis2 = IntegralFG(*args, plan, i, accuracy)
+                wdis3 = potf / (2.0 * complex(0.0, 1.0)) + wdis2 * np.imag(z)
+                wdis = wdis1 - 4.0 * wdis3 / (biglab**2 * (z2in - z1in))
+                qxqy[0, i] = np.real(wdis)
+                qxqy[1, i] = -1.0 * np.imag(wdis)
+            if pot is not None:
+                pot[i] = (
+                    np.real(comega / complex(0.0, 1.0)) + np.imag(z) / biglab * potf
+                )  # Note that z is really zeta in analysis
         else:
-            rv[i] = 0.0
+            if pot is not None:
+                pot[i] = 0.0
+            if qxqy is not None:
+                wdis = complex(0.0, 0.0)
+                qxqy[0, i] = np.real(wdis)
+                qxqy[1, i] = -1.0 * np.imag(wdis)
+
+
+@numba.njit(nogil=True, cache=True)
+def potbesldho(
+    x, y, z1, z2, labda, order, ilap, naq, rv=None, work=None, plan=None, accuracy=0
+):
+    # Input:
+    #   x,y: Point where potential is computed
+    #   z1: Complex begin point of line-doublet
+    #   z2: Complex end point of line-doublet
+    #   labda(naq): labda's (zero for first labda if Laplace)
+    #   order: Order of the line-doublet
+    #   ilap: equals 1 when first value is Laplace line-doublet and first labda is zero
+    #   naq: Number of aquifers
+    #   rv(naq): Array to store return value (allocated if None)
+    #   work: Workspace of order `order` or higher (allocated if None)
+    #   plan: Plan of the line element and labda (see `lineplan`), optional
+    # Output:
+    #   rv(naq): Potentials. First spot is Laplace value if ilap=1
 
+    if rv is None:
+        rv = np.zeros(naq)
+    if work is None:
+        work = workspace(order)
+    linedoubletho(x, y, z1, z2, labda, order, ilap, naq, rv, None, work, plan, accuracy)
     return rv
 
 
 @numba.njit(nogil=True, cache=True)
-def potbesldv(x, y, z1, z2, lab, order, ilap, naq):
-    pot = np.zeros((order + 1, naq))
+def potbesldv(
+    x,
+    y,
+    z1,
+    z2,
+    lab,
+    order,
+    ilap,
+    naq,
+    pot=None,
+    work=None,
+    plan=None,
+    accuracy=0,
+    table=None,
+):
+    # pot(order + 1, naq) and work are allocated if None; plan is optional
+    if pot is None:
+        pot = np.zeros((order + 1, naq))
+    if work is None:
+        work = workspace(order)
+    if table is not None:
+        args = (x, y, z1, z2, lab, order, ilap, naq, pot, work, plan, accuracy)
+        tablev(POTBESLDV, *args, table)
+        return pot
     # Check if endpoints need to be adjusted using the largest labda (the first one)
     for n in range(0, order + 1):
-        pot[n, 0 : naq + 1] = potbesldho(x, y, z1, z2, lab, n, ilap, naq)
+        potbesldho(x, y, z1, z2, lab, n, ilap, naq, pot[n], work, plan, accuracy)
     return pot
 
 
 @numba.njit(nogil=True, cache=True)
-def disbesldho(x, y, z1, z2, labda, order, ilap, naq):
+def disbesldho(
+    x, y, z1, z2, labda, order, ilap, naq, rv=None, work=None, plan=None, accuracy=0
+):
     # Input:
     #   x,y: Point where discharge is computed
     #   z1: Complex begin point of line-sink
@@ -342,99 +658,335 @@ def disbesldho(x, y, z1, z2, labda, order, ilap, naq):
     #   labdain(Naquifers): Array with zero in first spot and labda's in remaining spots
     #   order: Order of the line-sink
     #   naq: Number of aquifers
+    #   rv(2, Naquifers): Array to store return values (allocated if None)
+    #   work: Workspace of order `order` or higher (allocated if None)
+    #   plan: Plan of the line element and labda (see `lineplan`), optional
     # Output:
     #   rv(2, Naquifers),rvy(Naquifers): Values of Qx and Qy with Laplace value in
     # first spot and mod.Helmholtz potentials in remaining spots
-    rv = np.zeros((2, naq))
-    # Radius of convergence
-    if order > 5:
-        Rconv = 5.0
-    else:
-        Rconv = 7.0
+    if rv is None:
+        rv = np.zeros((2, naq))
+    if work is None:
+        work = workspace(order)
+    linedoubletho(x, y, z1, z2, labda, order, ilap, naq, None, rv, work, plan, accuracy)
+    return rv
 
-    # lstype=2 means line-doublet
-    lstype = 2
 
-    zin, z1in, z2in, Lin, z, zplus1, zmin1 = prepare_z(x, y, z1, z2)
+@numba.njit(nogil=True, cache=True)
+def disbesldv(
+    x,
+    y,
+    z1,
+    z2,
+    lab,
+    order,
+    ilap,
+    naq,
+    qxqy=None,
+    work=None,
+    plan=None,
+    accuracy=0,
+    table=None,
+):
+    # qxqy(2 * (order + 1), naq) and work are allocated if None; plan is optional
+    if qxqy is None:
+        qxqy = np.zeros((2 * (order + 1), naq))
+    if work is None:
+        work = workspace(order)
+    if table is not None:
+        args = (x, y, z1, z2, lab, order, ilap, naq, qxqy, work, plan, accuracy)
+        tablev(DISBESLDV, *args, table)
+        return qxqy
+    # Check if endpoints need to be adjusted using the largest labda (the first one)
+    for n in range(0, order + 1):
+        # rows n and n + order + 1
+        disbesldho(
+            x, y, z1, z2, lab, n, ilap, naq, qxqy[n :: order + 1], work, plan, accuracy
+        )
+    return qxqy
 
-    # Laplace line-doublet
-    qm = complex(0.0, 0.0)
-    if ilap == 1:
-        if order == 0:
-            wdis = -(1.0 / zmin1 - 1.0 / zplus1) / (
-                np.pi * complex(0.0, 1.0) * (z2in - z1in)
-            )
-        else:
-            wdis = float(order) * z ** (order - 1) * np.log(zmin1 / zplus1)
-            wdis = wdis + z**order * (1.0 / zmin1 - 1.0 / zplus1)
-            qm = complex(0.0, 0.0)
-            if order > 1:  # To avoid a possible problem of 0 * 0^(-1)
-                for n in range(1, int(order / 2) + 1):
-                    qm = qm + float(order - 2 * n + 1) * z ** (order - 2 * n) / float(
-                        2 * n - 1
-                    )
 
-            wdis = -(wdis + 2.0 * qm) / (np.pi * complex(0.0, 1.0) * (z2in - z1in))
+@numba.njit(nogil=True, cache=True)
+def potdisbesldho(
+    x, y, z1, z2, labda, order, ilap, naq, rv=None, work=None, plan=None, accuracy=0
+):
+    # Potential and discharge of a line-doublet, see `potbesldho` and `disbesldho`
+    # Output:
+    #   rv(3, naq): Potentials in first row, Qx and Qy in second and third row
+    if rv is None:
+        rv = np.zeros((3, naq))
+    if work is None:
+        work = workspace(order)
+    linedoubletho(
+        x, y, z1, z2, labda, order, ilap, naq, rv[0], rv[1:], work, plan, accuracy
+    )
+    return rv
 
-        rv[0, 0] = np.real(wdis)
-        rv[1, 0] = -np.imag(wdis)
 
-    # N-1 or N leakage factors
-    for i in range(ilap, naq):
-        wdis = complex(0.0, 0.0)
+@numba.njit(nogil=True, cache=True)
+def potdisbesldv(
+    x,
+    y,
+    z1,
+    z2,
+    lab,
+    order,
+    ilap,
+    naq,
+    rv=None,
+    work=None,
+    plan=None,
+    accuracy=0,
+    table=None,
+):
+    # Potentials in rows 0 to order, Qx in rows order + 1 to 2 * order + 1 and Qy
+    # in rows 2 * order + 2 to 3 * order + 2 of rv(3 * (order + 1), naq)
+    if rv is None:
+        rv = np.zeros((3 * (order + 1), naq))
+    if work is None:
+        work = workspace(order)
+    if table is not None:
+        args = (x, y, z1, z2, lab, order, ilap, naq, rv, work, plan, accuracy)
+        tablev(POTDISBESLDV, *args, table)
+        return rv
+    for n in range(0, order + 1):
+        potdisbesldho(
+            x, y, z1, z2, lab, n, ilap, naq, rv[n :: order + 1], work, plan, accuracy
+        )
+    return rv
 
-        # Check whether entire line-doublet is outside radius of convergence
-        # Outside if |z-zc|>L/2+7lab, and thus |Z|>1+7lab*2/L,
-        # or |zeta|>1/biglab+7 (zeta is called z here)
-        biglab = 2.0 * labda[i] / Lin
-        z = (2.0 * zin - (z1in + z2in)) / (z2in - z1in) / biglab
 
-        if abs(z) < (Rconv + 1.0 / biglab):
-            m1, m2, NLS = findm1m2(zin, z1in, z2in, Lin, labda[i], Rconv)
-            wdis1 = complex(0.0, 0.0)
-            if m1 > 0:
-                z1new = z1in + float(m1 - 1) / float(NLS) * (z2in - z1in)
-                z2new = z1in + float(m2) / float(NLS) * (z2in - z1in)
-                del0 = float(1 - m1 - m2 + NLS) / float(1 - m1 + m2)
-                ra = float(NLS) / float(1 + m2 - m1)
-                wdis1 = IntegralLapLineDipoleDis(zin, z1new, z2new, del0, ra, order)
-                wdis1 = -2.0 * wdis1 / (complex(0.0, 1.0) * (z2new - z1new))
+@numba.njit(nogil=True, cache=True)
+def besselv(kind, x, y, z1, z2, lab, order, ilap, naq, rv, work, plan, accuracy):
+    """Store function `kind` (POTBESLSV, DISBESLSV, etc.) in rv."""
+    if kind == POTBESLSV:
+        potbeslsv(x, y, z1, z2, lab, order, ilap, naq, rv, work, plan, accuracy)
+    elif kind == DISBESLSV:
+        disbeslsv(x, y, z1, z2, lab, order, ilap, naq, rv, work, plan, accuracy)
+    elif kind == POTBESLDV:
+        potbesldv(x, y, z1, z2, lab, order, ilap, naq, rv, work, plan, accuracy)
+    elif kind == DISBESLDV:
+        disbesldv(x, y, z1, z2, lab, order, ilap, naq, rv, work, plan, accuracy)
+    elif kind == POTDISBESLSV:
+        potdisbeslsv(x, y, z1, z2, lab, order, ilap, naq, rv, work, plan, accuracy)
+    else:
+        potdisbesldv(x, y, z1, z2, lab, order, ilap, naq, rv, work, plan, accuracy)
 
-            pot = IntegralF(zin, z1in, z2in, Lin, labda[i], order, Rconv, lstype)
-            wdis2 = IntegralG(zin, z1in, z2in, Lin, labda[i], order, Rconv, lstype)
-            wdis3 = pot / (2.0 * complex(0.0, 1.0)) + wdis2 * np.imag(z)
 
-            wdis = wdis1 - 4.0 * wdis3 / (biglab**2 * (z2in - z1in))
-        rv[0, i] = np.real(wdis)
-        rv[1, i] = -1.0 * np.imag(wdis)
-    return rv
+@numba.njit(nogil=True, cache=True)
+def besselho(kind, x, y, z1, z2, lab, order, ilap, naq, rv, work, plan, accuracy):
+    """Store function `kind` in rv, computed with the functions of each order.
+
+    Same as `besselv`, used by `tablev` (which is called by `besselv`).
+    """
+    m = order + 1
+    for n in range(m):
+        args = (x, y, z1, z2, lab, n, ilap, naq)
+        if kind == POTBESLSV:
+            potbeslsho(*args, rv[n], work, plan, accuracy)
+        elif kind == DISBESLSV:
+            disbeslsho(*args, rv[n::m], work, plan, accuracy)
+        elif kind == POTBESLDV:
+            potbesldho(*args, rv[n], work, plan, accuracy)
+        elif kind == DISBESLDV:
+            disbesldho(*args, rv[n::m], work, plan, accuracy)
+        elif kind == POTDISBESLSV:
+            potdisbeslsho(*args, rv[n::m], work, plan, accuracy)
+        else:
+            potdisbesldho(*args, rv[n::m], work, plan, accuracy)
 
 
 @numba.njit(nogil=True, cache=True)
-def disbesldv(x, y, z1, z2, lab, order, ilap, naq):
-    qxqy = np.zeros((2 * (order + 1), naq))
-    # Check if endpoints need to be adjusted using the largest labda (the first one)
-    for n in range(0, order + 1):
-        rv = disbesldho(x, y, z1, z2, lab, n, ilap, naq)
-        qxqy[n, 0 : naq + 1] = rv[0, 0:naq]
-        qxqy[n + order + 1, 0 : naq + 1] = rv[1, 0 : naq + 1]
-    return qxqy
+def besselvpoints(
+    kind,
+    x,
+    y,
+    z1,
+    z2,
+    lab,
+    order,
+    ilap,
+    naq,
+    near,
+    rv,
+    plan,
+    accuracy,
+    table,
+    start,
+    stop,
+):
+    """Store function `kind` at points `start` to `stop` in `rv[:, :, i]`.
+
+    Only the Laplace part is computed when `near[i]` is False (the modified
+    Helmholtz parts are zero in the far field), and nothing if `ilap` is 0. One
+    workspace is used for all points. The modified Helmholtz parts are
+    interpolated from `table` when it is not None (see `tablev`).
+    """
+    work = workspace(order)
+    for i in range(start, stop):
+        xi, yi = x[i], y[i]
+        args = (kind, xi, yi, z1, z2, lab, order)
+        if near[i]:
+            if table is None:
+                besselv(*args, ilap, naq, rv[:, :, i], work, plan, accuracy)
+            else:
+                tablev(*args, ilap, naq, rv[:, :, i], work, plan, accuracy, table)
+        elif ilap == 1:
+            besselv(*args, 1, 1, rv[:, :1, i], work, plan, accuracy)
 
 
 @numba.njit(nogil=True, cache=True)
-def IntegralF(zin, z1in, z2in, Lin, labda, order, Rconv, lstype):
-    czmzbarp = np.full(NTERMS + 1, complex(0.0, 0.0))
-    cgamma = np.full((NTERMS + 1, NTERMS + 1), complex(0.0, 0.0))
-    calphat = np.full(2 * NTERMS + 1, complex(0.0, 0.0))
-    cbetat = np.full(2 * NTERMS + 1, complex(0.0, 0.0))
-    cc = np.full(order + 2, complex(0.0, 0.0))
-    calpha = np.full(2 * NTERMS + order + 1, complex(0.0, 0.0))
-    cbeta = np.full(2 * NTERMS + order + 1, complex(0.0, 0.0))
+def besselvarray(
+    kind, x, y, z1, z2, lab, order, ilap, naq, near, rv, plan, accuracy, table=None
+):
+    args = (kind, x, y, z1, z2, lab, order, ilap, naq, near, rv, plan, accuracy)
+    besselvpoints(*args, table, 0, len(x))
+
+
+@numba.njit(nogil=True, parallel=True, cache=True)
+def besselvarrayparallel(
+    kind, x, y, z1, z2, lab, order, ilap, naq, near, rv, plan, accuracy, table, nchunk
+):
+    # the points are split in `nchunk` chunks that each use one workspace
+    for ichunk in numba.prange(nchunk):
+        start = ichunk * len(x) // nchunk
+        stop = (ichunk + 1) * len(x) // nchunk
+        args = (kind, x, y, z1, z2, lab, order, ilap, naq, near, rv, plan, accuracy)
+        besselvpoints(*args, table, start, stop)
+
+
+def besselarray(
+    kind,
+    nrow,
+    x,
+    y,
+    z1,
+    z2,
+    lab,
+    order,
+    ilap,
+    naq,
+    near=None,
+    plan=None,
+    accuracy=0,
+    table=None,
+):
+    """Array version of function `kind`, returns array size (nrow, naq, npoints).
+
+    The plan of the line element is created when `plan` is None. The points are
+    computed in parallel with `numba.prange` when called from the main thread;
+    other threads (e.g. those of `Model.threads`) compute their points serially,
+    as the threading layer of numba may not support parallel functions called
+    from several threads at the same time.
+    """
+    x = np.ascontiguousarray(x, dtype="d")
+    y = np.ascontiguousarray(y, dtype="d")
+    if near is None:
+        near = np.ones(len(x), dtype="bool")
+    if plan is None:
+        plan = lineplan(z1, z2, lab)
+    rv = np.zeros((nrow, naq, len(x)))
+    args = (kind, x, y, z1, z2, lab, order, ilap, naq, near, rv, plan, accuracy, table)
+    if len(x) >= PARALLELSIZE and threading.current_thread() is threading.main_thread():
+        besselvarrayparallel(*args, min(len(x), 4 * numba.get_num_threads()))
+    else:
+        besselvarray(*args)
+    return rv
 
-    m1, m2, NLS = findm1m2(zin, z1in, z2in, Lin, labda, Rconv)
-    if m1 == 0:
-        # pot = 0.0
-        return 0.0
+
+def potbeslsvarray(
+    x, y, z1, z2, lab, order, ilap, naq, near=None, plan=None, accuracy=0, table=None
+):
+    """Array version of `potbeslsv` for arrays `x` and `y`.
+
+    Parameters
+    ----------
+    x, y : arrays
+        points where the potential is computed
+    near : boolean array, optional
+        points where the modified Helmholtz parts are computed; only the Laplace
+        part is computed at the other points (all points if None)
+    plan : array, optional
+        plan of the line element and `lab` (see `lineplan`)
+    accuracy : integer, optional
+        setting of the accuracy of the modified Helmholtz parts, one of the values
+        of `ACCURACY` (0 is "high")
+    table : tuple, optional
+        tables (values, params) of `linetable` for `lab[ilap:]` from which the
+        modified Helmholtz parts are interpolated
+
+    Returns
+    -------
+    array size (order + 1, naq, npoints)
+    """
+    args = (x, y, z1, z2, lab, order, ilap, naq, near, plan, accuracy, table)
+    return besselarray(POTBESLSV, order + 1, *args)
+
+
+def disbeslsvarray(
+    x, y, z1, z2, lab, order, ilap, naq, near=None, plan=None, accuracy=0, table=None
+):
+    """Array version of `disbeslsv`, returns array size (2 (order + 1), naq, npoints).
+
+    See `potbeslsvarray`.
+    """
+    nrow = 2 * (order + 1)
+    args = (x, y, z1, z2, lab, order, ilap, naq, near, plan, accuracy, table)
+    return besselarray(DISBESLSV, nrow, *args)
+
+
+def potbesldvarray(
+    x, y, z1, z2, lab, order, ilap, naq, near=None, plan=None, accuracy=0, table=None
+):
+    """Array version of `potbesldv`, returns array size (order + 1, naq, npoints).
+
+    See `potbeslsvarray`.
+    """
+    args = (x, y, z1, z2, lab, order, ilap, naq, near, plan, accuracy, table)
+    return besselarray(POTBESLDV, order + 1, *args)
+
+
+def disbesldvarray(
+    x, y, z1, z2, lab, order, ilap, naq, near=None, plan=None, accuracy=0, table=None
+):
+    """Array version of `disbesldv`, returns array size (2 (order + 1), naq, npoints).
+
+    See `potbeslsvarray`.
+    """
+    nrow = 2 * (order + 1)
+    args = (x, y, z1, z2, lab, order, ilap, naq, near, plan, accuracy, table)
+    return besselarray(DISBESLDV, nrow, *args)
+
+
+def potdisbeslsvarray(
+    x, y, z1, z2, lab, order, ilap, naq, near=None, plan=None, accuracy=0, table=None
+):
+    """Array version of `potdisbeslsv`, returns array (3 (order + 1), naq, npoints).
+
+    See `potbeslsvarray`.
+    """
+    nrow = 3 * (order + 1)
+    args = (x, y, z1, z2, lab, order, ilap, naq, near, plan, accuracy, table)
+    return besselarray(POTDISBESLSV, nrow, *args)
+
+
+def potdisbesldvarray(
+    x, y, z1, z2, lab, order, ilap, naq, near=None, plan=None, accuracy=0, table=None
+):
+    """Array version of `potdisbesldv`, returns array (3 (order + 1), naq, npoints).
+
+    See `potbeslsvarray`.
+    """
+    nrow = 3 * (order + 1)
+    args = (x, y, z1, z2, lab, order, ilap, naq, near, plan, accuracy, table)
+    return besselarray(POTDISBESLDV, nrow, *args)
+
+
+@numba.njit(nogil=True, cache=True)
+def gammacoefficients(zin, z1in, z2in, labda, work, order, nterms):
+    # Returns zeta (called z here), its conjugate and biglab of the entire element
+    # and stores the coefficients gamma(n,m) of Eq. 21 up to nterms in the workspace
+    czmzbarp, cgamma = splitwork(work, order)[:2]
 
     # Compute zeta (called z here). This is the regular value of the entire element
     L = abs(z2in - z1in)
@@ -444,33 +996,138 @@ def IntegralF(zin, z1in, z2in, Lin, labda, order, Rconv, lstype):
 
     # Coefficients gamma(n,m), Eq. 21
     # Store coefficents in matrix.
-    for n in range(0, NTERMS + 1):
+    for n in range(0, nterms + 1):
         czmzbarp[n] = (z - zbar) ** n
 
-    for n in range(0, NTERMS + 1):
+    for n in range(0, nterms + 1):
         for m in range(0, n + 1):
             cgamma[n, m] = RBINOM[n, m] * czmzbarp[n - m]
+    return z, zbar, biglab
+
+
+@numba.njit(nogil=True, cache=True)
+def IntegralF(
+    zin,
+    z1in,
+    z2in,
+    Lin,
+    labda,
+    order,
+    Rconv,
+    lstype,
+    work=None,
+    plan=None,
+    ilab=0,
+    accuracy=0,
+):
+    # work: Workspace of order `order` or higher (allocated if None)
+    # plan: Plan of the line element (see `lineplan`); labda is labda ilab of the plan
+    # accuracy: Setting of the accuracy (see ACCURACY)
+    if work is None:
+        work = workspace(order)
+
+    m1, m2, NLS = findm1m2(zin, z1in, z2in, Lin, labda, Rconv, plan, ilab)
+    if m1 == 0:
+        # pot = 0.0
+        return 0.0
+
+    nterms = NTERMSACC[accuracy]
+    z, zbar, biglab = gammacoefficients(zin, z1in, z2in, labda, work, order, nterms)
+    return seriesF(z, biglab, labda, m1, m2, NLS, order, lstype, work, accuracy)
+
+
+@numba.njit(nogil=True, cache=True)
+def IntegralG(
+    zin,
+    z1in,
+    z2in,
+    Lin,
+    labda,
+    order,
+    Rconv,
+    lstype,
+    work=None,
+    plan=None,
+    ilab=0,
+    accuracy=0,
+):
+    # work: Workspace of order `order` or higher (allocated if None)
+    # plan: Plan of the line element (see `lineplan`); labda is labda ilab of the plan
+    # accuracy: Setting of the accuracy (see ACCURACY)
+    if work is None:
+        work = workspace(order)
+
+    m1, m2, NLS = findm1m2(zin, z1in, z2in, Lin, labda, Rconv, plan, ilab)
+    if m1 == 0:
+        # wdis = complex(0.0, 0.0)
+        return complex(0.0, 0.0)
+
+    nterms = NTERMSACC[accuracy]
+    z, zbar, biglab = gammacoefficients(zin, z1in, z2in, labda, work, order, nterms)
+    args = (zin, z1in, z2in, Lin, labda, order, lstype, work, accuracy)
+    return seriesG(*args, z, zbar, biglab, m1, m2, NLS)
+
+
+@numba.njit(nogil=True, cache=True)
+def IntegralFG(
+    zin,
+    z1in,
+    z2in,
+    Lin,
+    labda,
+    order,
+    Rconv,
+    lstype,
+    work=None,
+    plan=None,
+    ilab=0,
+    accuracy=0,
+):
+    # IntegralF and IntegralG at the same point, returned as a tuple. The sections
+    # of the element and the coefficients gamma(n,m) are computed once.
+    if work is None:
+        work = workspace(order)
+
+    m1, m2, NLS = findm1m2(zin, z1in, z2in, Lin, labda, Rconv, plan, ilab)
+    if m1 == 0:
+        return 0.0, complex(0.0, 0.0)
+
+    nterms = NTERMSACC[accuracy]
+    z, zbar, biglab = gammacoefficients(zin, z1in, z2in, labda, work, order, nterms)
+    # seriesF does not modify the coefficients gamma(n,m)
+    pot = seriesF(z, biglab, labda, m1, m2, NLS, order, lstype, work, accuracy)
+    args = (zin, z1in, z2in, Lin, labda, order, lstype, work, accuracy)
+    return pot, seriesG(*args, z, zbar, biglab, m1, m2, NLS)
+
+
+@numba.njit(nogil=True, cache=True)
+def seriesF(z, biglab, labda, m1, m2, NLS, order, lstype, work, accuracy):
+    # Series of IntegralF with the coefficients gamma(n,m) in the workspace
+    _, cgamma, calphat, cbetat, cc, calpha, cbeta, _ = splitwork(work, order)
+    nterms = NTERMSACC[accuracy]
+    if lstype == 1:
+        ac = ACACC[accuracy]
+        bc = BCACC[accuracy]
+    else:
+        ac = AC1ACC[accuracy]
+        bc = BC1ACC[accuracy]
 
     # Eq. 23 These coefficients should be modified for a higher order linesink
-    for n in range(0, 2 * NTERMS + 1):
+    for n in range(0, 2 * nterms + 1):
         calphat[n] = complex(0.0, 0.0)
         cbetat[n] = complex(0.0, 0.0)
-        for m in range(max(0, n - NTERMS), int(n / 2) + 1):
-            if lstype == 1:
-                calphat[n] = calphat[n] + AC[n - m] * cgamma[n - m, m]
-                cbetat[n] = cbetat[n] + BC[n - m] * cgamma[n - m, m]
-            else:
-                calphat[n] = calphat[n] + AC1[n - m] * cgamma[n - m, m]
-                cbetat[n] = cbetat[n] + BC1[n - m] * cgamma[n - m, m]
+        for m in range(max(0, n - nterms), int(n / 2) + 1):
+            calphat[n] = calphat[n] + ac[n - m] * cgamma[n - m, m]
+            cbetat[n] = cbetat[n] + bc[n - m] * cgamma[n - m, m]
 
     # Compute coefficients of delta^p
     for m in range(0, order + 1):
         cc[m] = RBINOM[order, m] * z ** (order - m) * biglab**order
     if order > 0:
-        for n in range(0, 2 * NTERMS + order + 1):
+        for n in range(0, 2 * nterms + order + 1):
             calpha[n] = complex(0.0, 0.0)
             cbeta[n] = complex(0.0, 0.0)
-            for m in range(max(0, n - 2 * NTERMS), min(n, order) + 1):
+            for m in range(max(0, n - 2 * nterms), min(n, order) + 1):
                 calpha[n] = calpha[n] + cc[m] * calphat[n - m]
                 cbeta[n] = cbeta[n] + cc[m] * cbetat[n - m]
     else:
@@ -489,7 +1146,7 @@ def IntegralF(zin, z1in, z2in, Lin, labda, order, Rconv, lstype):
         cd2minz = cd2minz + 1.0e-8
     cln1 = np.log(cd1minz)
     cln2 = np.log(cd2minz)
-    for n in range(0, 2 * NTERMS + order + 1):
+    for n in range(0, 2 * nterms + order + 1):
         cInt = cInt + (
             2.0 * calpha[n] * cln2 - 2.0 * calpha[n] / (n + 1) + cbeta[n]
         ) * (cd2minz) ** (n + 1) / float(n + 1)
@@ -501,39 +1158,29 @@ def IntegralF(zin, z1in, z2in, Lin, labda, order, Rconv, lstype):
 
 
 @numba.njit(nogil=True, cache=True)
-def IntegralG(zin, z1in, z2in, Lin, labda, order, Rconv, lstype):
-    czmzbarp = np.full(NTERMS + 1, complex(0.0, 0.0))
-    cgamma = np.full((NTERMS + 1, NTERMS + 1), complex(0.0, 0.0))
-    cahat = np.full(2 * (NTERMS - 1) + 1, complex(0.0, 0.0))
-    cbhat = np.full(2 * (NTERMS - 1) + 1, complex(0.0, 0.0))
-    calphat = np.full(2 * NTERMS + 1, complex(0.0, 0.0))
-    cbetat = np.full(2 * NTERMS + 1, complex(0.0, 0.0))
-    cc = np.full(order + 2, complex(0.0, 0.0))
-    calpha = np.full(2 * NTERMS + order + 1, complex(0.0, 0.0))
-    cbeta = np.full(2 * NTERMS + order + 1, complex(0.0, 0.0))
+def seriesG(
+    zin,
+    z1in,
+    z2in,
+    Lin,
+    labda,
+    order,
+    lstype,
+    work,
+    accuracy,
+    z,
+    zbar,
+    biglab,
+    m1,
+    m2,
+    NLS,
+):
+    # Series of IntegralG with the coefficients gamma(n,m) in the workspace
+    _, cgamma, calphat, cbetat, cc, calpha, cbeta, cg = splitwork(work, order)
+    nterms = NTERMSACC[accuracy]
 
     biglabin = 2.0 * labda / Lin
 
-    m1, m2, NLS = findm1m2(zin, z1in, z2in, Lin, labda, Rconv)
-    if m1 == 0:
-        # wdis = complex(0.0, 0.0)
-        return complex(0.0, 0.0)
-
-    # Compute zeta (called z here). This is the regular value of the entire element
-    L = abs(z2in - z1in)
-    biglab = 2.0 * labda / L
-    z = (2.0 * zin - (z1in + z2in)) / (z2in - z1in) / biglab
-    zbar = np.conj(z)
-
-    # Coefficients gamma(n,m), Eq. 21
-    # Store coefficents in matrix.
-    for n in range(0, NTERMS + 1):
-        czmzbarp[n] = (z - zbar) ** n
-
-    for n in range(0, NTERMS + 1):
-        for m in range(0, n + 1):
-            cgamma[n, m] = RBINOM[n, m] * czmzbarp[n - m]
-
     # Integral g1
     # Implemented with different z, rather than Delta1 and Delta2
     z1 = z1in + float(m1 - 1) / float(NLS) * (z2in - z1in)
@@ -541,28 +1188,21 @@ def IntegralG(zin, z1in, z2in, Lin, labda, order, Rconv, lstype):
     del0 = float(1 - m1 - m2 + NLS) / float(1 - m1 + m2)
     ra = float(NLS) / float(1 + m2 - m1)
     # comega = complex(0.0, 0.0)
-    comega = IntegralLapLineDipole(zin, z1, z2, del0, ra, order)
+    comega = IntegralLapLineDipole(zin, z1, z2, del0, ra, order, cg)
 
+    # Integral g2 with the hat coefficients CAHAT and CBHAT
+    cahat = CAHAT[accuracy, lstype - 1]
+    cbhat = CBHAT[accuracy, lstype - 1]
     if lstype == 1:
-        g1 = -AC[0] * biglabin * comega
-        # Integral g2
-        # Compute hat coefficients
-        for n in range(0, NTERMS):
-            cahat[n] = float(n + 1) * AC[n + 1]
-            cbhat[n] = AC[n + 1] + float(n + 1) * BC[n + 1]
+        g1 = -ACACC[accuracy, 0] * biglabin * comega
     else:
-        g1 = -AC1[0] * biglabin * comega
-        # Integral g2
-        # Compute hat coefficients
-        for n in range(0, NTERMS):
-            cahat[n] = float(n + 1) * AC1[n + 1]
-            cbhat[n] = AC1[n + 1] + float(n + 1) * BC1[n + 1]
+        g1 = -AC1ACC[accuracy, 0] * biglabin * comega
 
     # Eq. 23
-    for n in range(0, 2 * NTERMS):
+    for n in range(0, 2 * nterms):
         calphat[n] = complex(0.0, 0.0)
         cbetat[n] = complex(0.0, 0.0)
-        for m in range(max(0, n - NTERMS + 1), int((n + 1) / 2) + 1):
+        for m in range(max(0, n - nterms + 1), int((n + 1) / 2) + 1):
             calphat[n] = calphat[n] + cahat[n - m] * cgamma[n - m + 1, m]
             cbetat[n] = cbetat[n] + cbhat[n - m] * cgamma[n - m + 1, m]
 
@@ -570,10 +1210,10 @@ def IntegralG(zin, z1in, z2in, Lin, labda, order, Rconv, lstype):
     for m in range(0, order + 1):
         cc[m] = RBINOM[order, m] * z ** (order - m) * biglab**order
     if order > 0:
-        for n in range(0, 2 * NTERMS + order):
+        for n in range(0, 2 * nterms + order):
             calpha[n] = complex(0.0, 0.0)
             cbeta[n] = complex(0.0, 0.0)
-            for m in range(max(0, n - 2 * NTERMS + 1), min(n, order) + 1):
+            for m in range(max(0, n - 2 * nterms + 1), min(n, order) + 1):
                 calpha[n] = calpha[n] + cc[m] * calphat[n - m]
                 cbeta[n] = cbeta[n] + cc[m] * cbetat[n - m]
     else:
@@ -592,7 +1232,7 @@ def IntegralG(zin, z1in, z2in, Lin, labda, order, Rconv, lstype):
         cd2minz = cd2minz + 1.0e-8
     cln1 = np.log(cd1minz)
     cln2 = np.log(cd2minz)
-    for n in range(0, 2 * NTERMS - 1 + order + 1):
+    for n in range(0, 2 * nterms - 1 + order + 1):
         g2 = g2 - (calpha[n] * cln2 - calpha[n] / (n + 1) + cbeta[n]) * (cd2minz) ** (
             n + 1
         ) / float(n + 1)
@@ -604,9 +1244,9 @@ def IntegralG(zin, z1in, z2in, Lin, labda, order, Rconv, lstype):
     # Integral g3
     # Eq. 23
     calphat[0] = complex(0.0, 0.0)
-    for n in range(1, 2 * NTERMS):  # Loop start at 1, because of bug in Digital Fortran
+    for n in range(1, 2 * nterms):  # Loop start at 1, because of bug in Digital Fortran
         calphat[n] = complex(0.0, 0.0)
-        for m in range(max(0, n - NTERMS), int((n - 1) / 2) + 1):
+        for m in range(max(0, n - nterms), int((n - 1) / 2) + 1):
             calphat[n] = calphat[n] + cahat[n - m - 1] * cgamma[n - m - 1, m] * (
                 -1.0
             ) ** (n - 1 - 2 * m)
@@ -616,9 +1256,9 @@ def IntegralG(zin, z1in, z2in, Lin, labda, order, Rconv, lstype):
         cc[m] = RBINOM[order, m] * zbar ** (order - m) * biglab**order
 
     if order > 0:
-        for n in range(0, 2 * NTERMS + order):
+        for n in range(0, 2 * nterms + order):
             calpha[n] = complex(0.0, 0.0)
-            for m in range(max(0, n - 2 * NTERMS + 1), min(n, order) + 1):
+            for m in range(max(0, n - 2 * nterms + 1), min(n, order) + 1):
                 calpha[n] = calpha[n] + cc[m] * calphat[n - m]
     else:
         calpha = calphat
@@ -634,7 +1274,7 @@ def IntegralG(zin, z1in, z2in, Lin, labda, order, Rconv, lstype):
     cd2minz = np.conj(cd2minz)
     cln1 = np.conj(cln1)
     cln2 = np.conj(cln2)
-    for n in range(0, 2 * NTERMS + order):
+    for n in range(0, 2 * nterms + order):
         g3 = g3 - (calpha[n] * cln2 - calpha[n] / (n + 1)) * (cd2minz) ** (
             n + 1
         ) / float(n + 1)
@@ -647,8 +1287,10 @@ def IntegralG(zin, z1in, z2in, Lin, labda, order, Rconv, lstype):
 
 
 @numba.njit(nogil=True, cache=True)
-def IntegralLapLineDipole(zin, z1, z2, del0, ra, order):
-    cg = np.full(order + 2, complex(0.0, 0.0))
+def IntegralLapLineDipole(zin, z1, z2, del0, ra, order, cg=None):
+    # cg(order + 2) is allocated if None
+    if cg is None:
+        cg = np.empty(order + 2, dtype=np.complex128)
     z = (2.0 * zin - (z1 + z2)) / (z2 - z1)
     zplus1 = z + 1.0
     zmin1 = z - 1.0
@@ -674,8 +1316,10 @@ def IntegralLapLineDipole(zin, z1, z2, del0, ra, order):
 
 
 @numba.njit(nogil=True, cache=True)
-def IntegralLapLineDipoleDis(zin, z1, z2, del0, ra, order):
-    cg = np.full(order + 2, complex(0.0, 0.0))
+def IntegralLapLineDipoleDis(zin, z1, z2, del0, ra, order, cg=None):
+    # cg(order + 2) is allocated if None
+    if cg is None:
+        cg = np.empty(order + 2, dtype=np.complex128)
 
     z = (2.0 * zin - (z1 + z2)) / (z2 - z1)
     zplus1 = z + 1.0
@@ -706,9 +1350,11 @@ def IntegralLapLineDipoleDis(zin, z1, z2, del0, ra, order):
 
 
 @numba.njit(nogil=True, cache=True)
-def findm1m2(zin, z1in, z2in, Lin, labda, Rconv):
+def findm1m2(zin, z1in, z2in, Lin, labda, Rconv, plan=None, ilab=0):
     # Break integral up in sections of max one labda
     # and find first (m1) and last (m2) section within radius of convergence
+    if plan is not None:
+        return findm1m2plan(zin, plan, ilab, Rconv)
     if labda == 0.0:
         NLS = 0
     else:
@@ -733,3 +1379,301 @@ def findm1m2(zin, z1in, z2in, Lin, labda, Rconv):
         m2 = NLS
 
     return m1, m2, NLS
+
+
+# Plan of a line element: the sections of max one labda of `findm1m2` for each
+# labda, which only depend on the line element and the aquifer. The plan is one
+# array (so that it is cheap to pass to the functions) with a header of z1, z2 and
+# the number of labdas (PLANHEADER values), followed by biglab, NLS and the index
+# of the first section of each labda, followed by the sections of all labdas. A
+# section is the sum and difference of its end points and its biglab (PLANSECTION
+# values)
+PLANHEADER = 5
+PLANSECTION = 5
+
+
+@numba.njit(nogil=True, cache=True)
+def lineplan(z1, z2, lab):
+    """Plan of line element from `z1` to `z2` for labdas `lab`.
+
+    The plan is passed to the functions of the line element to skip the
+    computation of the sections in every call. The plan is valid for the same
+    `z1`, `z2` and `lab` only.
+
+    Returns
+    -------
+    array
+    """
+    Lin = abs(z2 - z1)
+    naq = len(lab)
+    nls = np.zeros(naq, dtype=np.int64)
+    for i in range(naq):
+        if lab[i] != 0.0:
+            nls[i] = int(np.ceil(Lin / lab[i]))
+    plan = np.zeros(PLANHEADER + 3 * naq + PLANSECTION * np.sum(nls))
+    plan[0] = z1.real
+    plan[1] = z1.imag
+    plan[2] = z2.real
+    plan[3] = z2.imag
+    plan[4] = naq
+    k = PLANHEADER + 3 * naq
+    for i in range(naq):
+        NLS = nls[i]
+        if NLS > 0:
+            plan[PLANHEADER + 3 * i] = 2.0 * lab[i] / Lin
+        plan[PLANHEADER + 3 * i + 1] = NLS
+        plan[PLANHEADER + 3 * i + 2] = k
+        for j in range(1, NLS + 1):
+            # same as in findm1m2
+            zs1 = z1 + float(j - 1) / NLS * (z2 - z1)
+            zs2 = zs1 + (z2 - z1) / NLS
+            zsum = zs1 + zs2
+            zdif = zs2 - zs1
+            plan[k] = zsum.real
+            plan[k + 1] = zsum.imag
+            plan[k + 2] = zdif.real
+            plan[k + 3] = zdif.imag
+            plan[k + 4] = 2.0 * lab[i] / abs(zs2 - zs1)
+            k += PLANSECTION
+    return plan
+
+
+@numba.njit(nogil=True, cache=True)
+def findm1m2plan(zin, plan, ilab, Rconv):
+    # findm1m2 for labda ilab of plan. Section j is within the radius of convergence
+    # when the distance between Z = (2 zin - (z1 + z2)) / (z2 - z1) and its center
+    # -1 + (2 j - 1) / NLS is less than Rconv * biglab, so only the sections between
+    # jlo and jhi (with a margin of one section) are checked
+    NLS = int(plan[PLANHEADER + 3 * ilab + 1])
+    if NLS == 0:
+        return 0, 0, NLS
+    z1in = complex(plan[0], plan[1])
+    z2in = complex(plan[2], plan[3])
+    Z = (2.0 * zin - (z1in + z2in)) / (z2in - z1in)
+    r = Rconv * plan[PLANHEADER + 3 * ilab]
+    w = np.sqrt(max(r * r - Z.imag * Z.imag, 0.0))
+    jlo = max(1.0, np.floor(((Z.real - w + 1.0) * NLS + 1.0) / 2.0) - 1.0)
+    jhi = min(float(NLS), np.ceil(((Z.real + w + 1.0) * NLS + 1.0) / 2.0) + 1.0)
+    m1 = 0
+    m2 = int(jhi)
+    first = int(plan[PLANHEADER + 3 * ilab + 2])
+    for j in range(int(jlo), int(jhi) + 1):
+        k = first + PLANSECTION * (j - 1)
+        zsum = complex(plan[k], plan[k + 1])
+        zdif = complex(plan[k + 2], plan[k + 3])
+        z = (2.0 * zin - zsum) / zdif / plan[k + 4]
+        if m1 == 0:
+            if abs(z) < Rconv:
+                m1 = j
+        else:
+            if abs(z) > Rconv:
+                m2 = j - 1
+                break
+    return m1, m2, NLS
+
+
+# Tables of the modified Helmholtz parts of the line elements (see `linetable`):
+# number of nodes in both directions and radius around the end points (in units of
+# half the length of the element) inside which the functions are computed exactly
+TABLENODES = 64
+TABLEEND = 0.03
+# status of a point in a table (see `tablelookup`)
+TABLED, OUTSIDE, EXACT = 0, 1, 2
+
+
+def tablepoints(biglab, order, s, u):
+    """Points of the local plane at coordinates `s` and `u` of the table of biglab.
+
+    Returns
+    -------
+    Z : complex array with the shape of `s` and `u` broadcast
+    params : array [R, d, S]
+    """
+    Rconv = RCONVACC[0, 1] if order > 5 else RCONVACC[0, 0]
+    R = 1.0 + Rconv * biglab
+    d = min(1.0, biglab)
+    S = np.arcsinh(R / d)
+    xi = np.arcsinh(d * np.sinh(S * s))
+    eta = 0.5 * np.pi * (1.0 + np.sin(0.5 * np.pi * (2.0 * u - 1.0)))
+    Z = np.cosh(xi + 1j * eta)
+    return Z.real + 1j * np.abs(Z.imag), np.array([R, d, S])
+
+
+@numba.njit(nogil=True, cache=True)
+def tablelookup(values, params, Z, lstype, rv):
+    """Interpolate table `values` of `linetable` at local coordinate `Z`.
+
+    Stores the values in `rv` and returns TABLED, or returns OUTSIDE when the
+    modified Helmholtz parts are zero at `Z`, or EXACT when `Z` is too close to
+    the end points for the table.
+    """
+    R, d, S = params[0], params[1], params[2]
+    if abs(Z) >= R:
+        return OUTSIDE
+    if abs(Z - 1.0) < TABLEEND or abs(Z + 1.0) < TABLEEND:
+        return EXACT
+    nrow, ns, nu = values.shape
+    w = cmath.acosh(complex(Z.real, abs(Z.imag)))
+    s = np.arcsinh(np.sinh(w.real) / d) / S * (ns - 1)
+    g = min(max(2.0 * w.imag / np.pi - 1.0, -1.0), 1.0)
+    u = 0.5 * (2.0 / np.pi * np.arcsin(g) + 1.0) * (nu - 1)
+    i = int(s)
+    j = int(u)
+    # the cells next to the end points use the values at the end points
+    if i < 2 and (j < 2 or j >= nu - 3):
+        return EXACT
+    i = min(max(i, 1), ns - 3)
+    j = min(max(j, 1), nu - 3)
+    ws = lagrangeweights(s - i)
+    wu = lagrangeweights(u - j)
+    for irow in range(nrow):
+        v = 0.0
+        for a in range(4):
+            for b in range(4):
+                v += ws[a] * wu[b] * values[irow, i - 1 + a, j - 1 + b]
+        rv[irow] = v
+    if Z.imag < 0.0:
+        # the potential and Qx of a line-sink are symmetric in Y and Qy is
+        # antisymmetric; the other way around for a line-doublet
+        n = nrow // 3
+        if lstype == 1:
+            rv[2 * n :] = -rv[2 * n :]
+        else:
+            rv[: 2 * n] = -rv[: 2 * n]
+    return TABLED
+
+
+@numba.njit(nogil=True, cache=True)
+def lagrangeweights(p):
+    # weights of cubic Lagrange interpolation between the second and third of four
+    # equally spaced points, with p the relative position between them
+    return (
+        -p * (p - 1.0) * (p - 2.0) / 6.0,
+        (p + 1.0) * (p - 1.0) * (p - 2.0) / 2.0,
+        -(p + 1.0) * p * (p - 2.0) / 2.0,
+        (p + 1.0) * p * (p - 1.0) / 6.0,
+    )
+
+
+@numba.njit(nogil=True, cache=True)
+def tablelookuparray(values, params, Z, lstype):
+    # tablelookup at all points of Z, returns values and status
+    rv = np.zeros((values.shape[0], len(Z)))
+    status = np.zeros(len(Z), dtype=np.int64)
+    for k in range(len(Z)):
+        status[k] = tablelookup(values, params, Z[k], lstype, rv[:, k])
+    return rv, status
+
+
+@numba.njit(nogil=True, cache=True)
+def tablev(kind, x, y, z1, z2, lab, order, ilap, naq, rv, work, plan, accuracy, table):
+    """Store function `kind` in rv, with the modified Helmholtz parts from `table`.
+
+    `table` is the tuple (values, params) of `linetable` for `lab[ilap:]`. The
+    functions are computed exactly when the point is too close to an end point.
+    """
+    values, params = table
+    if kind == POTBESLSV or kind == DISBESLSV or kind == POTDISBESLSV:
+        lstype = 1
+    else:
+        lstype = 2
+    npot = order + 1
+    if kind == DISBESLSV or kind == DISBESLDV:
+        npot = 0
+    ndis = 0
+    if kind != POTBESLSV and kind != POTBESLDV:
+        ndis = order + 1
+    Z = (2.0 * complex(x, y) - (z1 + z2)) / (z2 - z1)
+    nrow = 3 * (order + 1)
+    interp = np.zeros((naq, nrow))
+    status = np.zeros(naq, dtype=np.int64)
+    args = (kind, x, y, z1, z2, lab, order)
+    for i in range(ilap, naq):
+        k = i - ilap
+        status[i] = tablelookup(values[k], params[k], Z, lstype, interp[i])
+        if status[i] == EXACT:
+            besselho(*args, ilap, naq, rv, work, plan, accuracy)
+            return
+    # Laplace parts, added to the tabulated differences
+    lap = np.zeros((rv.shape[0], 1))
+    besselho(*args, 1, 1, lap, work, plan, accuracy)
+    if ilap == 1:
+        rv[:, 0] = lap[:, 0]
+    L = abs(z2 - z1)
+    if lstype == 1:
+        potscale = 0.5 * L
+        wscale = np.conj(z2 - z1) / L
+    else:
+        potscale = 1.0
+        wscale = 2.0 * np.conj(z2 - z1) / L**2
+    m = order + 1
+    for i in range(ilap, naq):
+        if status[i] == OUTSIDE:
+            rv[:, i] = 0.0
+            continue
+        for n in range(m):
+            if npot > 0:
+                rv[n, i] = lap[n, 0] + potscale * interp[i, n]
+            if ndis > 0:
+                w = wscale * complex(interp[i, m + n], -interp[i, 2 * m + n])
+                rv[npot + n, i] = lap[npot + n, 0] + w.real
+                rv[npot + m + n, i] = lap[npot + m + n, 0] - w.imag
+
+
+def linetable(lstype, order, biglab, nnodes=TABLENODES):
+    """Tables of the modified Helmholtz parts of a line-sink or line-doublet.
+
+    The tables contain the potential, Qx and Qy of orders 0 to `order` of the
+    modified Helmholtz part minus the Laplace part of the element from -1 to 1, for
+    each value of `biglab` (2 labda / L). The Laplace part is subtracted to remove
+    the singularities at the end points, which leaves functions that are smooth
+    for Y >= 0 (the values for Y < 0 follow from symmetry). The nodes are equally
+    spaced in the coordinates s and u of the elliptic coordinates Z = cosh(xi + i
+    eta), with sinh(xi) = d sinh(S s) and eta = pi (1 + sin(pi (u - 1/2))) / 2,
+    which refines the nodes near the element and near the end points. The values
+    are interpolated with cubic Lagrange polynomials in s and u, see `tablev`.
+
+    Parameters
+    ----------
+    lstype : integer
+        1 for a line-sink, 2 for a line-doublet
+    order : integer
+        highest order of the element
+    biglab : array
+        values of 2 labda / L
+    nnodes : integer
+        number of nodes in both directions
+
+    Returns
+    -------
+    values : array size (len(biglab), 3 (order + 1), nnodes, nnodes)
+        tables with rows potential, Qx and Qy of each order
+    params : array size (len(biglab), 3)
+        radius R beyond which the functions are zero, and the scales d and S
+    error : array size len(biglab)
+        maximum difference with the exact functions at the centers of the cells,
+        relative to the maximum absolute value of each function
+    """
+    func = potdisbeslsvarray if lstype == 1 else potdisbesldvarray
+    biglab = np.atleast_1d(biglab)
+    nrow = 3 * (order + 1)
+    values = np.zeros((len(biglab), nrow, nnodes, nnodes))
+    params = np.zeros((len(biglab), 3))
+    error = np.zeros(len(biglab))
+    nodes = np.linspace(0.0, 1.0, nnodes)
+    centers = 0.5 * (nodes[1:] + nodes[:-1])
+    for i, b in enumerate(biglab):
+        lab = np.array([0.0, b])
+        Z, params[i] = tablepoints(b, order, nodes[:, np.newaxis], nodes)
+        # the end points are never used, as they are singular
+        Z[0, 0], Z[0, -1] = Z[1, 0], Z[1, -1]
+        rv = func(Z.real.ravel(), Z.imag.ravel(), -1.0, 1.0, lab, order, 1, 2)
+        values[i] = (rv[:, 1] - rv[:, 0]).reshape((nrow, nnodes, nnodes))
+        Z = tablepoints(b, order, centers[:, np.newaxis], centers)[0].ravel()
+        rv = func(Z.real, Z.imag, -1.0, 1.0, lab, order, 1, 2)
+        interp, status = tablelookuparray(values[i], params[i], Z, lstype)
+        tabled = status == TABLED
+        diff = np.abs(interp - (rv[:, 1] - rv[:, 0]))[:, tabled]
+        scale = np.abs(rv[:, 1]).max(1)
+        error[i] = np.max(diff.max(1, initial=0.0) / scale)
+    return values, params, error
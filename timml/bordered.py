@@ -0,0 +1,90 @@
+"""Solution of a modified system of equations with the factorization of the original.
+
+When elements with unknowns are added to or removed from a solved model, the new
+matrix `M` consists of the rows and columns of the unknowns that are kept, which
+are part of the original matrix `A`, bordered by the rows and columns of the added
+unknowns. The system with `M` is solved with the factorization of `A` through the
+equivalent bordered system::
+
+    | A     W_a   E_r | | x   |   | b_k |
+    | Z_a   D     0   | | y   | = | b_a |
+    | E_r^T 0     0   | | lam |   | 0   |
+
+where `W_a` and `Z_a` are the columns and rows of the added unknowns `y`, `D` is
+their diagonal block and `E_r` selects the removed unknowns of `A`. The last rows
+set the removed unknowns to zero and the multipliers `lam` take up their
+equations. The Schur complement of `A` is a small matrix of the size of the number
+of added and removed unknowns (the capacitance matrix of the Woodbury formula),
+so that the update costs one solve with the factorization of `A` for each added
+or removed unknown.
+"""
+
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+
+__all__ = ["BorderedUpdate"]
+
+
+class BorderedUpdate:
+    """Solution of a modified system of equations with the factorization of `A`.
+
+    Parameters
+    ----------
+    lusolve : function
+        `lusolve(b)` returns the solution of `A x = b` for `b` of size `nold` or
+        `(nold, nrhs)`, e.g. `Model.lusolve`
+    nold : integer
+        number of equations of the original matrix `A`
+    oldindex : array of integers
+        index in `A` of each unknown of the modified matrix, -1 for added unknowns
+    rows : array size (nadded, neq)
+        rows of the added unknowns in the modified matrix
+    columns : array size (nkept, nadded)
+        columns of the added unknowns in the rows of the kept unknowns of the
+        modified matrix
+
+    Attributes
+    ----------
+    nupdate : integer
+        number of added and removed unknowns
+    """
+
+    def __init__(self, lusolve, nold, oldindex, rows, columns):
+        self.lusolve = lusolve
+        self.nold = nold
+        self.kept = np.flatnonzero(oldindex >= 0)
+        self.added = np.flatnonzero(oldindex < 0)
+        self.keptold = oldindex[self.kept]
+        self.removed = np.setdiff1d(np.arange(nold), self.keptold)
+        nadded = len(self.added)
+        self.nupdate = nadded + len(self.removed)
+        iremoved = np.arange(nadded, self.nupdate)
+        w = np.zeros((nold, self.nupdate))
+        w[self.keptold, :nadded] = columns
+        w[self.removed, iremoved] = 1.0
+        self.z = np.zeros((self.nupdate, nold))
+        self.z[:nadded, self.keptold] = rows[:, self.kept]
+        self.z[iremoved, self.removed] = 1.0
+        s = np.zeros((self.nupdate, self.nupdate))
+        s[:nadded, :nadded] = rows[:, self.added]
+        self.ainvw = lusolve(w)
+        s -= self.z @ self.ainvw
+        self.slu = lu_factor(s, overwrite_a=True)
+
+    def __repr__(self):
+        return "BorderedUpdate of " + str(self.nupdate) + " unknowns"
+
+    def solve(self, rhs):
+        """Solution for right-hand side `rhs` of size `neq` or `(neq, nrhs)`."""
+        rhs = np.asarray(rhs, dtype="d")
+        b = np.zeros((self.nold,) + rhs.shape[1:])
+        b[self.keptold] = rhs[self.kept]
+        x = self.lusolve(b)
+        c = np.zeros((self.nupdate,) + rhs.shape[1:])
+        c[: len(self.added)] = rhs[self.added]
+        y = lu_solve(self.slu, c - self.z @ x)
+        x -= self.ainvw @ y
+        sol = np.empty(rhs.shape)
+        sol[self.kept] = x[self.keptold]
+        sol[self.added] = y[: len(self.added)]
+        return sol
@@ -3,7 +3,7 @@ import inspect  # Used for storing the input
 import numpy as np
 
 from .element import Element
-from .equation import PotentialEquation
+from .equation import PotentialEquation, matrows
 
 __all__ = ["Constant", "ConstantStar"]
 
@@ -56,12 +56,21 @@ class ConstantBase(Element, PotentialEquation):
             rv[0, 0] = 1
         return rv
 
+    def potinfarray(self, x, y, aq):
+        rv = np.zeros((1, aq.naq, len(x)))
+        if aq == self.aq:
+            rv[0, 0] = 1
+        return rv
+
     def disvecinf(self, x, y, aq=None):
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
         rv = np.zeros((2, 1, aq.naq))
         return rv
 
+    def disvecinfarray(self, x, y, aq):
+        return np.zeros((2, 1, aq.naq, len(x)))
+
 
 class Constant(ConstantBase, PotentialEquation):
     """Specify the head at one point in the model in one layer.
@@ -138,6 +147,12 @@ class ConstantInside(Element):
             rv[0, 0] = 1
         return rv
 
+    def potinfarray(self, x, y, aq):
+        rv = np.zeros((1, aq.naq, len(x)))
+        if aq == self.aq:
+            rv[0, 0] = 1
+        return rv
+
     def disvecinf(self, x, y, aq=None):
         """Can be called with only one x,y value."""
         if aq is None:
@@ -145,24 +160,28 @@ class ConstantInside(Element):
         rv = np.zeros((2, 1, aq.naq))
         return rv
 
-    def equation(self):
-        mat = np.zeros((1, self.model.neq))
+    def disvecinfarray(self, x, y, aq):
+        return np.zeros((2, 1, aq.naq, len(x)))
+
+    def equation(self, rhsonly=False, mat=None):
+        mat = matrows(self, rhsonly, mat, zeros=True)
         rhs = np.zeros(1)  # Needs to be initialized to zero
-        for icp in range(self.ncp):
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    if e != self:
-                        mat[0:, ieq : ieq + e.nunknowns] += e.potinflayers(
-                            self.xc[icp], self.yc[icp], self.layers
-                        ).sum(0)
-                    ieq += e.nunknowns  # I decreased the tab here
-                # else:
-                #    mat[0, ieq:ieq+e. nunknowns] += -1
-                else:
-                    rhs[0] -= e.potentiallayers(
-                        self.xc[icp], self.yc[icp], self.layers
-                    ).sum(0)
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                if e != self:
+                    potinf = e.potinflayers(self.xc, self.yc, self.layers)
+                    for icp in range(self.ncp):
+                        mat[0:, ieq : ieq + e.nunknowns] += potinf[..., icp].sum(0)
+                ieq += e.nunknowns  # I decreased the tab here
+            # else:
+            #    mat[0, ieq:ieq+e. nunknowns] += -1
+            else:
+                pot = e.potentiallayers(self.xc, self.yc, self.layers)
+                for icp in range(self.ncp):
+                    rhs[0] -= pot[..., icp].sum(0)
         return mat, rhs
 
     def setparams(self, sol):
@@ -202,12 +221,24 @@ class ConstantStar(Element):
         rv = np.zeros((1, aq.naq))
         return rv
 
+    def potinfarray(self, x, y, aq):
+        return np.zeros((1, aq.naq, len(x)))
+
     def potentiallayers(self, x, y, layers, aq=None):
         """Returns array of size len(layers) only used in building equations.
 
         Defined here as it is the particular solution inside a semi-confined aquifer and
         cannot be added by using eigen vectors.
         """
+        if np.ndim(x) > 0:
+            if aq is None:
+                return self.model.aq.evaluate_by_aquifer(
+                    self.potentiallayers, x, y, layers=layers
+                )
+            pot = np.zeros((len(layers), len(x)))
+            if aq == self.aq:
+                pot[:] = self.potstar[layers, np.newaxis]
+            return pot
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
         pot = np.zeros(len(layers))
@@ -220,3 +251,6 @@ class ConstantStar(Element):
             aq = self.model.aq.find_aquifer_data(x, y)
         rv = np.zeros((2, 1, aq.naq))
         return rv
+
+    def disvecinfarray(self, x, y, aq):
+        return np.zeros((2, 1, aq.naq, len(x)))
@@ -1,9 +1,44 @@
 import inspect  # Used for storing the input
+from functools import wraps
 
 import numpy as np
 
+from . import bessel
+
+# influence functions whose calls are counted when the model is profiled
+INFLUENCES = (
+    "potinf",
+    "potinfarray",
+    "disvecinf",
+    "disvecinfarray",
+    "potdisvecinf",
+)
+
+
+def profiled(func, name):
+    """Influence function `func` that is counted when the model is profiled.
+
+    When `Model.profile` is active, `model.profiler` is set and the call is passed
+    to `SolveProfiler.influence`; otherwise `func` is called directly.
+    """
+
+    @wraps(func)
+    def influence(e, *args, **kwargs):
+        profiler = e.model.profiler
+        if profiler is None:
+            return func(e, *args, **kwargs)
+        return profiler.influence(func, name, e, *args, **kwargs)
+
+    return influence
+
 
 class Element:
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in INFLUENCES:
+            if name in vars(cls):
+                setattr(cls, name, profiled(vars(cls)[name], name))
+
     def __init__(self, model, nparam, nunknowns, layers, name, label):
         self.model = model
         self.aq = None  # Set in the initialization function
@@ -30,16 +65,53 @@ class Element:
         """Returns array of size (nparam, naq)."""
         raise Exception("Must overload Element.potinf()")
 
+    def potinfarray(self, x, y, aq):
+        """Returns array of size (nparam, naq, npoints).
+
+        Array version of `potinf` for arrays `x` and `y` that are all located in
+        aquifer `aq`. This default implementation loops over the points; elements
+        overload it with a vectorized implementation.
+        """
+        rv = np.empty((self.nparam, aq.naq, len(x)))
+        for i in range(len(x)):
+            rv[:, :, i] = self.potinf(x[i], y[i], aq)
+        return rv
+
     def potential(self, x, y, aq=None):
+        """Returns array of size naq, or (naq, npoints) if `x` and `y` are arrays.
+
+        After `Model.solve_scenarios` the parameters have one column per scenario
+        and the returned array has an additional leading scenario axis.
+        """
+        if np.ndim(x) > 0:
+            if aq is None:
+                return self.model.aq.evaluate_by_aquifer(self.potential, x, y)
+            pot = self.potinfarray(x, y, aq)
+            if self.model.nscenarios is not None:
+                return np.tensordot(self.parameters, pot, axes=(0, 0))
+            return np.sum(self.parameters[:, :, np.newaxis] * pot, 0)
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
+        if self.model.nscenarios is not None:
+            return self.parameters.T @ self.potinf(x, y, aq)
         return np.sum(self.parameters * self.potinf(x, y, aq), 0)
 
     def potinflayers(self, x, y, layers, aq=None):
         """Returns array of size (len(layers),nparam).
 
-        Only used in building equations.
+        Returns array of size (len(layers), nparam, npoints) if `x` and `y` are
+        arrays. Only used in building equations.
         """
+        if np.ndim(x) > 0:
+            if aq is None:
+                return self.model.aq.evaluate_by_aquifer(
+                    self.potinflayers, x, y, layers=layers
+                )
+            # points along the first axis, so that the sum is taken in the same
+            # order as for a single point
+            pot = np.moveaxis(self.potinfarray(x, y, aq), -1, 0)
+            rv = np.sum(pot[:, :, np.newaxis, :] * aq.eigvec, 3).T
+            return rv[layers]
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
         pot = self.potinf(x, y, aq)  # nparam rows, naq cols
@@ -49,7 +121,17 @@ class Element:
         return rv[layers, :]
 
     def potentiallayers(self, x, y, layers, aq=None):
-        """Returns array of size len(layers) only used in building equations."""
+        """Returns array of size len(layers) only used in building equations.
+
+        Returns array of size (len(layers), npoints) if `x` and `y` are arrays.
+        """
+        if np.ndim(x) > 0:
+            if aq is None:
+                return self.model.aq.evaluate_by_aquifer(
+                    self.potentiallayers, x, y, layers=layers
+                )
+            pot = self.potential(x, y, aq).T
+            return np.sum(pot[:, np.newaxis, :] * aq.eigvec, 2).T[layers]
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
         pot = np.sum(self.potential(x, y, aq) * aq.eigvec, 1)
@@ -59,17 +141,74 @@ class Element:
         """Returns array of size (2, nparam, naq)."""
         raise Exception("Must overload Element.disvecinf()")
 
+    def disvecinfarray(self, x, y, aq):
+        """Returns array of size (2, nparam, naq, npoints).
+
+        Array version of `disvecinf` for arrays `x` and `y` that are all located in
+        aquifer `aq`. This default implementation loops over the points; elements
+        overload it with a vectorized implementation.
+        """
+        rv = np.empty((2, self.nparam, aq.naq, len(x)))
+        for i in range(len(x)):
+            rv[..., i] = self.disvecinf(x[i], y[i], aq)
+        return rv
+
     def disvec(self, x, y, aq=None):
-        """Returns array of size (2, nparam, naq)."""
+        """Returns array of size (2, naq), or (2, naq, npoints) for arrays.
+
+        After `Model.solve_scenarios` the returned array has an additional leading
+        scenario axis.
+        """
+        if np.ndim(x) > 0:
+            if aq is None:
+                return self.model.aq.evaluate_by_aquifer(self.disvec, x, y)
+            qxqy = self.disvecinfarray(x, y, aq)
+            if self.model.nscenarios is not None:
+                return np.tensordot(self.parameters, qxqy, axes=(0, 1))
+            return np.sum(self.parameters[:, :, np.newaxis] * qxqy, 1)
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
+        if self.model.nscenarios is not None:
+            return np.tensordot(self.parameters, self.disvecinf(x, y, aq), axes=(0, 1))
         return np.sum(self.parameters * self.disvecinf(x, y, aq), 1)
 
+    def potdisvecinf(self, x, y, aq=None):
+        """Returns `potinf` and `disvecinf` at one x,y value.
+
+        Elements overload it when the potential and the discharge vector are
+        cheaper to compute together.
+        """
+        if aq is None:
+            aq = self.model.aq.find_aquifer_data(x, y)
+        return self.potinf(x, y, aq), self.disvecinf(x, y, aq)
+
+    def potdisvec(self, x, y, aq=None):
+        """Returns `potential` and `disvec` at one x,y value."""
+        if aq is None:
+            aq = self.model.aq.find_aquifer_data(x, y)
+        pot, qxqy = self.potdisvecinf(x, y, aq)
+        if self.model.nscenarios is not None:
+            return (
+                self.parameters.T @ pot,
+                np.tensordot(self.parameters, qxqy, axes=(0, 1)),
+            )
+        return np.sum(self.parameters * pot, 0), np.sum(self.parameters * qxqy, 1)
+
     def disvecinflayers(self, x, y, layers, aq=None):
         """Returns two arrays of size (len(layers),nparam).
 
-        Only used in building equations.
+        Returns array of size (2, len(layers), nparam, npoints) if `x` and `y` are
+        arrays. Only used in building equations.
         """
+        if np.ndim(x) > 0:
+            if aq is None:
+                return self.model.aq.evaluate_by_aquifer(
+                    self.disvecinflayers, x, y, layers=layers
+                )
+            qxqy = np.moveaxis(self.disvecinfarray(x, y, aq), -1, 1)
+            qx = np.sum(qxqy[0, :, :, np.newaxis, :] * aq.eigvec, 3).T
+            qy = np.sum(qxqy[1, :, :, np.newaxis, :] * aq.eigvec, 3).T
+            return np.array((qx[layers], qy[layers]))
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
         qxqy = self.disvecinf(x, y, aq)  # nparam rows, naq cols
@@ -80,7 +219,18 @@ class Element:
         return np.array((qx[layers], qy[layers]))
 
     def disveclayers(self, x, y, layers, aq=None):
-        """Returns two arrays of size len(layers) only used in building equations."""
+        """Returns two arrays of size len(layers) only used in building equations.
+
+        Returns array of size (2, len(layers), npoints) if `x` and `y` are arrays.
+        """
+        if np.ndim(x) > 0:
+            if aq is None:
+                return self.model.aq.evaluate_by_aquifer(
+                    self.disveclayers, x, y, layers=layers
+                )
+            qxqy = np.moveaxis(self.disvec(x, y, aq), -1, 1)
+            rv = np.sum(qxqy[:, :, np.newaxis, :] * aq.eigvec, 3)
+            return np.moveaxis(rv, 1, -1)[:, layers]
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
         qxqy = self.disvec(x, y, aq)
@@ -88,10 +238,24 @@ class Element:
         return rv[:, layers]
 
     def intpot(self, func, x1, y1, x2, y2, layers, aq=None):
+        """Integral of `func` along segment(s) from `x1`, `y1` to `x2`, `y2`.
+
+        The segment end points may be arrays, in which case the integrals are
+        returned with the segments along the last axis.
+        """
         if aq is None:
             print("error, aquifer needs to be given")
         z1 = x1 + 1j * y1
         z2 = x2 + 1j * y2
+        if np.ndim(z1) > 0:
+            # arrays of segments; one call to func for all Gauss points
+            z = 0.5 * self.Xleg[:, np.newaxis] * (z2 - z1) + 0.5 * (z1 + z2)
+            val = func(x=z.real.ravel(), y=z.imag.ravel(), layers=layers, aq=aq)
+            val = val.reshape(val.shape[:-1] + z.shape)
+            pot = 0.0
+            for i in range(self.ndeg):
+                pot += self.wleg[i] * val[..., i, :]
+            return pot
         z = 0.5 * self.Xleg * (z2 - z1) + 0.5 * (z1 + z2)
         x = z.real
         y = z.imag
@@ -101,6 +265,11 @@ class Element:
         return pot
 
     def intflux(self, func, x1, y1, x2, y2, layers, aq=None):
+        """Integral of the normal flux of `func` along segment(s).
+
+        The segment end points may be arrays, in which case the integrals are
+        returned with the segments along the last axis.
+        """
         if aq is None:
             print("error, aquifer needs to be given")
         thetaNormOut = np.arctan2(y2 - y1, x2 - x1) - np.pi / 2.0
@@ -108,6 +277,17 @@ class Element:
         sinnorm = np.sin(thetaNormOut)
         z1 = x1 + 1j * y1
         z2 = x2 + 1j * y2
+        if np.ndim(z1) > 0:
+            # arrays of segments; one call to func for all Gauss points
+            z = 0.5 * self.Xleg[:, np.newaxis] * (z2 - z1) + 0.5 * (z1 + z2)
+            qxqy = func(x=z.real.ravel(), y=z.imag.ravel(), layers=layers, aq=aq)
+            qxqy = qxqy.reshape(qxqy.shape[:-1] + z.shape)
+            qtot = 0.0
+            for i in range(self.ndeg):
+                qtot += self.wleg[i] * (
+                    qxqy[0][..., i, :] * cosnorm + qxqy[1][..., i, :] * sinnorm
+                )
+            return qtot
         z = 0.5 * self.Xleg * (z2 - z1) + 0.5 * (z1 + z2)
         x = z.real
         y = z.imag
@@ -117,6 +297,14 @@ class Element:
             qtot += self.wleg[i] * (qxqy[0] * cosnorm + qxqy[1] * sinnorm)
         return qtot
 
+    def farfieldbox(self):
+        """Box (xmin, ymin, xmax, ymax) of the far field of the element.
+
+        Outside the box only the Laplace part of the influence functions is
+        nonzero. Returns None if there is no such box.
+        """
+        return None
+
     def headinside(self):
         print("headinside not implemented for this element")
 
@@ -161,3 +349,60 @@ class Element:
                 rv += key + " = " + str(self.inputvalues[key]) + ",\n"
         rv += ")\n"
         return rv
+
+
+for _name in INFLUENCES:
+    setattr(Element, _name, profiled(vars(Element)[_name], _name))
+
+
+class LineFarField:
+    """Mix-in class for line elements computed with the Bessel line functions.
+
+    The leaky part of the Bessel line-sink and line-doublet functions is set to
+    zero when the point is farther than `Rconv` times the leakage factor plus half
+    the length of the element from the center of the element. The radius `Rfar`
+    uses the largest leakage factor and the largest `Rconv` of the Bessel functions,
+    increased by a small safety factor.
+    """
+
+    Rconv = 7.0
+    lstype = None  # 1 for line-sinks and 2 for line-doublets that use tables
+    table = None  # tables of the leaky parts, see Model.tabulate
+
+    def initialize_farfield(self):
+        self.zc = 0.5 * (self.z1 + self.z2)
+        self.Rfar = 1.001 * (0.5 * self.L + self.Rconv * np.max(self.aq.lab))
+
+    def farfieldbox(self):
+        return (
+            self.zc.real - self.Rfar,
+            self.zc.imag - self.Rfar,
+            self.zc.real + self.Rfar,
+            self.zc.imag + self.Rfar,
+        )
+
+    def nearfield(self, x, y):
+        """Boolean array that is True where the leaky part may be nonzero."""
+        return np.abs(x + 1j * y - self.zc) < self.Rfar
+
+    def settable(self, tables, tol):
+        """Use tables of the leaky part with an error smaller than `tol`.
+
+        The tables of `linetable` are stored in dict `tables` by the type, the
+        order and the values of 2 lab / L of the element, so elements with the same
+        length in the same aquifer share the tables.
+        """
+        lab = self.aq.lab[self.aq.ilap :]
+        if self.lstype is None or len(lab) == 0:
+            return
+        # rounded, so that elements of (nearly) the same length share the tables
+        biglab = tuple(float(f"{b:.9e}") for b in 2.0 * lab / self.L)
+        key = (self.lstype, self.order, biglab)
+        if key not in tables:
+            tables[key] = bessel.bessel.linetable(
+                self.lstype, self.order, np.array(biglab)
+            )
+        if tables[key] is not None:
+            values, params, error = tables[key]
+            if np.max(error) <= tol:
+                self.table = (values, params)
@@ -1,8 +1,47 @@
+"""Mix-in classes that return the rows of the system of equations of an element.
+
+The `equation` method returns the matrix rows of size `(nunknowns, neq)` and the
+right-hand side of size `nunknowns`. When called with `rhsonly=True`, only the
+right-hand side is computed and None is returned for the matrix. When called with
+an array `mat` of size `(nunknowns, neq)`, e.g. the view of the rows of the element
+in the matrix of the model, the rows are written into `mat`, which is returned.
+The first column of the unknowns of each element is stored in `jcol` by
+`Model.initialize`; it is None when `mat` does not contain the columns of the
+element itself (see `Model.bordercolumns`).
+"""
+
 import numpy as np
 
 
+def matrows(e, rhsonly, mat, zeros=False):
+    """Array for the matrix rows of element `e`.
+
+    Returns None if `rhsonly` is True, otherwise `mat` or, if `mat` is None, a new
+    array of size `(nunknowns, neq)`. The array is set to zero if `zeros` is True.
+    """
+    if rhsonly:
+        return None
+    if mat is None:
+        if zeros:
+            return np.zeros((e.nunknowns, e.model.neq))
+        return np.empty((e.nunknowns, e.model.neq))
+    if zeros:
+        mat[:] = 0.0
+    return mat
+
+
+def cprows(inf):
+    """Matrix rows from influences with the control points along the last axis.
+
+    Rows are ordered by control point and then by layer, as in the equations below,
+    so an array of size (nlayers, nparam, ncp) becomes (ncp * nlayers, nparam) and
+    an array of size (nlayers, ncp) becomes (ncp * nlayers).
+    """
+    return np.moveaxis(inf, -1, 0).reshape((-1,) + inf.shape[1:-1])
+
+
 class PotentialEquation:
-    def equation(self):
+    def equation(self, rhsonly=False, mat=None):
         """Mix-in class that returns matrix rows for potential-specified conditions.
 
         Returns
@@ -12,32 +51,33 @@ class PotentialEquation:
         rhs
             (nunknowns)
         """
-        mat = np.empty((self.nunknowns, self.model.neq))
+        mat = matrows(self, rhsonly, mat)
         # rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
         rhs = self.pc.copy()
-        for icp in range(self.ncp):
-            istart = icp * self.nlayers
-            # rhs[istart:istart+self.nlayers] = self.pc[]
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    mat[istart : istart + self.nlayers, ieq : ieq + e.nunknowns] = (
-                        e.potinflayers(self.xc[icp], self.yc[icp], self.layers)
-                    )
-                    if e == self:
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                mat[:, ieq : ieq + e.nunknowns] = cprows(
+                    e.potinflayers(self.xc, self.yc, self.layers)
+                )
+                if e == self:
+                    for icp in range(self.ncp):
+                        istart = icp * self.nlayers
                         mat[
                             istart : istart + self.nlayers, ieq : ieq + e.nunknowns
                         ] -= self.resfac[icp]
-                    ieq += e.nunknowns
-                else:
-                    rhs[istart : istart + self.nlayers] -= e.potentiallayers(
-                        self.xc[icp], self.yc[icp], self.layers
-                    )  # Pretty cool that this works, really
+                ieq += e.nunknowns
+            else:
+                rhs -= cprows(
+                    e.potentiallayers(self.xc, self.yc, self.layers)
+                )  # Pretty cool that this works, really
         return mat, rhs
 
 
 class HeadEquation:
-    def equation(self):
+    def equation(self, rhsonly=False, mat=None):
         """Mix-in class that returns matrix rows for head-specified conditions.
 
         Notes
@@ -51,35 +91,36 @@ class HeadEquation:
         rhs
             (nunknowns)
         """
-        mat = np.empty((self.nunknowns, self.model.neq))
+        mat = matrows(self, rhsonly, mat)
         # rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
         rhs = self.hc.copy()
-        for icp in range(self.ncp):
-            istart = icp * self.nlayers
-            # rhs[istart:istart+self.nlayers] = self.pc[]
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    mat[istart : istart + self.nlayers, ieq : ieq + e.nunknowns] = (
-                        e.potinflayers(self.xc[icp], self.yc[icp], self.layers)
-                        / self.aq.Tcol[self.layers]
-                    )
-                    if e == self:
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                mat[:, ieq : ieq + e.nunknowns] = cprows(
+                    e.potinflayers(self.xc, self.yc, self.layers)
+                    / self.aq.Tcol[self.layers, :, np.newaxis]
+                )
+                if e == self:
+                    for icp in range(self.ncp):
+                        istart = icp * self.nlayers
                         mat[
                             istart : istart + self.nlayers, ieq : ieq + e.nunknowns
                         ] -= self.resfac[icp]
-                    ieq += e.nunknowns
-                else:
-                    rhs[istart : istart + self.nlayers] -= (
-                        e.potentiallayers(self.xc[icp], self.yc[icp], self.layers)
-                        / self.aq.T[self.layers]
-                    )  # Pretty cool that this works, really
+                ieq += e.nunknowns
+            else:
+                rhs -= cprows(
+                    e.potentiallayers(self.xc, self.yc, self.layers)
+                    / self.aq.Tcol[self.layers]
+                )  # Pretty cool that this works, really
         return mat, rhs
 
 
 # This class can be deleted when HeadEquation works with zero resistance:
 class HeadEquationNoRes:
-    def equation(self):
+    def equation(self, rhsonly=False, mat=None):
         """Mix-in class that returns matrix rows for head-specified conditions.
 
         Notes
@@ -93,27 +134,29 @@ class HeadEquationNoRes:
         rhs
             (nunknowns)
         """
-        mat = np.empty((self.nunknowns, self.model.neq))
+        mat = matrows(self, rhsonly, mat)
         rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
         for icp in range(self.ncp):
             istart = icp * self.nlayers
             rhs[istart : istart + self.nlayers] = self.pc
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    mat[istart : istart + self.nlayers, ieq : ieq + e.nunknowns] = (
-                        e.potinflayers(self.xc[icp], self.yc[icp], self.layers)
-                    )
-                    ieq += e.nunknowns
-                else:
-                    rhs[istart : istart + self.nlayers] -= e.potentiallayers(
-                        self.xc[icp], self.yc[icp], self.layers
-                    )  # Pretty cool that this works, really
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                mat[:, ieq : ieq + e.nunknowns] = cprows(
+                    e.potinflayers(self.xc, self.yc, self.layers)
+                )
+                ieq += e.nunknowns
+            else:
+                rhs -= cprows(
+                    e.potentiallayers(self.xc, self.yc, self.layers)
+                )  # Pretty cool that this works, really
         return mat, rhs
 
 
 class MscreenWellEquation:
-    def equation(self):
+    def equation(self, rhsonly=False, mat=None):
         """Mix-in class that returns matrix rows for mscreen condition.
 
         Mscreen condition applied at each control point separately (so not like in
@@ -126,15 +169,17 @@ class MscreenWellEquation:
         rhs
             (nunknowns)
         """
-        mat = np.zeros((self.nunknowns, self.model.neq))
+        mat = matrows(self, rhsonly, mat, zeros=True)
         rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
         rhs[0 : self.nlayers - 1] = 0.0
         rhs[self.nlayers - 1] = self.Qc
         ieq = 0
         for e in self.model.elementlist:
             if e.nunknowns > 0:
+                if rhsonly:
+                    continue
                 head = (
-                    e.potinflayers(self.xc, self.yc, self.layers)
+                    e.potinflayers(self.xc[0], self.yc[0], self.layers)
                     / self.aq.Tcol[self.layers, :]
                 )
                 mat[0 : self.nlayers - 1, ieq : ieq + e.nunknowns] = (
@@ -148,7 +193,7 @@ class MscreenWellEquation:
                 ieq += e.nunknowns
             else:
                 head = (
-                    e.potentiallayers(self.xc, self.yc, self.layers)
+                    e.potentiallayers(self.xc[0], self.yc[0], self.layers)
                     / self.aq.T[self.layers]
                 )
                 rhs[0 : self.nlayers - 1] -= head[:-1] - head[1:]
@@ -156,7 +201,7 @@ class MscreenWellEquation:
 
 
 class MscreenWellNoflowEquation:
-    def equation(self):
+    def equation(self, rhsonly=False, mat=None):
         """Matrix rows for mscreen condition with no flow in the non-screened layers.
 
         Notes
@@ -172,22 +217,24 @@ class MscreenWellNoflowEquation:
         rhs
             (nunknowns)
         """
-        mat = np.zeros((self.nunknowns, self.model.neq))
+        mat = matrows(self, rhsonly, mat, zeros=True)
         rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
         rhs[:] = 0.0
         rhs[self.nscreened - 1] = -self.Qc
         ieq = 0
         for e in self.model.elementlist:
             if e.nunknowns > 0:
+                if rhsonly:
+                    continue
                 head = (
-                    e.potinflayers(self.xc, self.yc, self.screened)
+                    e.potinflayers(self.xc[0], self.yc[0], self.screened)
                     / self.aq.Tcol[self.screened, :]
                 )
                 mat[0 : self.nscreened - 1, ieq : ieq + e.nunknowns] = (
                     head[:-1] - head[1:]
                 )
                 if e == self:
-                    qx, qy = e.disvecinflayers(self.xc, self.yc, self.layers)
+                    qx, qy = e.disvecinflayers(self.xc[0], self.yc[0], self.layers)
                     qxscreen = qx[self.screened]
                     qxnoflow = np.delete(qx, self.screened, axis=0)
                     mat[self.nscreened - 1, ieq : ieq + self.nlayers] = (
@@ -197,7 +244,7 @@ class MscreenWellNoflowEquation:
                 ieq += e.nunknowns
             else:
                 head = (
-                    e.potentiallayers(self.xc, self.yc, self.layers)
+                    e.potentiallayers(self.xc[0], self.yc[0], self.layers)
                     / self.aq.T[self.layers]
                 )
                 rhs[0 : self.nlayers - 1] -= head[:-1] - head[1:]
@@ -205,7 +252,7 @@ class MscreenWellNoflowEquation:
 
 
 class DisvecEquation:
-    def equation(self):
+    def equation(self, rhsonly=False, mat=None):
         """Mix-in class that returns matrix rows for zero normal flux conditions.
 
         Returns
@@ -215,28 +262,26 @@ class DisvecEquation:
         rhs
             (nunknowns)
         """
-        mat = np.empty((self.nunknowns, self.model.neq))
+        mat = matrows(self, rhsonly, mat)
         rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
-        for icp in range(self.ncp):
-            istart = icp * self.nlayers
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    qx, qy = e.disvecinflayers(self.xc[icp], self.yc[icp], self.layers)
-                    mat[istart : istart + self.nlayers, ieq : ieq + e.nunknowns] = (
-                        qx * self.cosnorm[icp] + qy * self.sinnorm[icp]
-                    )
-                    ieq += e.nunknowns
-                else:
-                    qx, qy = e.disveclayers(self.xc[icp], self.yc[icp], self.layers)
-                    rhs[istart : istart + self.nlayers] -= (
-                        qx * self.cosnorm[icp] + qy * self.sinnorm[icp]
-                    )
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                qx, qy = e.disvecinflayers(self.xc, self.yc, self.layers)
+                mat[:, ieq : ieq + e.nunknowns] = cprows(
+                    qx * self.cosnorm + qy * self.sinnorm
+                )
+                ieq += e.nunknowns
+            else:
+                qx, qy = e.disveclayers(self.xc, self.yc, self.layers)
+                rhs -= cprows(qx * self.cosnorm + qy * self.sinnorm)
         return mat, rhs
 
 
 class DisvecEquationOut:
-    def equation(self):
+    def equation(self, rhsonly=False, mat=None):
         """Mix-in class that returns matrix rows for zero normal flux condition.
 
         Notes
@@ -250,32 +295,26 @@ class DisvecEquationOut:
         rhs
             (nunknowns)
         """
-        mat = np.empty((self.nunknowns, self.model.neq))
+        mat = matrows(self, rhsonly, mat)
         rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
-        for icp in range(self.ncp):
-            istart = icp * self.nlayers
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    qx, qy = e.disvecinflayers(
-                        self.xcout[icp], self.ycout[icp], self.layers
-                    )
-                    mat[istart : istart + self.nlayers, ieq : ieq + e.nunknowns] = (
-                        qx * self.cosnorm[icp] + qy * self.sinnorm[icp]
-                    )
-                    ieq += e.nunknowns
-                else:
-                    qx, qy = e.disveclayers(
-                        self.xcout[icp], self.ycout[icp], self.layers
-                    )
-                    rhs[istart : istart + self.nlayers] -= (
-                        qx * self.cosnorm[icp] + qy * self.sinnorm[icp]
-                    )
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                qx, qy = e.disvecinflayers(self.xcout, self.ycout, self.layers)
+                mat[:, ieq : ieq + e.nunknowns] = cprows(
+                    qx * self.cosnorm + qy * self.sinnorm
+                )
+                ieq += e.nunknowns
+            else:
+                qx, qy = e.disveclayers(self.xcout, self.ycout, self.layers)
+                rhs -= cprows(qx * self.cosnorm + qy * self.sinnorm)
         return mat, rhs
 
 
 class LeakyWallEquation:
-    def equation(self):
+    def equation(self, rhsonly=False, mat=None):
         """Mix-in class that returns matrix rows for leaky wall condition.
 
         Qnormal = resfac * (headin - headout)
@@ -287,58 +326,49 @@ class LeakyWallEquation:
         rhs
             (nunknowns)
         """
-        mat = np.empty((self.nunknowns, self.model.neq))
+        mat = matrows(self, rhsonly, mat)
         rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
-        for icp in range(self.ncp):
-            istart = icp * self.nlayers
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    qx, qy = e.disvecinflayers(self.xc[icp], self.yc[icp], self.layers)
-                    mat[istart : istart + self.nlayers, ieq : ieq + e.nunknowns] = (
-                        qx * self.cosnorm[icp]
-                        + qy * self.sinnorm[icp]
-                        - self.resfac[:, np.newaxis]
-                        * (
-                            e.potinflayers(
-                                self.xcin[icp], self.ycin[icp], self.layers, aq=self.aq
-                            )
-                            / self.aq.Tcol[self.layers]
-                            - e.potinflayers(
-                                self.xcout[icp],
-                                self.ycout[icp],
-                                self.layers,
-                                aq=self.aq,
-                            )
-                            / self.aq.Tcol[self.layers]
-                        )
+        xinout = np.hstack((self.xcin, self.xcout))
+        yinout = np.hstack((self.ycin, self.ycout))
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                qx, qy = e.disvecinflayers(self.xc, self.yc, self.layers)
+                # potential inside and outside in one call
+                potin, potout = np.split(
+                    e.potinflayers(xinout, yinout, self.layers, aq=self.aq), 2, -1
+                )
+                mat[:, ieq : ieq + e.nunknowns] = cprows(
+                    qx * self.cosnorm
+                    + qy * self.sinnorm
+                    - self.resfac[:, np.newaxis, np.newaxis]
+                    * (
+                        potin / self.aq.Tcol[self.layers, :, np.newaxis]
+                        - potout / self.aq.Tcol[self.layers, :, np.newaxis]
                     )
-                    ieq += e.nunknowns
-                else:
-                    qx, qy = e.disveclayers(self.xc[icp], self.yc[icp], self.layers)
-                    rhs[istart : istart + self.nlayers] -= (
-                        qx * self.cosnorm[icp]
-                        + qy * self.sinnorm[icp]
-                        + self.resfac
-                        * (
-                            e.potentiallayers(
-                                self.xcin[icp], self.ycin[icp], self.layers, aq=self.aq
-                            )
-                            / self.aq.T[self.layers]
-                            - e.potentiallayers(
-                                self.xcout[icp],
-                                self.ycout[icp],
-                                self.layers,
-                                aq=self.aq,
-                            )
-                            / self.aq.T[self.layers]
-                        )
+                )
+                ieq += e.nunknowns
+            else:
+                qx, qy = e.disveclayers(self.xc, self.yc, self.layers)
+                potin, potout = np.split(
+                    e.potentiallayers(xinout, yinout, self.layers, aq=self.aq), 2, -1
+                )
+                rhs -= cprows(
+                    qx * self.cosnorm
+                    + qy * self.sinnorm
+                    + self.resfac[:, np.newaxis]
+                    * (
+                        potin / self.aq.Tcol[self.layers]
+                        - potout / self.aq.Tcol[self.layers]
                     )
+                )
         return mat, rhs
 
 
 class HeadDiffEquation:
-    def equation(self):
+    def equation(self, rhsonly=False, mat=None):
         """Matrix rows for difference in head between inside and outside equals zeros.
 
         Returns
@@ -348,40 +378,34 @@ class HeadDiffEquation:
         rhs
             (nunknowns)
         """
-        mat = np.empty((self.nunknowns, self.model.neq))
+        mat = matrows(self, rhsonly, mat)
         rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
-        for icp in range(self.ncp):
-            istart = icp * self.nlayers
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    mat[istart : istart + self.nlayers, ieq : ieq + e.nunknowns] = (
-                        e.potinflayers(
-                            self.xcin[icp], self.ycin[icp], self.layers, aq=self.aqin
-                        )
-                        / self.aqin.Tcol
-                        - e.potinflayers(
-                            self.xcout[icp], self.ycout[icp], self.layers, aq=self.aqout
-                        )
-                        / self.aqout.Tcol
-                    )
-                    ieq += e.nunknowns
-                else:
-                    rhs[istart : istart + self.nlayers] -= (
-                        e.potentiallayers(
-                            self.xcin[icp], self.ycin[icp], self.layers, aq=self.aqin
-                        )
-                        / self.aqin.T
-                        - e.potentiallayers(
-                            self.xcout[icp], self.ycout[icp], self.layers, aq=self.aqout
-                        )
-                        / self.aqout.T
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                mat[:, ieq : ieq + e.nunknowns] = cprows(
+                    e.potinflayers(self.xcin, self.ycin, self.layers, aq=self.aqin)
+                    / self.aqin.Tcol[:, :, np.newaxis]
+                    - e.potinflayers(self.xcout, self.ycout, self.layers, aq=self.aqout)
+                    / self.aqout.Tcol[:, :, np.newaxis]
+                )
+                ieq += e.nunknowns
+            else:
+                rhs -= cprows(
+                    e.potentiallayers(self.xcin, self.ycin, self.layers, aq=self.aqin)
+                    / self.aqin.Tcol
+                    - e.potentiallayers(
+                        self.xcout, self.ycout, self.layers, aq=self.aqout
                     )
+                    / self.aqout.Tcol
+                )
         return mat, rhs
 
 
 class HeadDiffEquation2:
-    def equation(self):
+    def equation(self, rhsonly=False, mat=None):
         """Matrix rows for difference in head between inside and outside equals zeros.
 
         Notes
@@ -395,72 +419,70 @@ class HeadDiffEquation2:
         rhs
             (nunknowns)
         """
-        mat = np.empty((self.nunknowns, self.model.neq))
+        mat = matrows(self, rhsonly, mat)
         rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
-        for icp in range(self.ncp):
-            istart = icp * self.nlayers
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    headin = (
-                        self.intpot(
-                            e.potinflayers,
-                            self.xcin[icp],
-                            self.ycin[icp],
-                            self.xcin[icp + 1],
-                            self.ycin[icp + 1],
-                            self.layers,
-                            aq=self.aqin,
-                        )
-                        / self.aqin.Tcol[self.layers]
-                    )
-                    headout = (
-                        self.intpot(
-                            e.potinflayers,
-                            self.xcout[icp],
-                            self.ycout[icp],
-                            self.xcout[icp + 1],
-                            self.ycout[icp + 1],
-                            self.layers,
-                            aq=self.aqout,
-                        )
-                        / self.aqout.Tcol[self.layers]
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                headin = (
+                    self.intpot(
+                        e.potinflayers,
+                        self.xcin[:-1],
+                        self.ycin[:-1],
+                        self.xcin[1:],
+                        self.ycin[1:],
+                        self.layers,
+                        aq=self.aqin,
                     )
-                    mat[istart : istart + self.nlayers, ieq : ieq + e.nunknowns] = (
-                        headin - headout
+                    / self.aqin.Tcol[self.layers, :, np.newaxis]
+                )
+                headout = (
+                    self.intpot(
+                        e.potinflayers,
+                        self.xcout[:-1],
+                        self.ycout[:-1],
+                        self.xcout[1:],
+                        self.ycout[1:],
+                        self.layers,
+                        aq=self.aqout,
                     )
-                    ieq += e.nunknowns
-                else:
-                    headin = (
-                        self.intpot(
-                            e.potentiallayers,
-                            self.xcin[icp],
-                            self.ycin[icp],
-                            self.xcin[icp + 1],
-                            self.ycin[icp + 1],
-                            self.layers,
-                            aq=self.aqin,
-                        )
-                        / self.aqin.T[self.layers]
+                    / self.aqout.Tcol[self.layers, :, np.newaxis]
+                )
+                mat[:, ieq : ieq + e.nunknowns] = cprows(headin - headout)
+                ieq += e.nunknowns
+            else:
+                headin = (
+                    self.intpot(
+                        e.potentiallayers,
+                        self.xcin[:-1],
+                        self.ycin[:-1],
+                        self.xcin[1:],
+                        self.ycin[1:],
+                        self.layers,
+                        aq=self.aqin,
                     )
-                    headout = (
-                        self.intpot(
-                            e.potentiallayers,
-                            self.xcout[icp],
-                            self.ycout[icp],
-                            self.xcout[icp + 1],
-                            self.ycout[icp + 1],
-                            self.layers,
-                            aq=self.aqout,
-                        )
-                        / self.aqout.T[self.layers]
+                    / self.aqin.Tcol[self.layers]
+                )
+                headout = (
+                    self.intpot(
+                        e.potentiallayers,
+                        self.xcout[:-1],
+                        self.ycout[:-1],
+                        self.xcout[1:],
+                        self.ycout[1:],
+                        self.layers,
+                        aq=self.aqout,
                     )
-                    rhs[istart : istart + self.nlayers] -= headin - headout
+                    / self.aqout.Tcol[self.layers]
+                )
+                rhs -= cprows(headin - headout)
         return mat, rhs
 
 
 class DisvecDiffEquation:
-    def equation(self):
+    def equation(self, rhsonly=False, mat=None):
         """Matrix rows for difference in head between inside and outside equals zeros.
 
         Returns
@@ -470,38 +492,38 @@ class DisvecDiffEquation:
         rhs
             (nunknowns)
         """
-        mat = np.empty((self.nunknowns, self.model.neq))
+        mat = matrows(self, rhsonly, mat)
         rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
-        for icp in range(self.ncp):
-            istart = icp * self.nlayers
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    qxin, qyin = e.disvecinflayers(
-                        self.xcin[icp], self.ycin[icp], self.layers, aq=self.aqin
-                    )
-                    qxout, qyout = e.disvecinflayers(
-                        self.xcout[icp], self.ycout[icp], self.layers, aq=self.aqout
-                    )
-                    mat[istart : istart + self.nlayers, ieq : ieq + e.nunknowns] = (
-                        qxin - qxout
-                    ) * self.cosnorm[icp] + (qyin - qyout) * self.sinnorm[icp]
-                    ieq += e.nunknowns
-                else:
-                    qxin, qyin = e.disveclayers(
-                        self.xcin[icp], self.ycin[icp], self.layers, aq=self.aqin
-                    )
-                    qxout, qyout = e.disveclayers(
-                        self.xcout[icp], self.ycout[icp], self.layers, aq=self.aqout
-                    )
-                    rhs[istart : istart + self.nlayers] -= (
-                        qxin - qxout
-                    ) * self.cosnorm[icp] + (qyin - qyout) * self.sinnorm[icp]
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                qxin, qyin = e.disvecinflayers(
+                    self.xcin, self.ycin, self.layers, aq=self.aqin
+                )
+                qxout, qyout = e.disvecinflayers(
+                    self.xcout, self.ycout, self.layers, aq=self.aqout
+                )
+                mat[:, ieq : ieq + e.nunknowns] = cprows(
+                    (qxin - qxout) * self.cosnorm + (qyin - qyout) * self.sinnorm
+                )
+                ieq += e.nunknowns
+            else:
+                qxin, qyin = e.disveclayers(
+                    self.xcin, self.ycin, self.layers, aq=self.aqin
+                )
+                qxout, qyout = e.disveclayers(
+                    self.xcout, self.ycout, self.layers, aq=self.aqout
+                )
+                rhs -= cprows(
+                    (qxin - qxout) * self.cosnorm + (qyin - qyout) * self.sinnorm
+                )
         return mat, rhs
 
 
 class DisvecDiffEquation2:
-    def equation(self):
+    def equation(self, rhsonly=False, mat=None):
         """Matrix rows for difference in head between inside and outside equals zeros.
 
         Returns
@@ -511,176 +533,172 @@ class DisvecDiffEquation2:
         rhs
             (nunknowns)
         """
-        mat = np.empty((self.nunknowns, self.model.neq))
+        mat = matrows(self, rhsonly, mat)
         rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
-        for icp in range(self.ncp):
-            istart = icp * self.nlayers
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    fluxin = self.intflux(
-                        e.disvecinflayers,
-                        self.xcin[icp],
-                        self.ycin[icp],
-                        self.xcin[icp + 1],
-                        self.ycin[icp + 1],
-                        self.layers,
-                        aq=self.aqin,
-                    )
-                    fluxout = self.intflux(
-                        e.disvecinflayers,
-                        self.xcout[icp],
-                        self.ycout[icp],
-                        self.xcout[icp + 1],
-                        self.ycout[icp + 1],
-                        self.layers,
-                        aq=self.aqout,
-                    )
-                    mat[istart : istart + self.nlayers, ieq : ieq + e.nunknowns] = (
-                        fluxin - fluxout
-                    )
-                    ieq += e.nunknowns
-                else:
-                    fluxin = self.intflux(
-                        e.disveclayers,
-                        self.xcin[icp],
-                        self.ycin[icp],
-                        self.xcin[icp + 1],
-                        self.ycin[icp + 1],
-                        self.layers,
-                        aq=self.aqin,
-                    )
-                    fluxout = self.intflux(
-                        e.disveclayers,
-                        self.xcout[icp],
-                        self.ycout[icp],
-                        self.xcout[icp + 1],
-                        self.ycout[icp + 1],
-                        self.layers,
-                        aq=self.aqout,
-                    )
-                    rhs[istart : istart + self.nlayers] -= fluxin - fluxout
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                fluxin = self.intflux(
+                    e.disvecinflayers,
+                    self.xcin[:-1],
+                    self.ycin[:-1],
+                    self.xcin[1:],
+                    self.ycin[1:],
+                    self.layers,
+                    aq=self.aqin,
+                )
+                fluxout = self.intflux(
+                    e.disvecinflayers,
+                    self.xcout[:-1],
+                    self.ycout[:-1],
+                    self.xcout[1:],
+                    self.ycout[1:],
+                    self.layers,
+                    aq=self.aqout,
+                )
+                mat[:, ieq : ieq + e.nunknowns] = cprows(fluxin - fluxout)
+                ieq += e.nunknowns
+            else:
+                fluxin = self.intflux(
+                    e.disveclayers,
+                    self.xcin[:-1],
+                    self.ycin[:-1],
+                    self.xcin[1:],
+                    self.ycin[1:],
+                    self.layers,
+                    aq=self.aqin,
+                )
+                fluxout = self.intflux(
+                    e.disveclayers,
+                    self.xcout[:-1],
+                    self.ycout[:-1],
+                    self.xcout[1:],
+                    self.ycout[1:],
+                    self.layers,
+                    aq=self.aqout,
+                )
+                rhs -= cprows(fluxin - fluxout)
         return mat, rhs
 
 
 class IntDisVecEquation:
-    def equation(self):
-        mat = np.empty((self.nunknowns, self.model.neq))
+    def equation(self, rhsonly=False, mat=None):
+        mat = matrows(self, rhsonly, mat)
         rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
-        for icp in range(self.ncp):
-            istart = icp * self.nlayers
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    flux = self.intflux(
-                        e.disvecinflayers,
-                        self.xc[icp],
-                        self.yc[icp],
-                        self.xc[icp + 1],
-                        self.yc[icp + 1],
-                        self.layers,
-                        aq=self.aq,
-                    )
-                    mat[istart : istart + self.nlayers, ieq : ieq + e.nunknowns] = flux
-                    ieq += e.nunknowns
-                else:
-                    flux = self.intflux(
-                        e.disveclayers,
-                        self.xc[icp],
-                        self.yc[icp],
-                        self.xc[icp + 1],
-                        self.yc[icp + 1],
-                        self.layers,
-                        aq=self.aq,
-                    )
-                    rhs[istart : istart + self.nlayers] -= flux
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                flux = self.intflux(
+                    e.disvecinflayers,
+                    self.xc[:-1],
+                    self.yc[:-1],
+                    self.xc[1:],
+                    self.yc[1:],
+                    self.layers,
+                    aq=self.aq,
+                )
+                mat[:, ieq : ieq + e.nunknowns] = cprows(flux)
+                ieq += e.nunknowns
+            else:
+                flux = self.intflux(
+                    e.disveclayers,
+                    self.xc[:-1],
+                    self.yc[:-1],
+                    self.xc[1:],
+                    self.yc[1:],
+                    self.layers,
+                    aq=self.aq,
+                )
+                rhs -= cprows(flux)
 
         return mat, rhs
 
 
 class IntLeakyWallEquation:
-    def equation(self):
-        mat = np.empty((self.nunknowns, self.model.neq))
+    def equation(self, rhsonly=False, mat=None):
+        mat = matrows(self, rhsonly, mat)
         rhs = np.zeros(self.nunknowns)  # Needs to be initialized to zero
-        for icp in range(self.ncp):
-            istart = icp * self.nlayers
-            ieq = 0
-            for e in self.model.elementlist:
-                if e.nunknowns > 0:
-                    flux = self.intflux(
-                        e.disvecinflayers,
-                        self.xc[icp],
-                        self.yc[icp],
-                        self.xc[icp + 1],
-                        self.yc[icp + 1],
+        ieq = 0
+        for e in self.model.elementlist:
+            if e.nunknowns > 0:
+                if rhsonly:
+                    continue
+                flux = self.intflux(
+                    e.disvecinflayers,
+                    self.xc[:-1],
+                    self.yc[:-1],
+                    self.xc[1:],
+                    self.yc[1:],
+                    self.layers,
+                    aq=self.aq,
+                )
+                headin = (
+                    self.intpot(
+                        e.potinflayers,
+                        self.xcin[:-1],
+                        self.ycin[:-1],
+                        self.xcin[1:],
+                        self.ycin[1:],
                         self.layers,
-                        aq=self.aq,
-                    )
-                    headin = (
-                        self.intpot(
-                            e.potinflayers,
-                            self.xcin[icp],
-                            self.ycin[icp],
-                            self.xcin[icp + 1],
-                            self.ycin[icp + 1],
-                            self.layers,
-                            aq=self.aqin,
-                        )
-                        / self.aqin.Tcol[self.layers]
+                        aq=self.aqin,
                     )
-                    headout = (
-                        self.intpot(
-                            e.potinflayers,
-                            self.xcout[icp],
-                            self.ycout[icp],
-                            self.xcout[icp + 1],
-                            self.ycout[icp + 1],
-                            self.layers,
-                            aq=self.aqout,
-                        )
-                        / self.aqout.Tcol[self.layers]
+                    / self.aqin.Tcol[self.layers, :, np.newaxis]
+                )
+                headout = (
+                    self.intpot(
+                        e.potinflayers,
+                        self.xcout[:-1],
+                        self.ycout[:-1],
+                        self.xcout[1:],
+                        self.ycout[1:],
+                        self.layers,
+                        aq=self.aqout,
                     )
+                    / self.aqout.Tcol[self.layers, :, np.newaxis]
+                )
 
-                    mat[istart : istart + self.nlayers, ieq : ieq + e.nunknowns] = (
-                        flux - self.resfac * (headin - headout)
-                    )
-                    ieq += e.nunknowns
-                else:
-                    flux = self.intflux(
-                        e.disveclayers,
-                        self.xc[icp],
-                        self.yc[icp],
-                        self.xc[icp + 1],
-                        self.yc[icp + 1],
+                mat[:, ieq : ieq + e.nunknowns] = cprows(
+                    flux - self.resfac[:, :, np.newaxis] * (headin - headout)
+                )
+                ieq += e.nunknowns
+            else:
+                flux = self.intflux(
+                    e.disveclayers,
+                    self.xc[:-1],
+                    self.yc[:-1],
+                    self.xc[1:],
+                    self.yc[1:],
+                    self.layers,
+                    aq=self.aq,
+                )
+                headin = (
+                    self.intpot(
+                        e.potentiallayers,
+                        self.xcin[:-1],
+                        self.ycin[:-1],
+                        self.xcin[1:],
+                        self.ycin[1:],
                         self.layers,
-                        aq=self.aq,
-                    )
-                    headin = (
-                        self.intpot(
-                            e.potentiallayers,
-                            self.xcin[icp],
-                            self.ycin[icp],
-                            self.xcin[icp + 1],
-                            self.ycin[icp + 1],
-                            self.layers,
-                            aq=self.aqin,
-                        )
-                        / self.aqin.T[self.layers]
+                        aq=self.aqin,
                     )
-                    headout = (
-                        self.intpot(
-                            e.potentiallayers,
-                            self.xcout[icp],
-                            self.ycout[icp],
-                            self.xcout[icp + 1],
-                            self.ycout[icp + 1],
-                            self.layers,
-                            aq=self.aqout,
-                        )
-                        / self.aqout.T[self.layers]
+                    / self.aqin.Tcol[self.layers]
+                )
+                headout = (
+                    self.intpot(
+                        e.potentiallayers,
+                        self.xcout[:-1],
+                        self.ycout[:-1],
+                        self.xcout[1:],
+                        self.ycout[1:],
+                        self.layers,
+                        aq=self.aqout,
                     )
+                    / self.aqout.Tcol[self.layers]
+                )
 
-                    rhs[istart : istart + self.nlayers] += (
-                        -flux + self.resfac.squeeze() * (headin - headout)
-                    )
+                rhs += cprows(-flux + self.resfac * (headin - headout))
         return mat, rhs
@@ -0,0 +1,481 @@
+"""Compiled evaluator of a solved model.
+
+The evaluator flattens a solved model into contiguous arrays (element type codes,
+geometry, strengths per eigen-mode and aquifer data) and evaluates potentials,
+heads and discharge vectors with parallel numba kernels, without calling any of
+the element objects. It only contains numpy arrays, so it pickles cheaply.
+
+Example::
+
+    ml.solve()
+    ev = ml.evaluator()
+    h = ev.headgrid(xg, yg)
+"""
+
+import numba
+import numpy as np
+
+from .besselaesnumba.besselaesnumba import disbesldv, disbeslsv, potbesldv, potbeslsv
+from .constant import ConstantBase, ConstantInside, ConstantStar
+from .inhomogeneity import AreaSinkInhom, BuildingPit, PolygonInhom
+from .linedoublet import LineDoubletHoBase, LineDoubletStringBase
+from .linesink import (
+    LineSinkBase,
+    LineSinkContainer,
+    LineSinkHoBase,
+    LineSinkStringBase,
+    LineSinkStringBase2,
+)
+from .uflow import Uflow
+from .well import LargeDiameterWell, WellBase
+
+__all__ = ["ModelEvaluator"]
+
+# element type codes
+WELL = 0
+LINESINK = 1
+LINEDOUBLET = 2
+UFLOW = 3
+AREASINK = 4
+
+EULER = 0.5772156649015329
+
+
+class ModelEvaluator:
+    """Flattened, compiled representation of a solved model.
+
+    Parameters
+    ----------
+    model : Model object
+        solved model; the evaluator stores the solution at the time it is created
+
+    Notes
+    -----
+    Supported are wells, (head) line-sinks, line-doublets and strings and
+    containers of them, uniform flow, constants and polygon inhomogeneities
+    (including building pits and areal infiltration). All aquifers must have the
+    same number of layers.
+    """
+
+    def __init__(self, model):
+        if model.nscenarios is not None:
+            raise ValueError("ModelEvaluator does not support solve_scenarios")
+        aqlist = [model.aq] + list(model.aq.inhomlist)
+        self.naq = model.aq.naq
+        for aq in aqlist:
+            if aq.naq != self.naq:
+                raise ValueError(
+                    "ModelEvaluator requires the same number of aquifers everywhere"
+                )
+            if aq is not model.aq and not isinstance(aq, PolygonInhom | BuildingPit):
+                raise ValueError(f"ModelEvaluator does not support {type(aq).__name__}")
+        nmodel = len(aqlist)
+        self.aqlab = np.array([aq.lab for aq in aqlist])
+        self.aqilap = np.array([aq.ilap for aq in aqlist])
+        self.aqeigvec = np.array([aq.eigvec for aq in aqlist])
+        self.aqT = np.array([aq.T for aq in aqlist])
+        self.aqpotstar = np.zeros((nmodel, self.naq))
+        self.aqconst = np.zeros((nmodel, self.naq))
+        self.aqarea = np.array([aq.area for aq in aqlist], dtype="d")
+        self.aqtiny = np.zeros(nmodel)
+        self.aqbox = np.zeros((nmodel, 4))
+        self.aqvstart = np.zeros(nmodel + 1, dtype="int")
+        zv1, zv2 = [], []
+        for iaq, aq in enumerate(aqlist):
+            if aq.ltype[0] == "l":
+                self.aqpotstar[iaq] = aq.constantstar.potstar
+            if iaq > 0:
+                self.aqtiny[iaq] = aq.tiny
+                self.aqbox[iaq] = aq.xmin, aq.xmax, aq.ymin, aq.ymax
+                zv1.append(aq.z1)
+                zv2.append(aq.z2)
+                self.aqvstart[iaq + 1] = self.aqvstart[iaq] + len(aq.z1)
+        self.zv1 = np.hstack(zv1) if zv1 else np.zeros(0, dtype="complex")
+        self.zv2 = np.hstack(zv2) if zv2 else np.zeros(0, dtype="complex")
+        # elements, sorted by aquifer
+        self.etype = []
+        self.eorder = []
+        self.egeom = []
+        self.estrength = []
+        self.aqestart = np.zeros(nmodel + 1, dtype="int")
+        for iaq, aq in enumerate(aqlist):
+            for e in aq.elementlist:
+                self.add_element(e, e.parameters[:, 0], iaq, aq)
+            self.aqestart[iaq + 1] = len(self.etype)
+        self.etype = np.array(self.etype, dtype="int")
+        self.eorder = np.array(self.eorder, dtype="int")
+        self.egeom = np.array(self.egeom, dtype="d").reshape(-1, 6)
+        self.estart = np.zeros(len(self.etype) + 1, dtype="int")
+        self.estart[1:] = np.cumsum(self.eorder + 1)
+        if self.estrength:
+            self.estrength = np.vstack(self.estrength)
+        else:
+            self.estrength = np.zeros((0, self.naq))
+
+    def add_element(self, e, parameters, iaq, aq):
+        """Add element `e` with `parameters` in aquifer `aq` to the flat arrays."""
+        if isinstance(e, ConstantStar):
+            pass  # added through aqpotstar
+        elif isinstance(e, ConstantBase | ConstantInside):
+            if e.aq == aq:
+                self.aqconst[iaq, 0] += parameters[0]
+        elif isinstance(e, AreaSinkInhom):
+            if e.aq == aq:
+                self.aqconst[iaq, 1:] += parameters[0] * e.plabsq[0]
+                self.append(AREASINK, 0, [e.xc, 0, 0, 0, 0, 0], parameters[:1], aq)
+        elif isinstance(e, Uflow):
+            if e.aq == aq:
+                geom = [0, 0, 0, 0, parameters[0], parameters[1]]
+                self.append(UFLOW, 0, geom, np.zeros(1), aq)
+        elif isinstance(e, WellBase):
+            if e.aq == aq:
+                strength = parameters @ aq.coef[e.layers]
+                if isinstance(e, LargeDiameterWell):
+                    strength[aq.ilap :] /= besselk0array(e.rw / aq.lab[aq.ilap :])
+                geom = [e.xw, e.yw, 0, 0, e.rw, 0]
+                self.append(WELL, 0, geom, strength[np.newaxis, :], aq)
+        elif isinstance(e, LineSinkBase | LineSinkHoBase | LineDoubletHoBase):
+            if e.aq == aq:
+                order = e.order
+                if isinstance(e, LineDoubletHoBase):
+                    etype = LINEDOUBLET
+                else:
+                    etype = LINESINK
+                p = parameters.reshape(order + 1, e.nlayers)
+                strength = p @ aq.coef[e.layers]
+                geom = [e.z1.real, e.z1.imag, e.z2.real, e.z2.imag, 0, 0]
+                self.append(etype, order, geom, strength, aq)
+        elif isinstance(
+            e,
+            LineSinkStringBase
+            | LineSinkStringBase2
+            | LineSinkContainer
+            | LineDoubletStringBase,
+        ):
+            if isinstance(e, LineDoubletStringBase):
+                sublist = e.ldlist
+            else:
+                sublist = e.lslist
+            iparam = 0
+            for ls in sublist:
+                self.add_element(ls, parameters[iparam : iparam + ls.nparam], iaq, aq)
+                iparam += ls.nparam
+        else:
+            raise ValueError(f"ModelEvaluator does not support element {e.name}")
+
+    def append(self, etype, order, geom, strength, aq):
+        self.etype.append(etype)
+        self.eorder.append(order)
+        self.egeom.append(geom)
+        self.estrength.append(np.atleast_2d(strength) * np.ones((order + 1, aq.naq)))
+
+    def kernelargs(self):
+        return (
+            self.aqlab,
+            self.aqilap,
+            self.aqeigvec,
+            self.aqpotstar,
+            self.aqconst,
+            self.aqarea,
+            self.aqtiny,
+            self.aqbox,
+            self.aqvstart,
+            self.zv1,
+            self.zv2,
+            self.aqestart,
+            self.etype,
+            self.eorder,
+            self.egeom,
+            self.estart,
+            self.estrength,
+        )
+
+    def evaluate(self, func, x, y, nrows):
+        x, y = np.broadcast_arrays(np.asarray(x, dtype="d"), np.asarray(y, dtype="d"))
+        shape = x.shape
+        x, y = np.ascontiguousarray(x.ravel()), np.ascontiguousarray(y.ravel())
+        rv = np.empty((nrows, self.naq, len(x)))
+        iaq = np.empty(len(x), dtype="int")
+        func(x, y, *self.kernelargs(), rv, iaq)
+        return rv.reshape((nrows, self.naq) + shape), iaq.reshape(shape)
+
+    def potential(self, x, y):
+        """Potential at `x`, `y`.
+
+        Returns
+        -------
+        pot : array size `(naq, *shape)` with `shape` the shape of `x` and `y`
+        """
+        return self.evaluate(potentialkernel, x, y, 1)[0][0]
+
+    def head(self, x, y, layers=None):
+        """Head at `x`, `y`.
+
+        Returns
+        -------
+        h : array size `(nlayers, *shape)` with `shape` the shape of `x` and `y`
+        """
+        pot, iaq = self.evaluate(potentialkernel, x, y, 1)
+        rv = pot[0] / np.moveaxis(self.aqT[iaq], -1, 0)
+        if layers is None:
+            return rv
+        return rv[layers]
+
+    def disvec(self, x, y):
+        """Discharge vector at `x`, `y`.
+
+        Returns
+        -------
+        qxqy : array size `(2, naq, *shape)` with `shape` the shape of `x` and `y`
+        """
+        return self.evaluate(disveckernel, x, y, 2)[0]
+
+    def headgrid(self, xg, yg, layers=None):
+        """Grid of heads.
+
+        Returns
+        -------
+        h : array size `nlayers, ny, nx`
+        """
+        if layers is not None:
+            layers = np.atleast_1d(layers)
+        xg, yg = np.atleast_1d(xg), np.atleast_1d(yg)
+        return self.head(xg[np.newaxis, :], yg[:, np.newaxis], layers)
+
+
+@numba.njit(nogil=True, cache=True)
+def besselk0k1(x):
+    """Modified Bessel functions of the second kind of order 0 and 1.
+
+    Power series for x <= 2 and Steed's continued fraction (Temme) otherwise.
+    """
+    if x <= 2.0:
+        t = 0.25 * x * x
+        lnx = np.log(0.5 * x)
+        term0 = 1.0  # t^k / (k!)^2
+        term1 = 1.0  # t^k / (k! (k+1)!)
+        hk = 0.0  # harmonic number
+        i0 = 1.0
+        i1 = 1.0
+        sk0 = 0.0
+        sk1 = 1.0 - 2.0 * EULER
+        for k in range(1, 30):
+            term0 *= t / (k * k)
+            term1 *= t / (k * (k + 1))
+            hk += 1.0 / k
+            i0 += term0
+            i1 += term1
+            sk0 += term0 * hk
+            sk1 += term1 * (2.0 * hk + 1.0 / (k + 1) - 2.0 * EULER)
+            if term0 < 1e-17 * i0:
+                break
+        kzero = -(lnx + EULER) * i0 + sk0
+        kone = 1.0 / x + lnx * 0.5 * x * i1 - 0.25 * x * sk1
+    else:
+        b = 2.0 * (1.0 + x)
+        d = 1.0 / b
+        h = d
+        delh = d
+        q1 = 0.0
+        q2 = 1.0
+        a1 = 0.25
+        q = a1
+        c = a1
+        a = -a1
+        s = 1.0 + q * delh
+        for i in range(1, 1000):
+            a -= 2 * i
+            c = -a * c / (i + 1.0)
+            qnew = (q1 - b * q2) / a
+            q1 = q2
+            q2 = qnew
+            q += c * qnew
+            b += 2.0
+            d = 1.0 / (b + a * d)
+            delh = (b * d - 1.0) * delh
+            h += delh
+            dels = q * delh
+            s += dels
+            if abs(dels / s) < 1e-16:
+                break
+        h = a1 * h
+        kzero = np.sqrt(np.pi / (2.0 * x)) * np.exp(-x) / s
+        kone = kzero * (x + 0.5 - h) / x
+    return kzero, kone
+
+
+@numba.njit(nogil=True, cache=True)
+def besselk0array(x):
+    rv = np.empty(len(x))
+    for i in range(len(x)):
+        rv[i] = besselk0k1(x[i])[0]
+    return rv
+
+
+@numba.njit(nogil=True, cache=True)
+def findaquifer(x, y, aqarea, aqtiny, aqbox, aqvstart, zv1, zv2):
+    """Index of the aquifer at `x`, `y`, same rules as `find_aquifer_data`."""
+    rv = 0
+    z = complex(x, y)
+    for iaq in range(1, len(aqarea)):
+        if (
+            (x >= aqbox[iaq, 0])
+            and (x <= aqbox[iaq, 1])
+            and (y >= aqbox[iaq, 2])
+            and (y <= aqbox[iaq, 3])
+        ):
+            inside = False
+            angle = 0.0
+            for i in range(aqvstart[iaq], aqvstart[iaq + 1]):
+                bigZ = (2.0 * z - (zv1[i] + zv2[i])) / (zv2[i] - zv1[i])
+                if abs(bigZ - 1.0) < aqtiny[iaq] or abs(bigZ + 1.0) < aqtiny[iaq]:
+                    inside = True
+                    break
+                angle += np.log((bigZ - 1.0) / (bigZ + 1.0)).imag
+            if inside or angle > np.pi:
+                if aqarea[iaq] < aqarea[rv]:
+                    rv = iaq
+    return rv
+
+
+@numba.njit(nogil=True, parallel=True, cache=True)
+def potentialkernel(
+    x,
+    y,
+    aqlab,
+    aqilap,
+    aqeigvec,
+    aqpotstar,
+    aqconst,
+    aqarea,
+    aqtiny,
+    aqbox,
+    aqvstart,
+    zv1,
+    zv2,
+    aqestart,
+    etype,
+    eorder,
+    egeom,
+    estart,
+    estrength,
+    rv,
+    iaqout,
+):
+    naq = aqlab.shape[1]
+    for ipt in numba.prange(len(x)):
+        xp = x[ipt]
+        yp = y[ipt]
+        iaq = findaquifer(xp, yp, aqarea, aqtiny, aqbox, aqvstart, zv1, zv2)
+        iaqout[ipt] = iaq
+        lab = aqlab[iaq]
+        ilap = aqilap[iaq]
+        pot = aqconst[iaq].copy()
+        for ie in range(aqestart[iaq], aqestart[iaq + 1]):
+            g = egeom[ie]
+            s = estrength[estart[ie] : estart[ie + 1]]
+            if etype[ie] == WELL:
+                r = np.sqrt((xp - g[0]) ** 2 + (yp - g[1]) ** 2)
+                if r < g[4]:
+                    r = g[4]
+                if ilap:
+                    pot[0] += s[0, 0] * np.log(r / g[4]) / (2 * np.pi)
+                for j in range(ilap, naq):
+                    pot[j] -= s[0, j] * besselk0k1(r / lab[j])[0] / (2 * np.pi)
+            elif etype[ie] == LINESINK or etype[ie] == LINEDOUBLET:
+                z1 = complex(g[0], g[1])
+                z2 = complex(g[2], g[3])
+                if etype[ie] == LINESINK:
+                    p = potbeslsv(xp, yp, z1, z2, lab, eorder[ie], ilap, naq)
+                else:
+                    p = potbesldv(xp, yp, z1, z2, lab, eorder[ie], ilap, naq)
+                for k in range(eorder[ie] + 1):
+                    for j in range(naq):
+                        pot[j] += s[k, j] * p[k, j]
+            elif etype[ie] == UFLOW:
+                pot[0] -= g[4] * xp + g[5] * yp
+            elif etype[ie] == AREASINK:
+                pot[0] -= 0.5 * s[0, 0] * (xp - g[0]) ** 2
+        for i in range(naq):
+            rv[0, i, ipt] = aqpotstar[iaq, i]
+            for j in range(naq):
+                rv[0, i, ipt] += aqeigvec[iaq, i, j] * pot[j]
+
+
+@numba.njit(nogil=True, parallel=True, cache=True)
+def disveckernel(
+    x,
+    y,
+    aqlab,
+    aqilap,
+    aqeigvec,
+    aqpotstar,
+    aqconst,
+    aqarea,
+    aqtiny,
+    aqbox,
+    aqvstart,
+    zv1,
+    zv2,
+    aqestart,
+    etype,
+    eorder,
+    egeom,
+    estart,
+    estrength,
+    rv,
+    iaqout,
+):
+    naq = aqlab.shape[1]
+    for ipt in numba.prange(len(x)):
+        xp = x[ipt]
+        yp = y[ipt]
+        iaq = findaquifer(xp, yp, aqarea, aqtiny, aqbox, aqvstart, zv1, zv2)
+        iaqout[ipt] = iaq
+        lab = aqlab[iaq]
+        ilap = aqilap[iaq]
+        qx = np.zeros(naq)
+        qy = np.zeros(naq)
+        for ie in range(aqestart[iaq], aqestart[iaq + 1]):
+            g = egeom[ie]
+            s = estrength[estart[ie] : estart[ie + 1]]
+            if etype[ie] == WELL:
+                xminxw = xp - g[0]
+                yminyw = yp - g[1]
+                rsq = xminxw**2 + yminyw**2
+                r = np.sqrt(rsq)
+                if r < g[4]:
+                    r = g[4]
+                    rsq = r**2
+                    xminxw = g[4]
+                    yminyw = 0.0
+                if ilap:
+                    qx[0] -= s[0, 0] * xminxw / rsq / (2 * np.pi)
+                    qy[0] -= s[0, 0] * yminyw / rsq / (2 * np.pi)
+                for j in range(ilap, naq):
+                    kone = besselk0k1(r / lab[j])[1] / (r * lab[j]) / (2 * np.pi)
+                    qx[j] -= s[0, j] * kone * xminxw
+                    qy[j] -= s[0, j] * kone * yminyw
+            elif etype[ie] == LINESINK or etype[ie] == LINEDOUBLET:
+                z1 = complex(g[0], g[1])
+                z2 = complex(g[2], g[3])
+                order = eorder[ie]
+                if etype[ie] == LINESINK:
+                    q = disbeslsv(xp, yp, z1, z2, lab, order, ilap, naq)
+                else:
+                    q = disbesldv(xp, yp, z1, z2, lab, order, ilap, naq)
+                for k in range(order + 1):
+                    for j in range(naq):
+                        qx[j] += s[k, j] * q[k, j]
+                        qy[j] += s[k, j] * q[order + 1 + k, j]
+            elif etype[ie] == UFLOW:
+                qx[0] += g[4]
+                qy[0] += g[5]
+            elif etype[ie] == AREASINK:
+                qx[0] += s[0, 0] * (xp - g[0])
+        for i in range(naq):
+            rv[0, i, ipt] = 0.0
+            rv[1, i, ipt] = 0.0
+            for j in range(naq):
+                rv[0, i, ipt] += aqeigvec[iaq, i, j] * qx[j]
+                rv[1, i, ipt] += aqeigvec[iaq, i, j] * qy[j]
@@ -0,0 +1,343 @@
+"""Compressed storage of the matrix with low-rank blocks of distant elements.
+
+The influence of a group of elements on the control points of another group of
+elements far away is smooth, so that the corresponding block of the matrix is
+numerically of low rank. The elements with unknowns are grouped in a binary tree
+of clusters by recursive bisection of their control points. The matrix is split
+in blocks by traversing the tree of rows and the tree of columns together,
+starting from the full matrix: the block of two clusters that are well separated
+is approximated with adaptive cross approximation (ACA) and stored as a product of
+two thin matrices; otherwise the larger of the two clusters is split, down to the
+blocks of two smallest clusters, which are stored as dense arrays.
+
+The blocks are computed with a function that returns the rows of a group of
+elements in the columns of another group of elements (`Model.bordercolumns`).
+ACA only computes the rows and columns of a low-rank block that it selects, but
+it fetches them per element: a pivot row is computed as all rows of its element
+in the columns of the block, and a pivot column as the rows of the block in all
+columns of its element. With elements of a few unknowns each, the near-field
+blocks are dense and the compression pays off for large models only. For the
+benchmark model with line-sinks and wells (`benchmarks/benchmark_solve.py`) and a
+tolerance of 1e-10, the stored values are 0.92 of the dense matrix for 701
+unknowns and 0.52 for 2801 unknowns, and the number of evaluated influences
+(including the rejected approximations and the accuracy checks) is 1.05 and 0.82
+times `neq**2`, respectively; the evaluated fraction decreases only slowly with
+the size of the model.
+
+Only the matrix-vector product uses the compressed blocks.
+`Model.solve_iterative` uses the inverses of the dense diagonal blocks of the
+elements as block-Jacobi preconditioner, and when the iterations do not converge
+the dense matrix is assembled from the blocks (`HierarchicalMatrix.toarray`) and
+factorized with the direct solver.
+"""
+
+import numpy as np
+
+__all__ = ["HierarchicalMatrix", "aca"]
+
+
+def pivot(values, group, done):
+    """Index of the largest of `values`, preferring groups that are computed.
+
+    The largest value in the groups with `done[group]` True is chosen when it is
+    at least half the largest value.
+    """
+    k = np.argmax(values)
+    cheap = np.where(done[group], values, -1.0)
+    kcheap = np.argmax(cheap)
+    if cheap[kcheap] >= 0.5 * values[k]:
+        return kcheap
+    return k
+
+
+def aca(row, column, shape, tol, rowgroup=None, colgroup=None, nsample=2, seed=0):
+    """Adaptive cross approximation with partial pivoting of a block.
+
+    Only the rows and columns selected as pivots are computed. When the
+    approximation has converged, its accuracy is checked with `nsample` random
+    rows; the iterations continue with the worst of these rows as the next pivot
+    if the accuracy is not reached.
+
+    Parameters
+    ----------
+    row : function
+        `row(i)` returns row `i` of the block
+    column : function
+        `column(j)` returns column `j` of the block
+    shape : tuple (m, n)
+        shape of the block
+    tol : float
+        relative accuracy in the Frobenius norm
+    rowgroup, colgroup : arrays of integers, optional
+        group of each row and column; when the rows (columns) of a group are
+        computed together, pivots in groups that are computed already are
+        preferred
+    nsample : integer, optional
+        number of random rows used to check the accuracy
+    seed : integer, optional
+        seed of the random rows
+
+    Returns
+    -------
+    u : array size (m, rank)
+    v : array size (rank, n)
+        `u @ v` approximates the block, or None if the approximation does not
+        reach the accuracy `tol` with a rank that saves storage
+    """
+    m, n = shape
+    rowgroup = np.arange(m) if rowgroup is None else np.asarray(rowgroup)
+    colgroup = np.arange(n) if colgroup is None else np.asarray(colgroup)
+    rowdone = np.zeros(rowgroup.max() + 1, dtype="bool")
+    coldone = np.zeros(colgroup.max() + 1, dtype="bool")
+    rng = np.random.default_rng(seed)
+    maxrank = (m * n) // (m + n)
+    u = np.zeros((m, maxrank))
+    v = np.zeros((maxrank, n))
+    unused = np.ones(m, dtype="bool")
+    normsq = 0.0  # square of Frobenius norm of approximation
+    i = 0
+    rank = 0
+    while rank < maxrank:
+        unused[i] = False
+        rowdone[rowgroup[i]] = True
+        r = row(i) - u[i, :rank] @ v[:rank]
+        j = pivot(np.abs(r), colgroup, coldone)
+        converged = r[j] == 0.0
+        if not converged:
+            coldone[colgroup[j]] = True
+            v[rank] = r / r[j]
+            u[:, rank] = column(j) - u[:, :rank] @ v[:rank, j]
+            unorm = np.linalg.norm(u[:, rank])
+            vnorm = np.linalg.norm(v[rank])
+            normsq += (unorm * vnorm) ** 2 + 2 * np.sum(
+                (u[:, :rank].T @ u[:, rank]) * (v[:rank] @ v[rank])
+            )
+            rank += 1
+            converged = unorm * vnorm <= tol * np.sqrt(normsq)
+        if not np.any(unused):  # all rows are reproduced
+            return u[:, :rank], v[:rank]
+        if converged:
+            # partial pivoting may miss part of the block
+            sample = rng.choice(
+                np.flatnonzero(unused), min(nsample, np.sum(unused)), replace=False
+            )
+            errorsq = [np.sum((row(k) - u[k, :rank] @ v[:rank]) ** 2) for k in sample]
+            if np.sum(errorsq) * m / len(sample) <= tol**2 * normsq:
+                return u[:, :rank], v[:rank]
+            i = sample[np.argmax(errorsq)]
+        else:
+            i = pivot(np.where(unused, np.abs(u[:, rank - 1]), -1.0), rowgroup, rowdone)
+    return None
+
+
+def elementpoints(e):
+    """Control points of element `e` as complex array, or None if unknown."""
+    members = getattr(e, "lslist", getattr(e, "ldlist", None))
+    if members is not None:
+        points = [elementpoints(m) for m in members]
+        if any(p is None for p in points):
+            return None
+        return np.hstack(points)
+    if hasattr(e, "xc") and hasattr(e, "yc"):
+        return np.atleast_1d(e.xc) + 1j * np.atleast_1d(e.yc)
+    return None
+
+
+class HierarchicalMatrix:
+    """Matrix of the model stored with low-rank blocks for distant clusters.
+
+    Parameters
+    ----------
+    elements : list
+        elements with unknowns, in the order of the unknowns
+    block : function
+        `block(rowelements, colelements)` returns the matrix rows of the elements
+        in list `rowelements` in the columns of the unknowns of the elements in
+        list `colelements` (e.g. `Model.bordercolumns`)
+    tol : float, optional
+        relative accuracy of the low-rank blocks
+    leafsize : integer, optional
+        maximum number of unknowns in the smallest clusters
+    eta : float, optional
+        the block of two clusters is approximated when the sum of their radii
+        is less than `eta` times the distance between their centers
+    threadmap : function, optional
+        map function used to compute the products (e.g. `Model.threadmap`); the
+        blocks are computed one at a time, as `block` may modify the model
+
+    Attributes
+    ----------
+    diagonal : list of arrays
+        diagonal block of each element
+    compression : float
+        number of stored values divided by the number of values of the dense matrix
+    """
+
+    def __init__(self, elements, block, tol=1e-8, leafsize=64, eta=0.5, threadmap=map):
+        self.elements = elements
+        self.tol = tol
+        self.eta = eta
+        self.threadmap = threadmap
+        self.ieqlist = np.cumsum([0] + [e.nunknowns for e in elements])
+        self.neq = self.ieqlist[-1]
+        # elements without control points are placed at the origin and never
+        # part of an approximated block
+        self.zc = [elementpoints(e) for e in elements]
+        self.unknown = [zc is None for zc in self.zc]
+        self.zc = [np.zeros(1, dtype="complex") if zc is None else zc for zc in self.zc]
+        self.index = []  # unknowns of each cluster
+        self.clusterelements = []  # elements of each cluster
+        self.center = []
+        self.radius = []
+        self.children = []  # children of each cluster, empty for smallest clusters
+        self.leaves = []  # smallest clusters
+        self.bisect(np.arange(len(elements)), leafsize)
+        self.diagonal = [None] * len(elements)
+        self.blocks = []  # tuples (cluster of rows, cluster of columns, block)
+        near = {}  # smallest clusters of columns near each smallest cluster
+        stack = [(0, 0)]
+        while stack:
+            ic, jc = stack.pop()
+            if self.admissible(ic, jc):
+                uv = self.lowrank(ic, jc, block)
+                if uv is not None:
+                    self.blocks.append((ic, jc, uv))
+                    continue
+            if self.children[ic] and (
+                not self.children[jc] or len(self.index[ic]) >= len(self.index[jc])
+            ):
+                stack.extend((kc, jc) for kc in self.children[ic])
+            elif self.children[jc]:
+                stack.extend((ic, kc) for kc in self.children[jc])
+            else:
+                near.setdefault(ic, []).append(jc)
+        for ic, jclist in near.items():
+            self.nearblocks(ic, jclist, block)
+        nstored = sum(
+            b.size if isinstance(b, np.ndarray) else b[0].size + b[1].size
+            for _, _, b in self.blocks
+        )
+        self.compression = nstored / self.neq**2
+
+    def __repr__(self):
+        return (
+            "HierarchicalMatrix with "
+            + str(len(self.leaves))
+            + " clusters, compression "
+            + f"{self.compression:.3f}"
+        )
+
+    def bisect(self, ielements, leafsize):
+        """Add cluster of elements `ielements` and its children; returns number."""
+        icluster = len(self.index)
+        self.index.append(
+            np.hstack(
+                [np.arange(self.ieqlist[i], self.ieqlist[i + 1]) for i in ielements]
+            )
+        )
+        self.clusterelements.append(ielements)
+        zc = np.hstack([self.zc[i] for i in ielements])
+        self.center.append(np.mean(zc))
+        if any(self.unknown[i] for i in ielements):
+            self.radius.append(np.inf)
+        else:
+            self.radius.append(np.max(np.abs(zc - self.center[icluster])))
+        self.children.append(())
+        if len(self.index[icluster]) <= leafsize or len(ielements) == 1:
+            self.leaves.append(icluster)
+            return icluster
+        zc = np.array([np.mean(self.zc[i]) for i in ielements])
+        x, y = zc.real, zc.imag
+        coord = x if np.ptp(x) >= np.ptp(y) else y
+        order = np.argsort(coord, kind="stable")
+        half = len(ielements) // 2
+        self.children[icluster] = (
+            self.bisect(ielements[order[:half]], leafsize),
+            self.bisect(ielements[order[half:]], leafsize),
+        )
+        return icluster
+
+    def admissible(self, ic, jc):
+        """True if the block of clusters `ic` and `jc` is approximated."""
+        distance = abs(self.center[ic] - self.center[jc])
+        return self.radius[ic] + self.radius[jc] < self.eta * distance
+
+    def nearblocks(self, ic, jclist, block):
+        """Compute the dense blocks of smallest cluster `ic` and clusters `jclist`.
+
+        The blocks are computed with one call of `block`.
+        """
+        rowelements = [self.elements[ie] for ie in self.clusterelements[ic]]
+        colelements = [
+            self.elements[je] for jc in jclist for je in self.clusterelements[jc]
+        ]
+        rows = block(rowelements, colelements)
+        jcol = 0
+        for jc in jclist:
+            ncol = len(self.index[jc])
+            self.blocks.append((ic, jc, rows[:, jcol : jcol + ncol]))
+            if jc == ic:
+                irow = 0
+                for ie in self.clusterelements[ic]:
+                    n = self.elements[ie].nunknowns
+                    diagonal = rows[irow : irow + n, jcol + irow : jcol + irow + n]
+                    self.diagonal[ie] = diagonal.copy()
+                    irow += n
+            jcol += ncol
+
+    def lowrank(self, ic, jc, block):
+        """Low-rank approximation of the block of clusters `ic` and `jc` or None.
+
+        The rows and columns selected by `aca` are computed by element: all rows
+        of an element of `ic` in the columns of `jc`, or all columns of an element
+        of `jc` in the rows of `ic`.
+        """
+        rowelements = [self.elements[ie] for ie in self.clusterelements[ic]]
+        colelements = [self.elements[je] for je in self.clusterelements[jc]]
+        rowstart = np.cumsum([0] + [e.nunknowns for e in rowelements])
+        colstart = np.cumsum([0] + [e.nunknowns for e in colelements])
+        rows = {}  # rows of element k of ic
+        columns = {}  # columns of element k of jc
+
+        def row(i):
+            k = np.searchsorted(rowstart, i, side="right") - 1
+            if k not in rows:
+                rows[k] = block([rowelements[k]], colelements)
+            return rows[k][i - rowstart[k]]
+
+        def column(j):
+            k = np.searchsorted(colstart, j, side="right") - 1
+            if k not in columns:
+                columns[k] = block(rowelements, [colelements[k]])
+            return columns[k][:, j - colstart[k]]
+
+        rowgroup = np.repeat(np.arange(len(rowelements)), np.diff(rowstart))
+        colgroup = np.repeat(np.arange(len(colelements)), np.diff(colstart))
+        shape = (rowstart[-1], colstart[-1])
+        return aca(row, column, shape, self.tol, rowgroup, colgroup)
+
+    def matvec(self, x):
+        """Product of the matrix and vector `x`."""
+        x = np.ravel(x)
+
+        def product(b):
+            _, jc, b = b
+            if isinstance(b, np.ndarray):
+                return b @ x[self.index[jc]]
+            return b[0] @ (b[1] @ x[self.index[jc]])
+
+        rv = np.zeros(self.neq)
+        for (ic, _, _), y in zip(
+            self.blocks, self.threadmap(product, self.blocks), strict=True
+        ):
+            rv[self.index[ic]] += y
+        return rv
+
+    def toarray(self):
+        """Dense matrix."""
+        rv = np.empty((self.neq, self.neq))
+        for ic, jc, b in self.blocks:
+            if not isinstance(b, np.ndarray):
+                b = b[0] @ b[1]
+            rv[np.ix_(self.index[ic], self.index[jc])] = b
+        return rv
@@ -29,6 +29,9 @@ class StripInhom(AquiferData):
     def isinside(self, x, y):
         return (x >= self.x1) and (x < self.x2)
 
+    def isinside_array(self, x, y):
+        return (x >= self.x1) & (x < self.x2)
+
     def create_elements(self):
         # HeadDiff on right side, FluxDiff on left side
         if self.x1 == -np.inf:
@@ -69,9 +72,9 @@ class StripInhom(AquiferData):
                     self.model, self.x1, label=None, aq=aqin, aqin=aqin, aqout=aqleft
                 )
             if self.N is not None:
-                assert (
-                    aqin.ilap
-                ), "Error: infiltration can only be added if topboundary='conf'"
+                assert aqin.ilap, (
+                    "Error: infiltration can only be added if topboundary='conf'"
+                )
                 StripAreaSinkInhom(self.model, self.x1, self.x2, self.N, layer=0)
         if aqin.ltype[0] == "l":
             assert self.hstar is not None, "Error: hstar needs to be set"
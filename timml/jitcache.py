@@ -0,0 +1,189 @@
+"""Compilation of the numba kernels of timml into the numba cache.
+
+The numba kernels (the Bessel functions of the line elements, the treecode and the
+compiled evaluator) are compiled when they are first called with a new signature,
+and cached on disk by numba: next to the sources, in a user-wide directory when
+the sources are read-only, or in ``NUMBA_CACHE_DIR`` when it is set. `warmup`
+solves and evaluates small models that call all kernels with the signatures used
+by timml, so that later processes load the compiled kernels from the cache instead
+of compiling them. Run it once after timml is installed, for example when a
+container image is built, with a cache directory that the jobs can read::
+
+    python -m timml.jitcache --cachedir /opt/timml/numba
+
+and set ``NUMBA_CACHE_DIR=/opt/timml/numba`` in the environment of the jobs. The
+cache is valid for the installed sources of timml (numba compares the time stamps
+of the source files), the installed version of numba and the type of CPU.
+"""
+
+import argparse
+import os
+from importlib import import_module
+from time import perf_counter
+
+import numba
+import numpy as np
+from numba.core.dispatcher import Dispatcher
+
+__all__ = ["warmup"]
+
+# modules with numba kernels
+KERNELMODULES = (
+    "timml.besselaesnumba.besselaesnumba",
+    "timml.evaluator",
+    "timml.treecode",
+)
+
+
+def dispatchers():
+    """Numba functions of timml by name ('module.function')."""
+    rv = {}
+    for modulename in KERNELMODULES:
+        module = import_module(modulename)
+        shortname = modulename.rsplit(".", 1)[-1]
+        for name, func in vars(module).items():
+            if isinstance(func, Dispatcher) and func.py_func.__module__ == modulename:
+                rv[f"{shortname}.{name}"] = func
+    return rv
+
+
+def setcachedir(cachedir):
+    """Cache the numba kernels of timml in directory `cachedir`.
+
+    Also sets ``NUMBA_CACHE_DIR``, so that processes started by this process (see
+    `Model.solve_mp`) use the same cache. Kernels that were already compiled in
+    this process are not written to `cachedir`.
+    """
+    cachedir = os.path.abspath(os.fspath(cachedir))
+    os.makedirs(cachedir, exist_ok=True)
+    os.environ["NUMBA_CACHE_DIR"] = cachedir
+    numba.config.CACHE_DIR = cachedir
+    for func in dispatchers().values():
+        func.enable_caching()
+
+
+def warmupmodels():
+    """Small models with all element types that call numba kernels."""
+    from .constant import Constant
+    from .inhomogeneity import PolygonInhomMaq
+    from .linedoublet import ImpLineDoublet, LeakyLineDoubletString
+    from .linesink import HeadLineSink, HeadLineSinkString
+    from .model import ModelMaq
+    from .uflow import Uflow
+    from .well import HeadWell, Well
+
+    ml = ModelMaq(kaq=[10, 20], z=[20, 12, 10, 0], c=[100], npor=0.3)
+    Uflow(ml, slope=0.002, angle=30)
+    Well(ml, 50, 20, Qw=200, rw=0.2, layers=[0, 1])
+    HeadWell(ml, 20, -60, hw=5, layers=0)
+    HeadLineSinkString(
+        ml, xy=[(0, 100), (40, 120), (90, 110)], hls=[4, 3], layers=0, order=1
+    )
+    ImpLineDoublet(ml, x1=100, y1=-50, x2=120, y2=0, layers=[0, 1], order=2)
+    LeakyLineDoubletString(
+        ml, xy=[(-60, 0), (-50, 40), (-40, 80)], res=10, layers=[0, 1], order=1
+    )
+    Constant(ml, xr=500, yr=500, hr=10, layer=0)
+    yield ml
+    ml = ModelMaq(
+        kaq=[10, 5], z=[21, 20, 10, 8, 0], c=[100, 300], topboundary="semi", hstar=15
+    )
+    PolygonInhomMaq(
+        ml,
+        xy=[(-50, -50), (50, -50), (60, 50), (-40, 60)],
+        kaq=[4, 2],
+        z=[21, 20, 10, 8, 0],
+        c=[200, 100],
+        topboundary="semi",
+        hstar=13,
+        order=2,
+        ndeg=2,
+    )
+    Well(ml, 0, 0, Qw=100, layers=0)
+    HeadLineSink(ml, -100, -80, 100, -90, hls=12, layers=0, order=2)
+    yield ml
+
+
+def evaluate(ml):
+    """Evaluate model `ml` with the methods that call numba kernels."""
+    from .besselaesnumba.besselaesnumba import PARALLELSIZE
+
+    # serial and parallel array kernels and the pointwise kernels
+    small = (np.linspace(-110, 110, 3), np.linspace(-100, 120, 3))
+    large = (np.linspace(-110, 110, 11), np.linspace(-100, 120, PARALLELSIZE // 10))
+    for xg, yg in [small, large]:
+        ml.headgrid(xg, yg)
+        ml.disvec(xg[np.newaxis, :], yg[:, np.newaxis])
+    ml.head(25.0, 35.0)
+    ml.disvec(25.0, 35.0)
+    ml.velocity(25.0, 35.0, 5.0)
+    with ml.tabulate():
+        for xg, yg in [small, large]:
+            ml.headgrid(xg, yg)
+        ml.head(25.0, 35.0)
+        ml.disvec(25.0, 35.0)
+    with ml.treecode():
+        for xg, yg in [small, large]:
+            ml.headgrid(xg, yg)
+        ml.disvec(25.0, 35.0)
+    ev = ml.evaluator()
+    ev.headgrid(*large)
+    ev.disvec(large[0], np.full_like(large[0], 35.0))
+
+
+def warmup(cachedir=None):
+    """Compile the numba kernels of timml and store them in the numba cache.
+
+    Later processes load the kernels from the cache, so that the first solve of a
+    model does not have to wait for the compilation (see `timml.jitcache`).
+
+    Parameters
+    ----------
+    cachedir : str or path, optional
+        directory of the cache; by default the cache of numba is used (next to the
+        sources or in ``NUMBA_CACHE_DIR``). Later processes must set
+        ``NUMBA_CACHE_DIR`` to `cachedir` to use the cache. Kernels that were
+        already compiled in this process are not written to `cachedir`, so call
+        `warmup` before anything else.
+
+    Returns
+    -------
+    dict
+        number of signatures that were compiled or loaded from the cache by name of
+        the kernel ('module.function'); kernels that are only called by other
+        kernels are part of the cached callers and have none when loaded
+    """
+    if cachedir is not None:
+        setcachedir(cachedir)
+    for ml in warmupmodels():
+        ml.solve(silent=True)
+        evaluate(ml)
+    return {name: len(func.signatures) for name, func in dispatchers().items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m timml.jitcache",
+        description="Compile the numba kernels of timml into the numba cache.",
+    )
+    parser.add_argument(
+        "--cachedir",
+        default=None,
+        help="directory of the cache (default: the cache of numba)",
+    )
+    args = parser.parse_args(argv)
+    t0 = perf_counter()
+    compiled = warmup(args.cachedir)
+    nsig = sum(compiled.values())
+    nfunc = sum(n > 0 for n in compiled.values())
+    print(
+        f"compiled or loaded {nsig} signatures of {nfunc} kernels "
+        f"in {perf_counter() - t0:.1f} s"
+    )
+    cachedir = numba.config.CACHE_DIR
+    if cachedir:
+        print(f"set NUMBA_CACHE_DIR={cachedir} to use the cache")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,12 @@
 import inspect  # Used for storing the input
 
-import matplotlib.pyplot as plt
 import numpy as np
 
 from . import bessel
 from .controlpoints import controlpoints
-from .element import Element
+from .element import Element, LineFarField
 from .equation import DisvecEquation, LeakyWallEquation
+from .util import pyplot
 
 __all__ = [
     "ImpLineDoublet",
@@ -16,7 +16,9 @@ __all__ = [
 ]
 
 
-class LineDoubletHoBase(Element):
+class LineDoubletHoBase(LineFarField, Element):
+    lstype = 2
+
     def __init__(
         self,
         model,
@@ -86,6 +88,9 @@ class LineDoubletHoBase(Element):
             )
         if self.aq is None:
             self.aq = self.model.aq.find_aquifer_data(self.xc[0], self.yc[0])
+        # plan of the Bessel functions, which only depends on z1, z2 and the aquifer
+        self.plan = bessel.bessel.lineplan(self.z1, self.z2, self.aq.lab)
+        self.initialize_farfield()
         self.resfac = self.aq.Haq[self.layers] / self.res
         if self.addtomodel:
             self.aq.add_element(self)
@@ -124,10 +129,43 @@ class LineDoubletHoBase(Element):
                 self.order,
                 aq.ilap,
                 aq.naq,
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+                table=self.table,
             )
             potrv[:] = self.aq.coef[self.layers] * pot[:, np.newaxis, :]
         return rv
 
+    def potinfarray(self, x, y, aq):
+        """Array version of `potinf`.
+
+        Returns
+        -------
+        array
+            (nparam, self.aq.naq, npoints) with the same order as `potinf`
+        """
+        rv = np.zeros((self.nparam, aq.naq, len(x)))
+        if aq == self.aq:
+            potrv = rv.reshape((self.order + 1, self.nlayers, aq.naq, len(x)))
+            pot = bessel.bessel.potbesldvarray(
+                x,
+                y,
+                self.z1,
+                self.z2,
+                aq.lab,
+                self.order,
+                aq.ilap,
+                aq.naq,
+                self.nearfield(x, y),  # only Laplace part in far field
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+                table=self.table,
+            )
+            potrv[:] = (
+                self.aq.coef[self.layers, :, np.newaxis] * pot[:, np.newaxis, :, :]
+            )
+        return rv
+
     def disvecinf(self, x, y, aq=None):
         """Can be called with only one x,y value.
 
@@ -159,6 +197,9 @@ class LineDoubletHoBase(Element):
                 self.order,
                 aq.ilap,
                 aq.naq,
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+                table=self.table,
             )
             qxqyrv[0, :] = (
                 self.aq.coef[self.layers] * qxqy[: self.order + 1, np.newaxis, :]
@@ -168,9 +209,67 @@ class LineDoubletHoBase(Element):
             )
         return rv
 
+    def potdisvecinf(self, x, y, aq=None):
+        """Returns `potinf` and `disvecinf`, computed together."""
+        if aq is None:
+            aq = self.model.aq.find_aquifer_data(x, y)
+        pot = np.zeros((self.nparam, aq.naq))
+        qxqy = np.zeros((2, self.nparam, aq.naq))
+        if aq == self.aq:
+            potrv = pot.reshape((self.order + 1, self.nlayers, aq.naq))
+            qxqyrv = qxqy.reshape((2, self.order + 1, self.nlayers, aq.naq))
+            rv = bessel.bessel.potdisbesldv(
+                float(x),
+                float(y),
+                self.z1,
+                self.z2,
+                aq.lab,
+                self.order,
+                aq.ilap,
+                aq.naq,
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+                table=self.table,
+            )
+            rv = rv.reshape((3, self.order + 1, 1, aq.naq))
+            potrv[:] = self.aq.coef[self.layers] * rv[0]
+            qxqyrv[0, :] = self.aq.coef[self.layers] * rv[1]
+            qxqyrv[1, :] = self.aq.coef[self.layers] * rv[2]
+        return pot, qxqy
+
+    def disvecinfarray(self, x, y, aq):
+        """Array version of `disvecinf`.
+
+        Returns
+        -------
+        array
+            (2, nparam, self.aq.naq, npoints) with the same order as `disvecinf`
+        """
+        rv = np.zeros((2, self.nparam, aq.naq, len(x)))
+        if aq == self.aq:
+            qxqyrv = rv.reshape((2, self.order + 1, self.nlayers, aq.naq, len(x)))
+            qxqy = bessel.bessel.disbesldvarray(
+                x,
+                y,
+                self.z1,
+                self.z2,
+                aq.lab,
+                self.order,
+                aq.ilap,
+                aq.naq,
+                self.nearfield(x, y),  # only Laplace part in far field
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+                table=self.table,
+            )
+            coef = self.aq.coef[self.layers, :, np.newaxis]
+            qxqyrv[0, :] = coef * qxqy[: self.order + 1, np.newaxis]
+            qxqyrv[1, :] = coef * qxqy[self.order + 1 :, np.newaxis]
+        return rv
+
     def plot(self, layer=None):
         if (layer is None) or (layer in self.layers):
-            plt.plot([self.x1, self.x2], [self.y1, self.y2], "k")
+            pyplot().plot([self.x1, self.x2], [self.y1, self.y2], "k")
 
 
 class ImpLineDoublet(LineDoubletHoBase, DisvecEquation):
@@ -400,6 +499,13 @@ class LineDoubletStringBase(Element):
         rv.shape = (self.nparam, aq.naq)
         return rv
 
+    def potinfarray(self, x, y, aq):
+        rv = np.zeros((self.Nld, self.ldlist[0].nparam, aq.naq, len(x)))
+        for i in range(self.Nld):
+            rv[i] = self.ldlist[i].potinfarray(x, y, aq)
+        rv.shape = (self.nparam, aq.naq, len(x))
+        return rv
+
     def disvecinf(self, x, y, aq=None):
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
@@ -409,9 +515,27 @@ class LineDoubletStringBase(Element):
         rv.shape = (2, self.nparam, aq.naq)
         return rv
 
+    def potdisvecinf(self, x, y, aq=None):
+        if aq is None:
+            aq = self.model.aq.find_aquifer_data(x, y)
+        pot = np.zeros((self.Nld, self.ldlist[0].nparam, aq.naq))
+        qxqy = np.zeros((2, self.Nld, self.ldlist[0].nparam, aq.naq))
+        for i in range(self.Nld):
+            pot[i], qxqy[:, i] = self.ldlist[i].potdisvecinf(x, y, aq)
+        pot.shape = (self.nparam, aq.naq)
+        qxqy.shape = (2, self.nparam, aq.naq)
+        return pot, qxqy
+
+    def disvecinfarray(self, x, y, aq):
+        rv = np.zeros((2, self.Nld, self.ldlist[0].nparam, aq.naq, len(x)))
+        for i in range(self.Nld):
+            rv[:, i] = self.ldlist[i].disvecinfarray(x, y, aq)
+        rv.shape = (2, self.nparam, aq.naq, len(x))
+        return rv
+
     def plot(self, layer=None):
         if (layer is None) or (layer in self.layers):
-            plt.plot(self.x, self.y, "k")
+            pyplot().plot(self.x, self.y, "k")
 
 
 class ImpLineDoubletString(LineDoubletStringBase, DisvecEquation):
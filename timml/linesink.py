@@ -1,12 +1,12 @@
 import inspect  # Used for storing the input
 
-import matplotlib.pyplot as plt
 import numpy as np
 
 from . import bessel
 from .controlpoints import controlpoints, strengthinf_controlpoints
-from .element import Element
-from .equation import HeadEquation
+from .element import Element, LineFarField
+from .equation import HeadEquation, matrows
+from .util import pyplot
 
 __all__ = [
     "LineSinkBase",
@@ -158,7 +158,7 @@ class LineSinkChangeTrace:
         return changed, terminate, xyztnew, message
 
 
-class LineSinkBase(LineSinkChangeTrace, Element):
+class LineSinkBase(LineSinkChangeTrace, LineFarField, Element):
     def __init__(
         self,
         model,
@@ -210,6 +210,8 @@ class LineSinkBase(LineSinkChangeTrace, Element):
         )
         self.order = 0  # This is for uniform strength only
         self.aq = self.model.aq.find_aquifer_data(self.xc, self.yc)
+        self.plan = bessel.bessel.lineplan(self.z1, self.z2, self.aq.lab)
+        self.initialize_farfield()
         if self.addtomodel:
             self.aq.add_element(self)
         self.parameters = np.empty((self.nparam, 1))
@@ -230,11 +232,40 @@ class LineSinkBase(LineSinkChangeTrace, Element):
         if aq == self.aq:
             pot = np.zeros(aq.naq)
             pot[:] = bessel.bessel.potbeslsho(
-                float(x), float(y), self.z1, self.z2, aq.lab, 0, aq.ilap, aq.naq
+                float(x),
+                float(y),
+                self.z1,
+                self.z2,
+                aq.lab,
+                0,
+                aq.ilap,
+                aq.naq,
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
             )
             rv[:] = self.aq.coef[self.layers] * pot
         return rv
 
+    def potinfarray(self, x, y, aq):
+        rv = np.zeros((self.nparam, aq.naq, len(x)))
+        if aq == self.aq:
+            # only Laplace part in far field
+            pot = bessel.bessel.potbeslsvarray(
+                x,
+                y,
+                self.z1,
+                self.z2,
+                aq.lab,
+                0,
+                aq.ilap,
+                aq.naq,
+                self.nearfield(x, y),
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+            )[0]
+            rv[:] = self.aq.coef[self.layers, :, np.newaxis] * pot
+        return rv
+
     def disvecinf(self, x, y, aq=None):
         """Can be called with only one x,y value."""
         if aq is None:
@@ -243,12 +274,66 @@ class LineSinkBase(LineSinkChangeTrace, Element):
         if aq == self.aq:
             qxqy = np.zeros((2, aq.naq))
             qxqy[:, :] = bessel.bessel.disbeslsho(
-                float(x), float(y), self.z1, self.z2, aq.lab, 0, aq.ilap, aq.naq
+                float(x),
+                float(y),
+                self.z1,
+                self.z2,
+                aq.lab,
+                0,
+                aq.ilap,
+                aq.naq,
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
             )
             rv[0] = self.aq.coef[self.layers] * qxqy[0]
             rv[1] = self.aq.coef[self.layers] * qxqy[1]
         return rv
 
+    def potdisvecinf(self, x, y, aq=None):
+        """Returns `potinf` and `disvecinf`, computed together."""
+        if aq is None:
+            aq = self.model.aq.find_aquifer_data(x, y)
+        pot = np.zeros((self.nparam, aq.naq))
+        qxqy = np.zeros((2, self.nparam, aq.naq))
+        if aq == self.aq:
+            rv = bessel.bessel.potdisbeslsho(
+                float(x),
+                float(y),
+                self.z1,
+                self.z2,
+                aq.lab,
+                0,
+                aq.ilap,
+                aq.naq,
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+            )
+            pot[:] = self.aq.coef[self.layers] * rv[0]
+            qxqy[0] = self.aq.coef[self.layers] * rv[1]
+            qxqy[1] = self.aq.coef[self.layers] * rv[2]
+        return pot, qxqy
+
+    def disvecinfarray(self, x, y, aq):
+        rv = np.zeros((2, self.nparam, aq.naq, len(x)))
+        if aq == self.aq:
+            # only Laplace part in far field
+            qxqy = bessel.bessel.disbeslsvarray(
+                x,
+                y,
+                self.z1,
+                self.z2,
+                aq.lab,
+                0,
+                aq.ilap,
+                aq.naq,
+                self.nearfield(x, y),
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+            )
+            rv[0] = self.aq.coef[self.layers, :, np.newaxis] * qxqy[0]
+            rv[1] = self.aq.coef[self.layers, :, np.newaxis] * qxqy[1]
+        return rv
+
     def discharge(self):
         # returns the discharge in each layer
         Q = np.zeros(self.aq.naq)
@@ -257,7 +342,7 @@ class LineSinkBase(LineSinkChangeTrace, Element):
 
     def plot(self, layer=None):
         if (layer is None) or (layer in self.layers):
-            plt.plot([self.x1, self.x2], [self.y1, self.y2], "k")
+            pyplot().plot([self.x1, self.x2], [self.y1, self.y2], "k")
 
 
 class HeadLineSinkZero(LineSinkBase, HeadEquation):
@@ -302,7 +387,9 @@ class HeadLineSinkZero(LineSinkBase, HeadEquation):
         self.parameters[:, 0] = sol
 
 
-class LineSinkHoBase(LineSinkChangeTrace, Element):
+class LineSinkHoBase(LineSinkChangeTrace, LineFarField, Element):
+    lstype = 1
+
     def __init__(
         self,
         model,
@@ -373,6 +460,9 @@ class LineSinkHoBase(LineSinkChangeTrace, Element):
             )
         if self.aq is None:
             self.aq = self.model.aq.find_aquifer_data(self.xc[0], self.yc[0])
+        # plan of the Bessel functions, which only depends on z1, z2 and the aquifer
+        self.plan = bessel.bessel.lineplan(self.z1, self.z2, self.aq.lab)
+        self.initialize_farfield()
         if self.addtomodel:
             self.aq.add_element(self)
         self.parameters = np.empty((self.nparam, 1))
@@ -409,10 +499,43 @@ class LineSinkHoBase(LineSinkChangeTrace, Element):
                 self.order,
                 aq.ilap,
                 aq.naq,
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+                table=self.table,
             )
             potrv[:] = self.aq.coef[self.layers] * pot[:, np.newaxis, :]
         return rv
 
+    def potinfarray(self, x, y, aq):
+        """Array version of `potinf`.
+
+        Returns
+        -------
+        array
+            (nparam, self.aq.naq, npoints) with the same order as `potinf`
+        """
+        rv = np.zeros((self.nparam, aq.naq, len(x)))
+        if aq == self.aq:
+            potrv = rv.reshape((self.order + 1, self.nlayers, aq.naq, len(x)))
+            pot = bessel.bessel.potbeslsvarray(
+                x,
+                y,
+                self.z1,
+                self.z2,
+                aq.lab,
+                self.order,
+                aq.ilap,
+                aq.naq,
+                self.nearfield(x, y),  # only Laplace part in far field
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+                table=self.table,
+            )
+            potrv[:] = (
+                self.aq.coef[self.layers, :, np.newaxis] * pot[:, np.newaxis, :, :]
+            )
+        return rv
+
     def disvecinf(self, x, y, aq=None):
         """Can be called with only one x,y value.
 
@@ -442,6 +565,9 @@ class LineSinkHoBase(LineSinkChangeTrace, Element):
                 self.order,
                 aq.ilap,
                 aq.naq,
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+                table=self.table,
             )
             qxqyrv[0, :] = (
                 self.aq.coef[self.layers] * qxqy[: self.order + 1, np.newaxis, :]
@@ -451,9 +577,67 @@ class LineSinkHoBase(LineSinkChangeTrace, Element):
             )
         return rv
 
+    def potdisvecinf(self, x, y, aq=None):
+        """Returns `potinf` and `disvecinf`, computed together."""
+        if aq is None:
+            aq = self.model.aq.find_aquifer_data(x, y)
+        pot = np.zeros((self.nparam, aq.naq))
+        qxqy = np.zeros((2, self.nparam, aq.naq))
+        if aq == self.aq:
+            potrv = pot.reshape((self.order + 1, self.nlayers, aq.naq))
+            qxqyrv = qxqy.reshape((2, self.order + 1, self.nlayers, aq.naq))
+            rv = bessel.bessel.potdisbeslsv(
+                float(x),
+                float(y),
+                self.z1,
+                self.z2,
+                aq.lab,
+                self.order,
+                aq.ilap,
+                aq.naq,
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+                table=self.table,
+            )
+            rv = rv.reshape((3, self.order + 1, 1, aq.naq))
+            potrv[:] = self.aq.coef[self.layers] * rv[0]
+            qxqyrv[0, :] = self.aq.coef[self.layers] * rv[1]
+            qxqyrv[1, :] = self.aq.coef[self.layers] * rv[2]
+        return pot, qxqy
+
+    def disvecinfarray(self, x, y, aq):
+        """Array version of `disvecinf`.
+
+        Returns
+        -------
+        array
+            (2, nparam, self.aq.naq, npoints) with the same order as `disvecinf`
+        """
+        rv = np.zeros((2, self.nparam, aq.naq, len(x)))
+        if aq == self.aq:
+            qxqyrv = rv.reshape((2, self.order + 1, self.nlayers, aq.naq, len(x)))
+            qxqy = bessel.bessel.disbeslsvarray(
+                x,
+                y,
+                self.z1,
+                self.z2,
+                aq.lab,
+                self.order,
+                aq.ilap,
+                aq.naq,
+                self.nearfield(x, y),  # only Laplace part in far field
+                plan=self.plan,
+                accuracy=self.model.besselaccuracy,
+                table=self.table,
+            )
+            coef = self.aq.coef[self.layers, :, np.newaxis]
+            qxqyrv[0, :] = coef * qxqy[: self.order + 1, np.newaxis]
+            qxqyrv[1, :] = coef * qxqy[self.order + 1 :, np.newaxis]
+        return rv
+
     def plot(self, layer=None):
         if (layer is None) or (layer in self.layers):
-            plt.plot([self.x1, self.x2], [self.y1, self.y2], "k")
+            pyplot().plot([self.x1, self.x2], [self.y1, self.y2], "k")
 
     def dischargeinf(self):
         # returns the unit contribution to the discharge in each layer
@@ -660,21 +844,19 @@ class LineSinkDitch(HeadLineSink):
     def initialize(self):
         HeadLineSink.initialize(self)
 
-    def equation(self):
-        mat, rhs = HeadLineSink.equation(self)
+    def equation(self, rhsonly=False, mat=None):
+        mat, rhs = HeadLineSink.equation(self, rhsonly, mat)
         for i in range(1, self.nunknowns):
-            mat[i] -= mat[0]
             rhs[i] -= rhs[0]
         # first equation is sum of discharges equals Qls
-        mat[0] = 0
-        ieq = 0
-        for e in self.model.elementlist:
-            if e.nunknowns > 0:
-                if e == self:
-                    mat[0, ieq : ieq + e.nunknowns] = self.dischargeinf()
-                    break
-                ieq += e.nunknowns
         rhs[0] = self.Qls
+        if rhsonly:
+            return mat, rhs
+        for i in range(1, self.nunknowns):
+            mat[i] -= mat[0]
+        mat[0] = 0
+        if self.jcol is not None:  # None if mat has no columns of self
+            mat[0, self.jcol : self.jcol + self.nunknowns] = self.dischargeinf()
         return mat, rhs
 
     def setparams(self, sol):
@@ -790,6 +972,13 @@ class LineSinkStringBase(Element):
         rv.shape = (self.nparam, aq.naq)
         return rv
 
+    def potinfarray(self, x, y, aq):
+        rv = np.zeros((self.nls, self.lslist[0].nparam, aq.naq, len(x)))
+        for i in range(self.nls):
+            rv[i] = self.lslist[i].potinfarray(x, y, aq)
+        rv.shape = (self.nparam, aq.naq, len(x))
+        return rv
+
     def disvecinf(self, x, y, aq=None):
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
@@ -799,6 +988,13 @@ class LineSinkStringBase(Element):
         rv.shape = (2, self.nparam, aq.naq)
         return rv
 
+    def disvecinfarray(self, x, y, aq):
+        rv = np.zeros((2, self.nls, self.lslist[0].nparam, aq.naq, len(x)))
+        for i in range(self.nls):
+            rv[:, i] = self.lslist[i].disvecinfarray(x, y, aq)
+        rv.shape = (2, self.nparam, aq.naq, len(x))
+        return rv
+
     def changetrace(
         self, xyzt1, xyzt2, aq, layer, ltype, modellayer, direction, hstepmax
     ):
@@ -816,7 +1012,7 @@ class LineSinkStringBase(Element):
 
     def plot(self, layer=None):
         if (layer is None) or (layer in self.layers):
-            plt.plot(self.x, self.y, "k")
+            pyplot().plot(self.x, self.y, "k")
 
 
 class HeadLineSinkStringOLd(LineSinkStringBase, HeadEquation):
@@ -947,6 +1143,14 @@ class LineSinkStringBase2(Element):
         rv.shape = (self.nparam, aq.naq)
         return rv
 
+    def potinfarray(self, x, y, aq):
+        rv = np.zeros((self.nls, self.lslist[0].nparam, aq.naq, len(x)))
+        if aq in self.aq:
+            for i, ls in enumerate(self.lslist):
+                rv[i] = ls.potinfarray(x, y, aq)
+        rv.shape = (self.nparam, aq.naq, len(x))
+        return rv
+
     def disvecinf(self, x, y, aq=None):
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
@@ -957,6 +1161,26 @@ class LineSinkStringBase2(Element):
         rv.shape = (2, self.nparam, aq.naq)
         return rv
 
+    def potdisvecinf(self, x, y, aq=None):
+        if aq is None:
+            aq = self.model.aq.find_aquifer_data(x, y)
+        pot = np.zeros((self.nls, self.lslist[0].nparam, aq.naq))
+        qxqy = np.zeros((2, self.nls, self.lslist[0].nparam, aq.naq))
+        if aq in self.aq:
+            for i, ls in enumerate(self.lslist):
+                pot[i], qxqy[:, i] = ls.potdisvecinf(x, y, aq)
+        pot.shape = (self.nparam, aq.naq)
+        qxqy.shape = (2, self.nparam, aq.naq)
+        return pot, qxqy
+
+    def disvecinfarray(self, x, y, aq):
+        rv = np.zeros((2, self.nls, self.lslist[0].nparam, aq.naq, len(x)))
+        if aq in self.aq:
+            for i, ls in enumerate(self.lslist):
+                rv[:, i] = ls.disvecinfarray(x, y, aq)
+        rv.shape = (2, self.nparam, aq.naq, len(x))
+        return rv
+
     def dischargeinf(self):
         rv = np.zeros((self.nls, self.lslist[0].nparam))
         for i, ls in enumerate(self.lslist):
@@ -1008,7 +1232,7 @@ class LineSinkStringBase2(Element):
 
     def plot(self, layer=None):
         if (layer is None) or (layer in self.layers):
-            plt.plot(self.x, self.y, "k")
+            pyplot().plot(self.x, self.y, "k")
 
 
 class HeadLineSinkString(LineSinkStringBase2):
@@ -1134,26 +1358,23 @@ class HeadLineSinkString(LineSinkStringBase2):
             ls.parameters[:, 0] = sol[i : i + ls.nparam]
             i += ls.nparam
 
-    def equation(self):
-        mat = np.empty((self.nunknowns, self.model.neq))
+    def equation(self, rhsonly=False, mat=None):
+        mat = matrows(self, rhsonly, mat)
         rhs = np.empty(self.nunknowns)
         ieq = 0
         for ls in self.lslist:
-            matls, rhsls = ls.equation()
-            neq = len(rhsls)
-            mat[ieq : ieq + neq] = matls
-            rhs[ieq : ieq + neq] = rhsls
+            # rows of the line-sinks are written into the rows of the string
+            neq = ls.nunknowns
+            matls = None if rhsonly else mat[ieq : ieq + neq]
+            rhs[ieq : ieq + neq] = ls.equation(rhsonly, matls)[1]
             ieq += neq
+        if rhsonly or self.jcol is None:  # None if mat has no columns of self
+            return mat, rhs
         # fix to include resistance
         # this is not pretty but works
         # not sure how to change the design to make this nicer
         # I guess the additional matrix can be pre-computed and stored
-        jcol = 0
-        for e in self.model.elementlist:
-            if e == self:
-                break
-            elif e.nunknowns > 0:
-                jcol += e.nunknowns
+        jcol = self.jcol
         irow = 0
         for ls in self.lslist:
             for icp in range(ls.ncp):
@@ -1231,21 +1452,19 @@ class LineSinkDitchString(HeadLineSinkString):
     def initialize(self):
         HeadLineSinkString.initialize(self)
 
-    def equation(self):
-        mat, rhs = HeadLineSinkString.equation(self)
+    def equation(self, rhsonly=False, mat=None):
+        mat, rhs = HeadLineSinkString.equation(self, rhsonly, mat)
         for i in range(1, self.nunknowns):
-            mat[i] -= mat[0]
             rhs[i] -= rhs[0]
         # first equation is sum of discharges equals Qls
-        mat[0] = 0
-        ieq = 0
-        for e in self.model.elementlist:
-            if e.nunknowns > 0:
-                if e == self:
-                    mat[0, ieq : ieq + self.nunknowns] = self.dischargeinf()
-                    break
-                ieq += e.nunknowns
         rhs[0] = self.Qls
+        if rhsonly:
+            return mat, rhs
+        for i in range(1, self.nunknowns):
+            mat[i] -= mat[0]
+        mat[0] = 0
+        if self.jcol is not None:  # None if mat has no columns of self
+            mat[0, self.jcol : self.jcol + self.nunknowns] = self.dischargeinf()
         return mat, rhs
 
     def setparams(self, sol):
@@ -1335,6 +1554,14 @@ class LineSinkContainer(Element):
         rv.shape = (self.nparam, aq.naq)
         return rv
 
+    def potinfarray(self, x, y, aq):
+        rv = np.zeros((self.nls, self.lslist[0].nparam, aq.naq, len(x)))
+        if aq in self.aq:
+            for i, ls in enumerate(self.lslist):
+                rv[i] = ls.potinfarray(x, y, aq)
+        rv.shape = (self.nparam, aq.naq, len(x))
+        return rv
+
     def disvecinf(self, x, y, aq=None):
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
@@ -1345,6 +1572,26 @@ class LineSinkContainer(Element):
         rv.shape = (2, self.nparam, aq.naq)
         return rv
 
+    def potdisvecinf(self, x, y, aq=None):
+        if aq is None:
+            aq = self.model.aq.find_aquifer_data(x, y)
+        pot = np.zeros((self.nls, self.lslist[0].nparam, aq.naq))
+        qxqy = np.zeros((2, self.nls, self.lslist[0].nparam, aq.naq))
+        if aq in self.aq:
+            for i, ls in enumerate(self.lslist):
+                pot[i], qxqy[:, i] = ls.potdisvecinf(x, y, aq)
+        pot.shape = (self.nparam, aq.naq)
+        qxqy.shape = (2, self.nparam, aq.naq)
+        return pot, qxqy
+
+    def disvecinfarray(self, x, y, aq):
+        rv = np.zeros((2, self.nls, self.lslist[0].nparam, aq.naq, len(x)))
+        if aq in self.aq:
+            for i, ls in enumerate(self.lslist):
+                rv[:, i] = ls.disvecinfarray(x, y, aq)
+        rv.shape = (2, self.nparam, aq.naq, len(x))
+        return rv
+
     def dischargeinf(self):
         rv = np.zeros((self.nls, self.lslist[0].nparam))
         for i, ls in enumerate(self.lslist):
@@ -1383,7 +1630,7 @@ class LineSinkContainer(Element):
     def plot(self, layer=None):
         if (layer is None) or (layer in self.layers):
             for i in range(len(self.xls)):
-                plt.plot(self.xls[i], self.yls[i], "k")
+                pyplot().plot(self.xls[i], self.yls[i], "k")
 
 
 class HeadLineSinkContainer(LineSinkContainer):
@@ -1488,26 +1735,23 @@ class HeadLineSinkContainer(LineSinkContainer):
     def setparams(self, sol):
         self.parameters[:, 0] = sol
 
-    def equation(self):
-        mat = np.empty((self.nunknowns, self.model.neq))
+    def equation(self, rhsonly=False, mat=None):
+        mat = matrows(self, rhsonly, mat)
         rhs = np.empty(self.nunknowns)
         ieq = 0
         for ls in self.lslist:
-            matls, rhsls = ls.equation()
-            neq = len(rhsls)
-            mat[ieq : ieq + neq] = matls
-            rhs[ieq : ieq + neq] = rhsls
+            # rows of the line-sinks are written into the rows of the string
+            neq = ls.nunknowns
+            matls = None if rhsonly else mat[ieq : ieq + neq]
+            rhs[ieq : ieq + neq] = ls.equation(rhsonly, matls)[1]
             ieq += neq
+        if rhsonly or self.jcol is None:  # None if mat has no columns of self
+            return mat, rhs
         # fix to include resistance
         # this is not pretty but works
         # not sure how to change the design to make this nicer
         # I guess the additional matrix can be pre-computed and stored
-        jcol = 0
-        for e in self.model.elementlist:
-            if e == self:
-                break
-            elif e.nunknowns > 0:
-                jcol += e.nunknowns
+        jcol = self.jcol
         irow = 0
         for ls in self.lslist:
             for icp in range(ls.ncp):
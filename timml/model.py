@@ -1,14 +1,20 @@
 """Model classes."""
 
+import hashlib
 import inspect  # Used for storing the input
 import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
 
 import numpy as np
-from scipy.integrate import quad_vec
+from scipy.linalg import lapack, lu_factor, lu_solve
+from scipy.sparse.linalg import LinearOperator, bicgstab, gmres
 
-from .aquifer import Aquifer
+from .aquifer import Aquifer, AquiferData
 from .aquifer_parameters import param_3d, param_maq
 from .constant import ConstantStar
+from .element import LineFarField
 from .util import PlotTim
 
 __all__ = ["Model", "ModelMaq", "Model3D"]
@@ -48,13 +54,255 @@ class Model(PlotTim):
         self.elementdict = {}  # only elements that have a label
         self.aq = Aquifer(self, kaq, c, z, npor, ltype)
         self.modelname = "ml"  # Used for writing out input
+        self.n_threads = 1  # threads used by solve, headgrid and intnormflux
+        self.lu = None  # LU factorization of the matrix of the last solve
+        self.lufingerprint = None  # fingerprint of the model for that matrix
+        self.lukeys = None  # fingerprints of the elements for that matrix
+        self.luupdate = None  # BorderedUpdate of the factorization, see resolve
+        self.nscenarios = None  # number of scenarios of solve_scenarios
+        self.solverinfo = None  # iterations and residual of solve_iterative
+        self.treecodetol = None  # accuracy of the treecode, see Model.treecode
+        self.treecodes = {}  # LaplaceTreecode of each aquifer, by id of aquifer
+        self.treecodefingerprint = None  # fingerprint of the model for treecodes
+        self.ninitialize = 0  # number of calls of initialize, i.e., of solves
+        self.besselaccuracy = 0  # accuracy of the line elements, see Model.accuracy
+        self.linetables = {}  # tables of the line elements, see Model.tabulate
+        self.profiler = None  # SolveProfiler within Model.profile
 
     def initialize(self):
+        self.ninitialize += 1
+        self.nscenarios = None
+        self.treecodes = {}  # elements may be created again
         # remove inhomogeneity elements (they are added again)
         self.elementlist = [e for e in self.elementlist if not e.inhomelement]
         self.aq.initialize()
+        with self.phase("initialize elements"):
+            for e in self.elementlist:
+                e.initialize()
+        with self.phase("initialize elementindex"):
+            for aq in [self.aq] + self.aq.inhomlist:
+                aq.initialize_elementindex()
+        # first column of the unknowns of each element in the matrix
+        self.neq = 0
         for e in self.elementlist:
-            e.initialize()
+            e.jcol = self.neq
+            self.neq += e.nunknowns
+
+    @contextmanager
+    def threads(self, n_threads):
+        """Context manager that temporarily sets the number of threads.
+
+        The numba functions release the GIL, so that building the equations in
+        `solve` and evaluating `headgrid` and `intnormflux` run in parallel
+        without starting processes.
+
+        Examples
+        --------
+        >>> with ml.threads(4):
+        ...     ml.solve()
+        ...     h = ml.headgrid(xg, yg)
+        """
+        n_threads_old = self.n_threads
+        self.n_threads = n_threads
+        try:
+            yield self
+        finally:
+            self.n_threads = n_threads_old
+
+    @contextmanager
+    def treecode(self, tol=1e-10):
+        """Context manager that evaluates the Laplace part with a treecode.
+
+        Within the context the Laplace part of wells, line-sinks and line-doublets
+        in aquifers with a confined top is computed with a treecode (see
+        `timml.treecode.LaplaceTreecode`) in all array evaluations, e.g., in
+        `headgrid`, `head` and `disvec` for arrays of points. This reduces the
+        computation time for models with many elements and many points.
+
+        Parameters
+        ----------
+        tol : float, optional
+            accuracy of the multipole expansions, relative to the total
+            strength of the clustered elements
+
+        Examples
+        --------
+        >>> with ml.treecode(tol=1e-8):
+        ...     h = ml.headgrid(xg, yg)
+
+        Notes
+        -----
+        The treecode is also used in the matrix-free products of
+        `solve_iterative` with `store=False`; `solve` and the other options of
+        `solve_iterative` compute the matrix with the influence functions of the
+        elements. The treecodes are built again when the model is solved, and
+        when the input of the elements changed since the last time the context was
+        entered (the input is compared once when the context is entered, not in
+        every evaluation).
+        """
+        fingerprint = self.fingerprint(allelements=True)
+        if fingerprint != self.treecodefingerprint:
+            self.treecodes = {}
+            self.treecodefingerprint = fingerprint
+        tol_old = self.treecodetol
+        self.treecodetol = tol
+        try:
+            yield self
+        finally:
+            self.treecodetol = tol_old
+
+    @contextmanager
+    def accuracy(self, setting="high"):
+        """Context manager that sets the accuracy of the line elements.
+
+        The modified Helmholtz parts of line-sinks and line-doublets are computed
+        with a series of which the number of terms depends on the setting. "medium"
+        uses 5 instead of 8 terms, which computes the modified Helmholtz parts
+        about 1.5 times faster (measured 15-21 and 10-15 microseconds per point)
+        with a relative error of approximately 5e-5 compared with "high"; see
+        `benchmarks/benchmark_accuracy.py` for the errors and timings. The setting
+        has no effect when the Bessel functions are computed with fortran.
+
+        Parameters
+        ----------
+        setting : string, optional
+            "high" (the default outside the context) or "medium"
+
+        Examples
+        --------
+        >>> with ml.accuracy("medium"):
+        ...     ml.solve()
+        ...     h = ml.headgrid(xg, yg)
+        """
+        from .besselaesnumba.besselaesnumba import ACCURACY
+
+        if setting not in ACCURACY:
+            raise ValueError("setting must be one of " + str(list(ACCURACY)))
+        accuracy_old = self.besselaccuracy
+        self.besselaccuracy = ACCURACY[setting]
+        try:
+            yield self
+        finally:
+            self.besselaccuracy = accuracy_old
+
+    @contextmanager
+    def tabulate(self, tol=1e-3):
+        """Context manager that interpolates the leaky part of line elements.
+
+        Within the context the modified Helmholtz parts of the line-sinks and
+        line-doublets of `HeadLineSink`, `LineSinkDitch`, the strings and the
+        inhomogeneities are interpolated from tables in the local coordinates of
+        the element (see `linetable` in `timml.besselaesnumba.besselaesnumba`) in
+        all evaluations, e.g., in `headgrid`, `contour` and tracing. The functions
+        are computed exactly close to the end points. The tables are computed on
+        entering the context for each type, order and length of the elements in
+        each aquifer, and are kept in `linetables` for the next time.
+
+        The interpolation error is approximately 3e-4 of the maximum of the
+        functions. Tables with a larger error than `tol`, which happens when the
+        leakage factor is very small or very large compared with the length of the
+        element, are not used. Computing a table takes the time of computing the
+        exact functions at about 8000 points, so tables pay off for large grids
+        and models with many elements of the same length. Solve the model outside
+        the context.
+
+        Parameters
+        ----------
+        tol : float, optional
+            largest error of the tables, relative to the maximum of the functions
+
+        Examples
+        --------
+        >>> ml.solve()
+        >>> with ml.tabulate():
+        ...     h = ml.headgrid(xg, yg)
+        """
+        elements = []
+        todo = list(self.elementlist)
+        while todo:
+            e = todo.pop()
+            members = getattr(e, "lslist", getattr(e, "ldlist", None))
+            if members is not None:
+                todo.extend(members)
+            elif isinstance(e, LineFarField) and e.aq is not None:
+                elements.append(e)
+        for e in elements:
+            e.settable(self.linetables, tol)
+        try:
+            yield self
+        finally:
+            for e in elements:
+                e.table = None
+
+    @contextmanager
+    def profile(self):
+        """Context manager that records the time of the phases of a solve.
+
+        Within the context, `solve` and `resolve` record the wall time of the
+        initialization, the assembly of the equations of each element type, the
+        factorization, the back-substitution and `setparams`, and the calls of the
+        influence functions of the elements of this model, and of the Bessel
+        functions within them, are counted for each element type (see
+        `timml.profiler.SolveProfiler`). Other models, also when profiled at the
+        same time, are not counted.
+
+        Examples
+        --------
+        >>> with ml.profile() as prof:
+        ...     ml.solve()
+        >>> prof.report()  # pandas DataFrame with the time of each phase
+        >>> prof.callreport()  # pandas DataFrame with the calls by element type
+        """
+        from .profiler import SolveProfiler
+
+        if self.profiler is not None:
+            raise RuntimeError("Model.profile can not be nested")
+        self.profiler = SolveProfiler()
+        self.profiler.start()
+        try:
+            yield self.profiler
+        finally:
+            self.profiler.stop()
+            self.profiler = None
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager that records the time of phase `name` when profiling."""
+        if self.profiler is None:
+            yield
+        else:
+            with self.profiler.phase(name):
+                yield
+
+    def laplacetreecode(self, aq):
+        """Treecode of the Laplace part in aquifer `aq`, or None if not used.
+
+        The treecode is built again when the parameters of the elements changed
+        (see `Model.treecode` for changes of the input).
+        """
+        if self.treecodetol is None or not aq.ilap or self.nscenarios is not None:
+            return None
+        from .treecode import LaplaceTreecode
+
+        tree = self.treecodes.get(id(aq))
+        if (
+            tree is None
+            or tree.aq is not aq
+            or tree.tol != self.treecodetol
+            or not tree.isuptodate()
+        ):
+            # trees are not modified after they are built, so that threads
+            # evaluating an older tree are not affected
+            tree = LaplaceTreecode(aq, tol=self.treecodetol)
+            self.treecodes[id(aq)] = tree
+        return tree
+
+    def threadmap(self, func, iterable):
+        """List of `func` applied to all items, using `n_threads` threads."""
+        if self.n_threads is None or self.n_threads > 1:
+            with ThreadPoolExecutor(max_workers=self.n_threads) as executor:
+                return list(executor.map(func, iterable))
+        return [func(item) for item in iterable]
 
     def add_element(self, e):
         self.elementlist.append(e)
@@ -71,10 +319,26 @@ class Model(PlotTim):
         self.inputargs, _, _, self.inputvalues = inspect.getargvalues(frame)
 
     def potential(self, x, y, aq=None):
+        """Potential at `x`, `y`.
+
+        Returns
+        -------
+        pot : array length `naq`
+            potential in all layers of the aquifer, or array of size
+            `(naq, *shape)` if `x` and `y` are arrays of shape `shape`.
+            After `solve_scenarios` the array has an additional leading axis
+            of length `nscenarios`
+        """
+        if np.ndim(x) > 0 or np.ndim(y) > 0:
+            return self.evaluatearray(self.potentialarray, x, y, aq)
         if aq is None:
             aq = self.aq.find_aquifer_data(x, y)
+        if self.nscenarios is not None:
+            return self.potentialarray(
+                np.array([x], dtype="d"), np.array([y], dtype="d"), aq
+            )[..., 0]
         pot = np.zeros(aq.naq)
-        for e in aq.elementlist:
+        for e in aq.nearelements(x, y):
             pot += e.potential(x, y, aq)
         rv = np.sum(pot * aq.eigvec, 1)
         if aq.ltype[0] == "l":
@@ -82,22 +346,144 @@ class Model(PlotTim):
             rv += aq.constantstar.potstar
         return rv
 
+    def potentialarray(self, x, y, aq):
+        """Potential at arrays `x`, `y` located in aquifer `aq`.
+
+        Returns
+        -------
+        pot : array size `(naq, npoints)`, or `(nscenarios, naq, npoints)`
+        """
+        pot = np.zeros(self.scenarioshape() + (aq.naq, len(x)))
+        tree = self.laplacetreecode(aq)
+        if tree is None:
+            elements = aq.elementlist
+        else:
+            elements = self.treecodeleaky(tree, pot, x, y, "potential")
+            pot[0] += tree.potential(x, y)
+        for e in elements:
+            pot += e.potential(x, y, aq)
+        rv = aq.eigvec @ pot
+        if aq.ltype[0] == "l":
+            # potential for head above leaky layer
+            rv += aq.constantstar.potstar[..., np.newaxis]
+        return rv
+
     def disvec(self, x, y, aq=None):
         """Discharge vector at `x`, `y`.
 
         Returns
         -------
         qxqy : array size (2, naq)
-            first row is Qx in each aquifer layer, second row is Qy
+            first row is Qx in each aquifer layer, second row is Qy,
+            or array of size `(2, naq, *shape)` if `x` and `y` are arrays of
+            shape `shape`. After `solve_scenarios` the array has an additional
+            leading axis of length `nscenarios`
         """
+        if np.ndim(x) > 0 or np.ndim(y) > 0:
+            return self.evaluatearray(self.disvecarray, x, y, aq)
         if aq is None:
             aq = self.aq.find_aquifer_data(x, y)
+        if self.nscenarios is not None:
+            return self.disvecarray(
+                np.array([x], dtype="d"), np.array([y], dtype="d"), aq
+            )[..., 0]
         rv = np.zeros((2, aq.naq))
-        for e in aq.elementlist:
+        for e in aq.nearelements(x, y):
             rv += e.disvec(x, y, aq)
         rv = np.sum(rv[:, np.newaxis, :] * aq.eigvec, 2)
         return rv
 
+    def potdisvec(self, x, y, aq=None):
+        """Potential and discharge vector at one point `x`, `y`.
+
+        Same as `potential` and `disvec`, but each element is visited once and
+        the line elements compute the potential and the discharge vector together.
+
+        Returns
+        -------
+        pot : array length `naq`
+        qxqy : array size (2, naq)
+        """
+        if aq is None:
+            aq = self.aq.find_aquifer_data(x, y)
+        if self.nscenarios is not None:
+            return self.potential(x, y, aq), self.disvec(x, y, aq)
+        pot = np.zeros(aq.naq)
+        qxqy = np.zeros((2, aq.naq))
+        for e in aq.nearelements(x, y):
+            epot, eqxqy = e.potdisvec(x, y, aq)
+            pot += epot
+            qxqy += eqxqy
+        pot = np.sum(pot * aq.eigvec, 1)
+        if aq.ltype[0] == "l":
+            # potential for head above leaky layer
+            pot += aq.constantstar.potstar
+        qxqy = np.sum(qxqy[:, np.newaxis, :] * aq.eigvec, 2)
+        return pot, qxqy
+
+    def disvecarray(self, x, y, aq):
+        """Discharge vector at arrays `x`, `y` located in aquifer `aq`.
+
+        Returns
+        -------
+        qxqy : array size `(2, naq, npoints)`, or `(nscenarios, 2, naq, npoints)`
+        """
+        rv = np.zeros(self.scenarioshape() + (2, aq.naq, len(x)))
+        tree = self.laplacetreecode(aq)
+        if tree is None:
+            elements = aq.elementlist
+        else:
+            elements = self.treecodeleaky(tree, rv, x, y, "disvec")
+            rv[:, 0] += tree.disvec(x, y)
+        for e in elements:
+            rv += e.disvec(x, y, aq)
+        return aq.eigvec @ rv
+
+    def treecodeleaky(self, tree, rv, x, y, func):
+        """Add the leaky part of the elements of `tree` to `rv`.
+
+        The leaky part is only computed at the points where it may be nonzero.
+        `func` is "potential" or "disvec". Returns the other elements of the
+        aquifer.
+        """
+        from .treecode import nearfield
+
+        aq = tree.aq
+        if aq.naq > 1:
+            for e in tree.elements:
+                near = nearfield(e, x, y)
+                if np.any(near):
+                    val = getattr(e, func)(x[near], y[near], aq)
+                    rv[..., 1:, near] += val[..., 1:, :]
+        treeids = {id(e) for e in tree.elements}
+        return [e for e in aq.elementlist if id(e) not in treeids]
+
+    def evaluatearray(self, func, x, y, aq=None, **kwargs):
+        """Evaluate array function `func` at arrays `x` and `y`.
+
+        `x` and `y` are broadcast against each other and flattened. Points are
+        grouped by aquifer (unless `aq` is given) and `func` is called as
+        ``func(x, y, aq=aq, **kwargs)`` for each group. The returned array has the
+        shape of `x` and `y` along the trailing axes.
+        """
+        x, y = np.broadcast_arrays(np.asarray(x, dtype="d"), np.asarray(y, dtype="d"))
+        shape = x.shape
+        x, y = x.ravel(), y.ravel()
+        if aq is None:
+            rv = self.aq.evaluate_by_aquifer(func, x, y, **kwargs)
+        else:
+            rv = func(x, y, aq=aq, **kwargs)
+        return rv.reshape(rv.shape[:-1] + shape)
+
+    def scenarioshape(self):
+        """Shape of the leading scenario axis of computed arrays.
+
+        Returns `(nscenarios,)` after `solve_scenarios` and `()` otherwise.
+        """
+        if self.nscenarios is None:
+            return ()
+        return (self.nscenarios,)
+
     def normflux(self, x, y, theta):
         """Flux at point x, y in direction of angle theta.
 
@@ -154,6 +540,8 @@ class Model(PlotTim):
         theta_norm = np.angle(normvec) - np.pi
         L = np.abs(z2 - z1)
         if method == "quad":
+            from scipy.integrate import quad_vec
+
             return quad_vec(
                 self._normflux_integrand,
                 0,
@@ -209,12 +597,14 @@ class Model(PlotTim):
         else:
             Nsides = len(xy)
         Qn = np.zeros((self.aq.naq, Nsides))
+        Qseg = self.threadmap(
+            lambda i: self.intnormflux_segment(
+                *xy[i], *xy[i + 1], method=method, ndeg=ndeg
+            ),
+            range(len(xy) - 1),
+        )
         for i in range(len(xy) - 1):
-            x0, y0 = xy[i]
-            x1, y1 = xy[i + 1]
-            Qn[:, i] += self.intnormflux_segment(
-                x0, y0, x1, y1, method=method, ndeg=ndeg
-            )
+            Qn[:, i] += Qseg[i]
         return Qn
 
     def qztop(self, x, y, aq=None):
@@ -233,15 +623,33 @@ class Model(PlotTim):
         -------
         h : array length `naq` or `len(layers)`
             head in all `layers` (if not `None`),
-            or all layers of aquifer (otherwise)
+            or all layers of aquifer (otherwise),
+            or array of size `(nlayers, *shape)` if `x` and `y` are arrays
+            of shape `shape`. After `solve_scenarios` the array has an additional
+            leading axis of length `nscenarios`
         """
+        if np.ndim(x) > 0 or np.ndim(y) > 0:
+            return self.evaluatearray(self.headarray, x, y, aq, layers=layers)
         if aq is None:
             aq = self.aq.find_aquifer_data(x, y)
         rv = self.potential(x, y, aq) / aq.T
         if layers is None:
             return rv
         else:
-            return rv[layers]
+            return rv[..., layers]
+
+    def headarray(self, x, y, aq, layers=None):
+        """Head at arrays `x`, `y` located in aquifer `aq`.
+
+        Returns
+        -------
+        h : array size `(nlayers, npoints)`, or `(nscenarios, nlayers, npoints)`
+        """
+        rv = self.potentialarray(x, y, aq) / aq.Tcol
+        if layers is None:
+            return rv
+        else:
+            return rv[..., layers, :]
 
     def headgrid(self, xg, yg, layers=None, printrow=False):
         """Grid of heads.
@@ -259,26 +667,37 @@ class Model(PlotTim):
 
         Returns
         -------
-        h : array size `nlayers, ny, nx`
+        h : array size `nlayers, ny, nx`, or `nscenarios, nlayers, ny, nx` after
+            `solve_scenarios`
 
         See Also
         --------
         :func:`~timml.model.Model.headgrid2`
         """
-        nx, ny = len(xg), len(yg)
-        if layers is None:
-            Nlayers = self.aq.find_aquifer_data(xg[0], yg[0]).naq
-        else:
-            Nlayers = len(np.atleast_1d(layers))
-        h = np.empty((Nlayers, ny, nx))
-        for j in range(ny):
-            if printrow:
-                print(".", end="", flush=True)
-            for i in range(nx):
-                h[:, j, i] = self.head(xg[i], yg[j], layers)
-        if printrow:
-            print("", flush=True)
-        return h
+        xg, yg = np.atleast_1d(xg), np.atleast_1d(yg)
+        if layers is not None:
+            layers = np.atleast_1d(layers)
+        if not printrow:
+            if self.n_threads == 1:
+                return self.head(xg[np.newaxis, :], yg[:, np.newaxis], layers)
+            # blocks of rows evaluated in separate threads
+            nblocks = min(len(yg), 4 * (self.n_threads or 8))
+            h = self.threadmap(
+                lambda yblock: self.head(
+                    xg[np.newaxis, :], yblock[:, np.newaxis], layers
+                ),
+                np.array_split(yg, nblocks),
+            )
+            return np.concatenate(h, axis=-2)
+
+        def headrow(y):
+            h = self.head(xg, y, layers)
+            print(".", end="", flush=True)
+            return h
+
+        h = self.threadmap(headrow, yg)
+        print("", flush=True)
+        return np.stack(h, axis=-2)
 
     def headgrid2(self, x1, x2, nx, y1, y2, ny, layers=None, printrow=False):
         """Grid of heads.
@@ -322,17 +741,9 @@ class Model(PlotTim):
         h : array size `nlayers, nx`
         """
         xg, yg = np.atleast_1d(x), np.atleast_1d(y)
-        if layers is None:
-            Nlayers = self.aq.find_aquifer_data(xg[0], yg[0]).naq
-        else:
-            Nlayers = len(np.atleast_1d(layers))
-        nx = len(xg)
-        if len(yg) == 1:
-            yg = yg * np.ones(nx)
-        h = np.zeros((Nlayers, nx))
-        for i in range(nx):
-            h[:, i] = self.head(xg[i], yg[i], layers)
-        return h
+        if layers is not None:
+            layers = np.atleast_1d(layers)
+        return self.head(xg, yg, layers)
 
     def disvecalongline(self, x, y, layers=None):
         """Compute discharge vector along line.
@@ -350,18 +761,10 @@ class Model(PlotTim):
             [Nlayers,len(x)]
         """
         xg, yg = np.atleast_1d(x), np.atleast_1d(y)
-        if layers is None:
-            nlayers = self.aq.find_aquifer_data(xg[0], yg[0]).naq
-        else:
-            nlayers = len(np.atleast_1d(layers))
-        nx = len(xg)
-        if len(yg) == 1:
-            yg = yg * np.ones(nx)
-        Qx = np.zeros((nlayers, nx))
-        Qy = np.zeros((nlayers, nx))
-        for i in range(nx):
-            Qx[:, i], Qy[:, 1] = self.disvec(xg[i], yg[i], layers)
-        return Qx, Qy
+        qxqy = self.disvec(xg, yg)
+        if layers is not None:
+            qxqy = qxqy[..., np.atleast_1d(layers), :]
+        return qxqy[..., 0, :, :], qxqy[..., 1, :, :]
 
     #    def disvec_direction(self, s, x1, y1, cdirection):
     #        pass
@@ -388,7 +791,12 @@ class Model(PlotTim):
             layer, ltype, _ = aq.findlayer(z)
         else:
             layer, ltype = layer_ltype
-        h = self.head(x, y, aq=aq)
+        if ltype == "l":
+            h = self.head(x, y, aq=aq)
+        else:
+            # discharge is needed as well, computed with the potential
+            pot, (qx, qy) = self.potdisvec(x, y, aq=aq)
+            h = pot / aq.T
         # qz between aquifer layers
         qzlayer = np.zeros(aq.naq + 1)
         qzlayer[1:-1] = (h[1:] - h[:-1]) / aq.c[1:]
@@ -406,7 +814,6 @@ class Model(PlotTim):
             vz = (
                 qzbot + (z - aq.zaqbot[layer]) / aq.Haq[layer] * (qztop - qzbot)
             ) / aq.nporaq[layer]
-            qx, qy = self.disvec(x, y, aq=aq)
             vx = qx[layer] / (aq.Haq[layer] * aq.nporaq[layer])
             vy = qy[layer] / (aq.Haq[layer] * aq.nporaq[layer])
         return np.array([vx, vy, vz])
@@ -415,8 +822,6 @@ class Model(PlotTim):
         """Compute solution."""
         # Initialize elements
         self.initialize()
-        # Compute number of equations
-        self.neq = np.sum([e.nunknowns for e in self.elementlist])
         if self.neq == 0:
             return
         if silent is False:
@@ -432,24 +837,254 @@ class Model(PlotTim):
             return
         mat = np.empty((self.neq, self.neq))
         rhs = np.empty(self.neq)
-        ieq = 0
-        for e in self.elementlist:
+
+        def equation(e):
+            # threads write their rows directly into mat and rhs
             if e.nunknowns > 0:
-                (
-                    mat[ieq : ieq + e.nunknowns, :],
-                    rhs[ieq : ieq + e.nunknowns],
-                ) = e.equation()
-                ieq += e.nunknowns
+                rows = slice(e.jcol, e.jcol + e.nunknowns)
+                with self.phase("assembly " + type(e).__name__):
+                    rhs[rows] = e.equation(mat=mat[rows])[1]
             if silent is False:
                 print(".", end="", flush=True)
+
+        self.lu = None
+        self.threadmap(equation, self.elementlist)
         if printmat:
             return mat, rhs
-        sol = np.linalg.solve(mat, rhs)
-        icount = 0
+        with self.phase("factorization"):
+            self.setlu(lu_factor(mat, overwrite_a=True))
+        with self.phase("back-substitution"):
+            sol = lu_solve(self.lu, rhs)
+        with self.phase("setparams"):
+            for e in self.elementlist:
+                if e.nunknowns > 0:
+                    e.setparams(sol[e.jcol : e.jcol + e.nunknowns])
+        if silent is False:
+            print()  # needed cause the dots are printed
+            print("solution complete")
+        elif (silent == "dot") or (silent == "."):
+            print(".", end="", flush=True)
+        if sendback:
+            return sol
+        return
+
+    def resolve(self, sendback=0, silent=False, maxupdate=0.1):
+        """Compute solution using the factorization of the matrix of the last solve.
+
+        The matrix depends on the aquifer properties and on the geometry, layers and
+        resistances of the elements with unknowns. When only other input changed
+        since the last solve (for example specified heads `hls` or `hw`, discharges
+        `Qw` or `Qls`, `hstar`, infiltration `N`, or any element without unknowns
+        like `Uflow`), only the right-hand side is computed and the solution is
+        obtained by back-substitution.
+
+        When elements with unknowns were added, removed or modified (a modified
+        element counts as removed and added), only the rows and columns of the
+        added elements are computed and the solution is obtained with a bordered
+        system that uses the factorization of the last solve (see
+        `timml.bordered.BorderedUpdate`). This takes one back-substitution for each
+        added or removed unknown. Otherwise, or when the aquifers changed, the
+        model is solved with `solve`.
+
+        Parameters
+        ----------
+        sendback : boolean, optional
+            returns the solution vector if `True`
+        silent : boolean, optional
+            prints message if `False`
+        maxupdate : float, optional
+            maximum number of added and removed unknowns, as a fraction of the
+            number of equations, for which the factorization is updated
+        """
+        self.initialize()
+        if self.lu is None or self.neq == 0:
+            return self.solve(sendback=sendback, silent=silent)
+        update = None
+        fingerprint = self.fingerprint()
+        if fingerprint != self.lufingerprint:
+            with self.phase("update"):
+                update = self.updatelu(fingerprint, maxupdate)
+            if update is None:
+                return self.solve(sendback=sendback, silent=silent)
+        rhs = np.empty(self.neq)
+
+        def equation(e):
+            if e.nunknowns > 0:
+                rows = slice(e.jcol, e.jcol + e.nunknowns)
+                with self.phase("right-hand side " + type(e).__name__):
+                    rhs[rows] = e.equation(rhsonly=True)[1]
+
+        self.threadmap(equation, self.elementlist)
+        with self.phase("back-substitution"):
+            sol = self.lusolve(rhs) if update is None else update.solve(rhs)
+        with self.phase("setparams"):
+            for e in self.elementlist:
+                if e.nunknowns > 0:
+                    e.setparams(sol[e.jcol : e.jcol + e.nunknowns])
+        if silent is False:
+            if update is None:
+                print("solution complete (right-hand side only)")
+            else:
+                print(f"solution complete (update of {update.nupdate} unknowns)")
+        elif (silent == "dot") or (silent == "."):
+            print(".", end="", flush=True)
+        if sendback:
+            return sol
+        return
+
+    def setlu(self, lu):
+        """Store factorization `lu` of the matrix of the current model."""
+        self.lu = lu
+        self.lufingerprint = self.fingerprint()
+        self.lukeys = self.elementkeys()
+        self.luupdate = None
+
+    def elementkeys(self):
+        """Fingerprint of the aquifers, neq and (fingerprint, jcol) of each element.
+
+        Only elements with unknowns are included, see `fingerprint`.
+        """
+        h = hashlib.sha1()
+        for aq in [self.aq] + self.aq.inhomlist:
+            updatefingerprint(h, aq)
+        keys = [(elementkey(e), e.jcol) for e in self.elementlist if e.nunknowns > 0]
+        return h.hexdigest(), self.neq, keys
+
+    def updatelu(self, fingerprint, maxupdate):
+        """Update of the stored factorization for the current model, or None.
+
+        Elements with unknowns are matched with the elements of the stored
+        factorization by their fingerprint. Returns None if the aquifers changed or
+        if more than `maxupdate * neq` unknowns are added or removed.
+        """
+        from .bordered import BorderedUpdate
+
+        if self.luupdate is not None and self.luupdate[0] == fingerprint:
+            return self.luupdate[1]
+        aqkey, nold, keys = self.lukeys
+        newaqkey, _, newkeys = self.elementkeys()
+        if newaqkey != aqkey:
+            return None
+        jcols = {}  # columns of the old elements with each fingerprint
+        for key, jcol in keys:
+            jcols.setdefault(key, []).append(jcol)
+        oldindex = np.full(self.neq, -1)
+        kept, added = [], []
+        elements = [e for e in self.elementlist if e.nunknowns > 0]
+        for e, (key, _) in zip(elements, newkeys, strict=True):
+            if jcols.get(key):
+                jcol = jcols[key].pop(0)
+                oldindex[e.jcol : e.jcol + e.nunknowns] = np.arange(
+                    jcol, jcol + e.nunknowns
+                )
+                kept.append(e)
+            else:
+                added.append(e)
+        nadded = np.sum(oldindex < 0)
+        nremoved = nold - (self.neq - nadded)
+        if nadded + nremoved > maxupdate * self.neq:
+            return None
+        rows = np.empty((nadded, self.neq))
+        irow = 0
+        for e in added:
+            e.equation(mat=rows[irow : irow + e.nunknowns])
+            irow += e.nunknowns
+        columns = self.bordercolumns(kept, added)
+        update = BorderedUpdate(self.lusolve, nold, oldindex, rows, columns)
+        self.luupdate = (fingerprint, update)
+        return update
+
+    def bordercolumns(self, rowelements, colelements):
+        """Columns of the unknowns of `colelements` in the rows of `rowelements`.
+
+        The rows are computed with only `colelements` in the model, so that the
+        influences of the other elements are not evaluated. The `jcol` of the
+        `rowelements` is their first column in `colelements` meanwhile, or None if
+        they are not part of `colelements`.
+
+        Returns
+        -------
+        array size (number of unknowns of rowelements, number of unknowns of
+        colelements)
+        """
+        elementlist, neq = self.elementlist, self.neq
+        jcols = [e.jcol for e in rowelements]
+        irows = np.cumsum([0] + [e.nunknowns for e in rowelements])
+        colstart = {}
+        ncol = 0
+        for e in colelements:
+            colstart[id(e)] = ncol
+            ncol += e.nunknowns
+        mat = np.empty((irows[-1], ncol))
+
+        def equation(ie):
+            e = rowelements[ie]
+            e.equation(mat=mat[irows[ie] : irows[ie + 1]])
+
+        try:
+            self.elementlist, self.neq = colelements, ncol
+            for e in rowelements:
+                e.jcol = colstart.get(id(e))
+            self.threadmap(equation, range(len(rowelements)))
+        finally:
+            self.elementlist, self.neq = elementlist, neq
+            for e, jcol in zip(rowelements, jcols, strict=True):
+                e.jcol = jcol
+        return mat
+
+    def solve_outofcore(self, scratchdir=None, blocksize=512, silent=False, sendback=0):
+        """Compute solution with the matrix stored in a memory-mapped file.
+
+        The elements write their rows of the matrix directly into a temporary file
+        in `scratchdir`, which is factorized out of core (see
+        `timml.outofcore.OutOfCoreLU`). Only panels of `blocksize` columns or rows
+        of the matrix are kept in memory, approximately `4 * blocksize * neq`
+        values. This is slower than `solve`, but the size of the model is limited
+        by the disk space rather than the memory. The factorization is kept for
+        `resolve`; the file is removed when it is replaced by a new factorization.
+
+        Parameters
+        ----------
+        scratchdir : string, optional
+            directory of the temporary file (the default temporary directory if
+            None)
+        blocksize : integer, optional
+            number of columns of a panel of the factorization
+        silent : boolean, optional
+            prints dots for progress if `False`
+        sendback : boolean, optional
+            returns the solution vector if `True`
+        """
+        from .outofcore import OutOfCoreLU
+
+        self.initialize()
+        if self.neq == 0:
+            return
+        if silent is False:
+            print(
+                "Number of elements, Number of equations:",
+                len(self.elementlist),
+                ",",
+                self.neq,
+            )
+        self.lu = None  # remove the file of the previous factorization
+        lu = OutOfCoreLU(self.neq, scratchdir=scratchdir, blocksize=blocksize)
+        rhs = np.empty(self.neq)
+
+        def equation(e):
+            if e.nunknowns > 0:
+                rows = slice(e.jcol, e.jcol + e.nunknowns)
+                rhs[rows] = e.equation(mat=lu.mat[rows])[1]
+            if silent is False:
+                print(".", end="", flush=True)
+
+        self.threadmap(equation, self.elementlist)
+        lu.factorize()
+        self.setlu(lu)
+        sol = self.lusolve(rhs)
         for e in self.elementlist:
             if e.nunknowns > 0:
-                e.setparams(sol[icount : icount + e.nunknowns])
-                icount += e.nunknowns
+                e.setparams(sol[e.jcol : e.jcol + e.nunknowns])
         if silent is False:
             print()  # needed cause the dots are printed
             print("solution complete")
@@ -459,18 +1094,494 @@ class Model(PlotTim):
             return sol
         return
 
-    def solve_mp(self, nproc=4, printmat=0, sendback=0, silent=False):
+    def solve_mixed(self, tol=1e-12, maxiter=10, store=False, silent=False, sendback=0):
+        """Compute solution with a single precision factorization and refinement.
+
+        The matrix is assembled and factorized in single precision (float32),
+        which halves the memory of the matrix and the time of the factorization.
+        The solution is improved by iterative refinement: the residual of the
+        equations is computed in double precision and the correction is solved
+        with the single precision factorization, until the relative residual
+        `|A x - b| / |b|` is less than `tol`. When the refinement does not
+        converge (for badly conditioned matrices) the system is solved with the
+        direct solver of `solve`.
+
+        Parameters
+        ----------
+        tol : float, optional
+            relative residual at convergence
+        maxiter : integer, optional
+            maximum number of refinement steps
+        store : boolean, optional
+            if `True`, the matrix is also stored in double precision to compute the
+            residuals, which requires 1.5 times the memory of `solve`. If `False`,
+            the rows of each element are computed again in double precision for
+            every residual (see `equation`), at the cost of computing all rows in
+            every refinement step
+        silent : boolean, optional
+            prints residuals if `False`
+        sendback : boolean, optional
+            returns the solution vector if `True`
+
+        Notes
+        -----
+        Information about the solve is stored in the dictionary `solverinfo` with
+        keys 'method', 'iterations' (number of refinement steps), 'residual' (the
+        relative residual of the solution), 'history' (the relative residual
+        after the single precision solve and after each refinement step) and
+        'direct' (`True` if the direct solver was used). The single precision
+        factorization is not kept for `resolve`.
+        """
+        self.initialize()
+        if self.neq == 0:
+            return
+        if silent is False:
+            print(
+                "Number of elements, Number of equations:",
+                len(self.elementlist),
+                ",",
+                self.neq,
+            )
+        elements = [e for e in self.elementlist if e.nunknowns > 0]
+        mat = np.empty((self.neq, self.neq), dtype="f8" if store else "f4")
+        rhs = np.empty(self.neq)
+
+        def equation(e):
+            rows = slice(e.jcol, e.jcol + e.nunknowns)
+            rhs[rows] = e.equation(mat=mat[rows])[1]
+
+        def rowblock(e, x):
+            if store:
+                return mat[e.jcol : e.jcol + e.nunknowns] @ x
+            return e.equation()[0] @ x
+
+        def residual(x):
+            return rhs - np.concatenate(
+                self.threadmap(lambda e: rowblock(e, x), elements)
+            )
+
+        self.lu = None
+        self.threadmap(equation, elements)
+        lu = lu_factor(mat.astype("f4") if store else mat, overwrite_a=True)
+        bnorm = np.linalg.norm(rhs)
+        if bnorm == 0.0:
+            bnorm = 1.0
+        sol = lu_solve(lu, rhs.astype("f4")).astype("d")
+        r = residual(sol)
+        history = [np.linalg.norm(r) / bnorm]
+        if silent is False:
+            print(f"single precision solve, relative residual {history[-1]:.2e}")
+        niter = 0
+        while history[-1] > tol and niter < maxiter:
+            sol += lu_solve(lu, r.astype("f4"))
+            r = residual(sol)
+            history.append(np.linalg.norm(r) / bnorm)
+            niter += 1
+            if silent is False:
+                print(f"refinement {niter}, relative residual {history[-1]:.2e}")
+            if history[-1] > 0.5 * history[-2]:
+                break  # no convergence
+        converged = history[-1] <= tol
+        self.solverinfo = {
+            "method": "mixed",
+            "iterations": niter,
+            "residual": history[-1],
+            "history": history,
+            "direct": not converged,
+        }
+        if not converged:
+            if silent is False:
+                print("no convergence, solving with direct solver")
+            del lu
+            if not store:
+                mat = np.empty((self.neq, self.neq))
+                self.threadmap(equation, elements)
+            self.setlu(lu_factor(mat, overwrite_a=True))
+            sol = lu_solve(self.lu, rhs)
+        for e in elements:
+            e.setparams(sol[e.jcol : e.jcol + e.nunknowns])
+        if silent is False:
+            print("solution complete")
+        elif (silent == "dot") or (silent == "."):
+            print(".", end="", flush=True)
+        if sendback:
+            return sol
+        return
+
+    def lusolve(self, rhs):
+        """Solution for `rhs` with the stored factorization of the matrix."""
+        if isinstance(self.lu, tuple):
+            return lu_solve(self.lu, rhs)
+        return self.lu.solve(rhs)
+
+    def solve_iterative(
+        self,
+        method="gmres",
+        tol=1e-10,
+        maxiter=500,
+        restart=50,
+        store=True,
+        compress=None,
+        silent=False,
+        sendback=0,
+    ):
+        """Compute solution with an iterative solver.
+
+        The system of equations is solved with GMRES or BiCGSTAB and a block-Jacobi
+        preconditioner: the inverse of the diagonal block of each element, i.e.,
+        the part of the rows of the element (see `equation`) that multiplies the
+        unknowns of the element itself. When the iterations do not converge within
+        `maxiter` iterations, the system is solved with the direct solver of
+        `solve`.
+
+        Parameters
+        ----------
+        method : string, optional
+            'gmres' or 'bicgstab'
+        tol : float, optional
+            relative residual `|A x - b| / |b|` at convergence
+        maxiter : integer, optional
+            maximum number of iterations
+        restart : integer, optional
+            number of iterations between restarts of GMRES
+        store : boolean, optional
+            if `True`, the matrix is stored, which requires the same memory as the
+            dense matrix of `solve`; the matrix is factorized in place when the
+            direct solver is used. If `False`, the matrix is never stored, but the
+            rows of each element are computed again in every matrix-vector
+            product. This requires memory for the rows of one element only, at the
+            cost of computing all rows in every iteration. Within the `treecode`
+            context, the product is computed with the treecode instead (see
+            `timml.treecode.TreecodeMatrix`): the potential and discharge vector of
+            the unknown-strength elements are evaluated at all points used in the
+            equations, with the Laplace part from the treecode; the leaky part
+            near the elements is stored as a sparse matrix
+        compress : float, optional
+            if given, the matrix is stored with low-rank approximations of the
+            blocks of distant clusters of elements, with relative accuracy
+            `compress` (see `timml.hmatrix.HierarchicalMatrix`). The influences are
+            computed per element, so that a large part of the matrix is still
+            evaluated (about 0.8 `neq**2` for 2801 unknowns in the benchmark
+            model, more for smaller models); the preconditioner and the fallback
+            to the direct solver use dense blocks and the dense matrix
+        silent : boolean, optional
+            prints number of iterations and residual if `False`
+        sendback : boolean, optional
+            returns the solution vector if `True`
+
+        Notes
+        -----
+        Information about the solve is stored in the dictionary `solverinfo` with
+        keys 'method', 'iterations', 'residual' (the relative residual of the
+        iterative solution), 'direct' (`True` if the direct solver was used) and
+        'compression' (the stored size of the matrix relative to the dense matrix).
+        """
+        if method not in ("gmres", "bicgstab"):
+            raise ValueError(f"unknown method {method}, use 'gmres' or 'bicgstab'")
+        self.initialize()
+        if self.neq == 0:
+            return
+        if silent is False:
+            print(
+                "Number of elements, Number of equations:",
+                len(self.elementlist),
+                ",",
+                self.neq,
+            )
+        elements = [e for e in self.elementlist if e.nunknowns > 0]
+        rhs = np.empty(self.neq)
+        mat = None
+        if store and compress is None:
+            mat = np.empty((self.neq, self.neq))
+        diaginv = [None] * len(elements)
+
+        def equation(ie):
+            e = elements[ie]
+            rows = slice(e.jcol, e.jcol + e.nunknowns)
+            erows, rhs[rows] = e.equation(mat=None if mat is None else mat[rows])
+            diaginv[ie] = blockinverse(erows[:, rows])
+
+        def matvec(x):
+            x = np.ravel(x)
+            if mat is not None:
+                return mat @ x
+            return np.concatenate(
+                self.threadmap(lambda e: e.equation()[0] @ x, elements)
+            )
+
+        def precondition(x):
+            x = np.ravel(x)
+            return np.concatenate(
+                [
+                    diaginv[ie](x[e.jcol : e.jcol + e.nunknowns])
+                    for ie, e in enumerate(elements)
+                ]
+            )
+
+        self.lu = None
+        if compress is None and (store or self.treecodetol is None):
+            self.threadmap(equation, range(len(elements)))
+            compression = 1.0 if store else 0.0
+        elif compress is None:
+            from .treecode import TreecodeMatrix
+
+            tmat = TreecodeMatrix(self, elements, tol=self.treecodetol)
+            rhs = np.concatenate(
+                self.threadmap(lambda e: e.equation(rhsonly=True)[1], elements)
+            )
+            diaginv = [blockinverse(d) for d in tmat.diagonal]
+            matvec = tmat.matvec
+            compression = tmat.compression
+        else:
+            from .hmatrix import HierarchicalMatrix
+
+            hmat = HierarchicalMatrix(
+                elements, self.bordercolumns, tol=compress, threadmap=self.threadmap
+            )
+            rhs = np.concatenate(
+                self.threadmap(lambda e: e.equation(rhsonly=True)[1], elements)
+            )
+            diaginv = [blockinverse(d) for d in hmat.diagonal]
+            matvec = hmat.matvec
+            compression = hmat.compression
+            if silent is False:
+                print(f"matrix compression {compression:.3f}")
+        A = LinearOperator((self.neq, self.neq), matvec=matvec, dtype="d")
+        M = LinearOperator((self.neq, self.neq), matvec=precondition, dtype="d")
+        bnorm = np.linalg.norm(rhs)
+        if bnorm == 0.0:
+            bnorm = 1.0
+        # the iterations stagnate when the smallest residual of the last `window`
+        # iterations is not less than half the smallest residual before that
+        window = 2 * restart if method == "gmres" else 50
+        history = {}  # relative residual by iteration number
+        niter = 0
+        sol = np.zeros(self.neq)
+
+        def callback(arg):
+            nonlocal niter, sol
+            niter += 1
+            if method == "gmres":
+                history[niter] = arg  # relative preconditioned residual
+            elif niter % 10 == 0:  # residual of BiCGSTAB costs one product
+                sol = arg.copy()
+                history[niter] = np.linalg.norm(matvec(arg) - rhs) / bnorm
+            if niter in history and niter > window:
+                recent = min(r for k, r in history.items() if k > niter - window)
+                before = min(r for k, r in history.items() if k <= niter - window)
+                if recent > 0.5 * before:
+                    raise Stagnation
+
+        try:
+            if method == "gmres":
+                sol, info = gmres(
+                    A,
+                    rhs,
+                    rtol=tol,
+                    atol=0.0,
+                    restart=restart,
+                    maxiter=int(np.ceil(maxiter / restart)),
+                    M=M,
+                    callback=callback,
+                    callback_type="pr_norm",
+                )
+            else:
+                sol, info = bicgstab(
+                    A, rhs, rtol=tol, atol=0.0, maxiter=maxiter, M=M, callback=callback
+                )
+        except Stagnation:
+            info = -1
+        residual = np.linalg.norm(matvec(sol) - rhs) / bnorm
+        self.solverinfo = {
+            "method": method,
+            "iterations": niter,
+            "residual": residual,
+            "direct": info != 0,
+            "compression": compression,
+        }
+        if silent is False:
+            print(f"{method}: {niter} iterations, relative residual {residual:.2e}")
+        if info != 0:
+            # stagnation or breakdown, solve with direct solver
+            if silent is False:
+                print("no convergence, solving with direct solver")
+            if compress is not None:
+                mat = hmat.toarray()
+            elif mat is None:
+                mat = np.empty((self.neq, self.neq))
+                self.threadmap(equation, range(len(elements)))
+            self.setlu(lu_factor(mat, overwrite_a=True))
+            sol = lu_solve(self.lu, rhs)
+        for e in elements:
+            e.setparams(sol[e.jcol : e.jcol + e.nunknowns])
+        if silent is False:
+            print("solution complete")
+        elif (silent == "dot") or (silent == "."):
+            print(".", end="", flush=True)
+        if sendback:
+            return sol
+        return
+
+    def solve_scenarios(self, scenarios, silent=False):
+        """Compute the solution for many scenarios with one factorization.
+
+        The scenarios may only differ in input that affects the right-hand side
+        (see `resolve`), for example discharges `Qw` of wells, specified heads
+        `hls` of head line-sinks or infiltration `N`. The matrix is factorized
+        once (or the factorization of the last solve is used) and all right-hand
+        sides are solved together. Afterwards, the parameters of the elements have
+        one column per scenario and `head`, `headgrid`, `potential` and `disvec`
+        return arrays with a leading axis of length `nscenarios`. Call `solve` to
+        return to the input of the elements.
+
+        Parameters
+        ----------
+        scenarios : dict or pandas.DataFrame
+            keys (or columns) are tuples `(element, attribute)` where element is
+            an element or the label of an element, and values are sequences with
+            the value of the attribute for each scenario
+
+        Returns
+        -------
+        sol : array size `(neq, nscenarios)`
+            solution for the unknowns of each scenario
+
+        Examples
+        --------
+        >>> sol = ml.solve_scenarios(
+        ...     {("well 1", "Qw"): [100, 200, 300], (river, "hls"): [10, 11, 12]}
+        ... )
+        >>> h = ml.headgrid(xg, yg)  # array size (3, nlayers, ny, nx)
+        """
+        inputs = []
+        for (e, attr), values in scenarios.items():
+            if isinstance(e, str):
+                e = self.elementdict[e]
+            inputs.append((e, attr, list(values)))
+        nscenarios = len(inputs[0][2])
+        if any(len(values) != nscenarios for _, _, values in inputs):
+            raise ValueError("all scenarios must have the same number of values")
+        original = [(e, attr, getattr(e, attr)) for e, attr, _ in inputs]
+        self.initialize()
+        fingerprint = self.fingerprint()
+        if self.neq > 0 and (self.lu is None or fingerprint != self.lufingerprint):
+            self.solve(silent=silent)
+        rhs = np.empty((self.neq, nscenarios))
+        column = np.empty(self.neq)
+
+        def equation(e):
+            if e.nunknowns > 0:
+                column[e.jcol : e.jcol + e.nunknowns] = e.equation(rhsonly=True)[1]
+
+        parameters = []  # parameters of all elements for each scenario
+        potstar = []  # potstar of aquifers with a leaky top for each scenario
+        try:
+            for k in range(nscenarios):
+                for e, attr, values in inputs:
+                    value = values[k]
+                    if isinstance(getattr(e, attr), np.ndarray):
+                        value = np.atleast_1d(value).astype(float)
+                    setattr(e, attr, value)
+                self.initialize()
+                if self.fingerprint() != fingerprint:
+                    raise ValueError(
+                        f"scenario {k} changes the matrix; only input that affects "
+                        "the right-hand side can differ between scenarios"
+                    )
+                self.threadmap(equation, self.elementlist)
+                rhs[:, k] = column
+                parameters.append([e.parameters.copy() for e in self.elementlist])
+                potstar.append(
+                    [aq.constantstar.potstar for aq in self.scenarioaquifers()]
+                )
+                if silent is False:
+                    print(".", end="", flush=True)
+        finally:
+            for e, attr, value in original:
+                setattr(e, attr, value)
+            self.initialize()
+        sol = np.empty((self.neq, nscenarios))
+        if self.neq > 0:
+            sol = self.lusolve(rhs)
+        for ie, e in enumerate(self.elementlist):
+            if e.nunknowns > 0:
+                for k in range(nscenarios):
+                    e.setparams(sol[e.jcol : e.jcol + e.nunknowns, k])
+                    parameters[k][ie] = e.parameters.copy()
+            e.parameters = np.hstack([p[ie] for p in parameters])
+        for i, aq in enumerate(self.scenarioaquifers()):
+            aq.constantstar.potstar = np.array([p[i] for p in potstar])
+        self.nscenarios = nscenarios
+        if silent is False:
+            print()
+            print("solution complete for", nscenarios, "scenarios")
+        return sol
+
+    def scenarioaquifers(self):
+        """Aquifers with a leaky top, for which `potstar` differs per scenario."""
+        return [aq for aq in [self.aq] + self.aq.inhomlist if aq.ltype[0] == "l"]
+
+    def fingerprint(self, allelements=False):
+        """Fingerprint of the input that determines the matrix.
+
+        Contains the aquifer data and all attributes of the elements with unknowns,
+        except for the attributes that only affect the right-hand side (see
+        `RHSATTRIBUTES`).
+
+        Parameters
+        ----------
+        allelements : boolean, optional
+            if `True`, the attributes of the elements without unknowns are
+            included as well, so that the fingerprint contains the input that
+            determines the influence functions of all elements
+
+        Returns
+        -------
+        str
+            hexadecimal digest
+        """
+        h = hashlib.sha1()
+        for aq in [self.aq] + self.aq.inhomlist:
+            updatefingerprint(h, aq)
+        for e in self.elementlist:
+            if e.nunknowns > 0 or allelements:
+                updatefingerprint(h, e)
+        return h.hexdigest()
+
+    def solve_mp(self, nproc=4, printmat=0, sendback=0, silent=False, chunksize=None):
         """Compute solution, multiprocessing implementation.
 
+        The model is sent to each worker process once, when the pool is started.
+        The workers write their rows of the matrix and right-hand side directly
+        into shared memory, so that only the indices of the elements are
+        communicated. The matrix is factorized in place in the shared memory (see
+        `SharedMemoryLU`), so that it is never copied.
+
+        Parameters
+        ----------
+        nproc : int or None
+            number of processes, if None, number of cores minus 1
+        printmat : bool
+            if True, return matrix and right-hand side instead of solving
+        sendback : bool
+            if True, return the solution vector
+        silent : bool, string
+            print progress, default is False
+        chunksize : int or None
+            approximate number of rows assembled per task; rows of an element are
+            never split over tasks. If None (default), one task per element
+
         Notes
         -----
         Estimated speedup approximately by factor of number of physical cores (virtual
         cores do not improve calculation time).
+
+        The worker processes are started with the 'spawn' method, so a script that
+        calls `solve_mp` must protect its main code with
+        ``if __name__ == "__main__":``.
         """
         # Initialize elements
         self.initialize()
-        # Compute number of equations
-        self.neq = np.sum([e.nunknowns for e in self.elementlist])
         if self.neq == 0:
             return
         if silent is False:
@@ -484,9 +1595,8 @@ class Model(PlotTim):
             if silent is False:
                 print("No unknowns. Solution complete")
             return
-        mat = np.empty((self.neq, self.neq))
-        rhs = np.empty(self.neq)
 
+        self.lu = None  # not sent to the workers
         # start multiprocessing
         if nproc is None:
             nproc = (
@@ -498,39 +1608,50 @@ class Model(PlotTim):
                 f"Setting 'nproc' to {mp.cpu_count()}."
             )
             nproc = mp.cpu_count()
+        nproc = max(nproc, 1)
 
-        pool = mp.Pool(processes=nproc)
-        results = []
-        for e in self.elementlist:
+        # tasks are lists of indices of consecutive elements
+        tasks = []
+        nrows = 0
+        for ie, e in enumerate(self.elementlist):
             if e.nunknowns > 0:
-                results.append(pool.apply_async(e.equation))
-            if silent is False:
-                print(".", end="", flush=True)
-
-        pool.close()
-        pool.join()
-
-        mat = np.empty((self.neq, self.neq))
-        rhs = np.zeros(self.neq)
-
-        ieq = 0
-
-        for p in results:
-            imat, irhs = p.get()
-            mat[ieq : ieq + imat.shape[0], :] = imat
-            rhs[ieq : ieq + irhs.shape[0]] = irhs
-            ieq += imat.shape[0]
-
+                if chunksize is None or not tasks or nrows >= chunksize:
+                    tasks.append([])
+                    nrows = 0
+                tasks[-1].append(ie)
+                nrows += e.nunknowns
+
+        itemsize = np.dtype("d").itemsize
+        shmmat = shared_memory.SharedMemory(create=True, size=self.neq**2 * itemsize)
+        shmrhs = shared_memory.SharedMemory(create=True, size=self.neq * itemsize)
+        try:
+            # the workers are spawned, as a forked process hangs at exit once this
+            # process has run a parallel numba kernel (e.g. in headgrid)
+            with mp.get_context("spawn").Pool(
+                processes=nproc,
+                initializer=_init_solve_worker,
+                initargs=(self, shmmat.name, shmrhs.name),
+            ) as pool:
+                for _ in pool.imap_unordered(_solve_worker_task, tasks):
+                    if silent is False:
+                        print(".", end="", flush=True)
+            rhs = np.ndarray(self.neq, dtype="d", buffer=shmrhs.buf).copy()
+        finally:
+            # the names are removed; the memory of the matrix stays mapped
+            shmrhs.close()
+            shmrhs.unlink()
+            shmmat.unlink()
+        lu = SharedMemoryLU(shmmat, self.neq)
         # end multiprocessing
 
         if printmat:
-            return mat, rhs
-        sol = np.linalg.solve(mat, rhs)
-        icount = 0
+            return lu.mat.copy(), rhs
+        lu.factorize()
+        self.setlu(lu)
+        sol = lu.solve(rhs)
         for e in self.elementlist:
             if e.nunknowns > 0:
-                e.setparams(sol[icount : icount + e.nunknowns])
-                icount += e.nunknowns
+                e.setparams(sol[e.jcol : e.jcol + e.nunknowns])
         if silent is False:
             print()  # needed cause the dots are printed
             print("solution complete")
@@ -540,6 +1661,19 @@ class Model(PlotTim):
             return sol
         return
 
+    def evaluator(self):
+        """Compiled evaluator of the solved model.
+
+        Returns
+        -------
+        ModelEvaluator
+            snapshot of the current solution with methods `potential`, `head`,
+            `disvec` and `headgrid` evaluated with parallel numba kernels
+        """
+        from .evaluator import ModelEvaluator
+
+        return ModelEvaluator(self)
+
     def write(self):
         rv = self.modelname + " = " + self.name + "(\n"
         for key in self.inputargs[1:]:  # The first argument (self) is ignored
@@ -691,3 +1825,168 @@ class Model3D(Model):
         self.name = "Model3D"
         if self.aq.ltype[0] == "l":
             ConstantStar(self, hstar, aq=self.aq)
+
+
+# attributes that only affect the right-hand side of the system of equations or
+# the strengths of elements without unknowns, or that are set by Model.initialize
+RHSATTRIBUTES = {
+    "hls",
+    "hc",
+    "pc",
+    "Qw",
+    "Qc",
+    "hw",
+    "hr",
+    "Qls",
+    "hstar",
+    "potstar",
+    "N",
+    "slope",
+    "angle",
+    "Qx",
+    "Qy",
+    "parameters",
+    "jcol",
+    "inear",
+    "ifar",
+    "inputargs",
+    "inputvalues",
+}
+
+
+class Stagnation(Exception):
+    """Raised when the iterations of `Model.solve_iterative` make no progress."""
+
+
+def blockinverse(block):
+    """Function that multiplies with the inverse of diagonal block `block`.
+
+    The LU factorization is used, unless the block is (close to) singular, which
+    happens for elements whose condition does not contain their own unknowns
+    (e.g. `ConstantInside`). The block is not preconditioned in that case.
+    """
+    lu, piv, info = lapack.dgetrf(block)
+    pivots = np.abs(np.diag(lu))
+    if info == 0 and pivots.min() > 1e-12 * pivots.max():
+        return lambda x: lu_solve((lu, piv), x)
+    return lambda x: x
+
+
+def elementkey(e):
+    """Fingerprint of element `e` that includes the aquifers it belongs to.
+
+    The aquifers are identified by their id, as they are not part of the
+    fingerprint of the element (see `hashvalue`).
+    """
+    h = hashlib.sha1()
+    updatefingerprint(h, e)
+    for value in vars(e).values():
+        if isinstance(value, AquiferData):
+            h.update(str(id(value)).encode())
+    return h.hexdigest()
+
+
+def updatefingerprint(h, obj):
+    """Update hash `h` with the attributes of `obj` that affect the matrix."""
+    h.update(type(obj).__name__.encode())
+    for key, value in vars(obj).items():
+        if key not in RHSATTRIBUTES:
+            h.update(key.encode())
+            hashvalue(h, value)
+
+
+def hashvalue(h, value):
+    """Update hash `h` with `value`.
+
+    Other objects (model, aquifers, elements) are not part of the fingerprint.
+    """
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        h.update(str((value.dtype, value.shape)).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif value is None or isinstance(value, bool | int | float | complex | str):
+        h.update(repr(value).encode())
+    elif isinstance(value, np.generic):
+        h.update(repr(value.item()).encode())
+    elif isinstance(value, list | tuple | np.ndarray):
+        for item in value:
+            hashvalue(h, item)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            hashvalue(h, key)
+            hashvalue(h, item)
+
+
+class SharedMemoryLU:
+    """LU factorization of a matrix stored in shared memory.
+
+    The workers of `Model.solve_mp` write the rows of the matrix into `mat`, which
+    is factorized in place with `factorize` and used to solve systems of equations
+    with `solve`. The shared memory is closed when the object is deleted.
+
+    Parameters
+    ----------
+    shm : multiprocessing.shared_memory.SharedMemory
+        shared memory of the matrix
+    neq : integer
+        number of equations
+
+    Attributes
+    ----------
+    mat : array size (neq, neq)
+        matrix in Fortran order, overwritten with the L and U factors by
+        `factorize`
+    piv : array
+        pivots of the factorization
+    """
+
+    def __init__(self, shm, neq):
+        self.shm = shm
+        self.neq = neq
+        # Fortran order, so that LAPACK factorizes the matrix in place
+        self.mat = np.ndarray((neq, neq), dtype="d", buffer=shm.buf, order="F")
+        self.piv = None
+
+    def __repr__(self):
+        return "SharedMemoryLU with " + str(self.neq) + " equations"
+
+    def __del__(self):
+        self.mat = None
+        try:
+            self.shm.close()
+        except BufferError:  # the factors are still used elsewhere
+            pass
+
+    def factorize(self):
+        """Factorize `mat` in place."""
+        self.mat, self.piv = lu_factor(self.mat, overwrite_a=True)
+
+    def solve(self, rhs):
+        """Solution for `rhs` (array of size neq or (neq, nrhs))."""
+        return lu_solve((self.mat, self.piv), rhs)
+
+
+# worker state for Model.solve_mp, set once per worker process by the initializer
+_solve_worker = {}
+
+
+def _init_solve_worker(model, shmmatname, shmrhsname):
+    # keep references to the shared memory, so that the buffers stay valid
+    _solve_worker["model"] = model
+    _solve_worker["shm"] = [
+        shared_memory.SharedMemory(name=shmmatname),
+        shared_memory.SharedMemory(name=shmrhsname),
+    ]
+    shmmat, shmrhs = _solve_worker["shm"]
+    _solve_worker["mat"] = np.ndarray(
+        (model.neq, model.neq), dtype="d", buffer=shmmat.buf, order="F"
+    )
+    _solve_worker["rhs"] = np.ndarray(model.neq, dtype="d", buffer=shmrhs.buf)
+
+
+def _solve_worker_task(task):
+    model = _solve_worker["model"]
+    mat, rhs = _solve_worker["mat"], _solve_worker["rhs"]
+    for ie in task:
+        e = model.elementlist[ie]
+        rows = slice(e.jcol, e.jcol + e.nunknowns)
+        rhs[rows] = e.equation(mat=mat[rows])[1]
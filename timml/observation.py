@@ -0,0 +1,101 @@
+"""Heads at a fixed set of observation points."""
+
+import numpy as np
+
+__all__ = ["ObservationPoints"]
+
+
+class ObservationPoints:
+    """Set of observation points where the head is computed after every solve.
+
+    The influence functions of all elements at the observation points are computed
+    once and stored in a matrix. The heads are then computed with one matrix
+    multiplication of the stored matrix and the parameters of all elements. The
+    matrix is recomputed automatically when the aquifer data or the geometry of the
+    elements changed (see `Model.fingerprint`), but not when only the strengths
+    of the elements changed (for example `Qw`, `hls` or `N`). The fingerprint is
+    only compared once after every solve of the model.
+
+    Parameters
+    ----------
+    model : Model object
+        model to which the observation points belong
+    x : array
+        x values of the observation points
+    y : array
+        y values of the observation points
+    layers : integer, list or array, optional
+        layers for which the head is computed (all layers if `None`)
+
+    Examples
+    --------
+    >>> obs = ObservationPoints(ml, xobs, yobs, layers=0)
+    >>> for Qw in [100, 200, 300]:
+    ...     well.Qw = np.array([Qw])
+    ...     ml.solve()
+    ...     h = obs.head()  # array size (1, nobs)
+    """
+
+    def __init__(self, model, x, y, layers=None):
+        self.model = model
+        self.x = np.atleast_1d(np.asarray(x, dtype="d"))
+        self.y = np.atleast_1d(np.asarray(y, dtype="d"))
+        if layers is None:
+            layers = np.arange(self.model.aq.naq)
+        self.layers = np.atleast_1d(layers)
+        self.nlayers = len(self.layers)
+        self.nobs = len(self.x)
+        self.fingerprint = None  # fingerprint of the model for the stored matrix
+        self.ninitialize = None  # Model.ninitialize when fingerprint was compared
+        self.groups = None  # observation points grouped by aquifer
+        self.infmat = None  # size (nlayers, nobs, total number of parameters)
+
+    def __repr__(self):
+        return "ObservationPoints with " + str(self.nobs) + " points"
+
+    def elements(self):
+        """List of all elements, in the order of the stored influence matrix."""
+        aqlist = [self.model.aq] + self.model.aq.inhomlist
+        return list(dict.fromkeys(e for aq in aqlist for e in aq.elementlist))
+
+    def initialize(self):
+        """Compute the influence matrix for the current geometry of the model."""
+        elements = self.elements()
+        start = np.cumsum([0] + [e.nparam for e in elements])
+        index = {id(e): i for i, e in enumerate(elements)}
+        self.groups = self.model.aq.find_aquifer_data_array(self.x, self.y)
+        self.infmat = np.zeros((self.nlayers, self.nobs, start[-1]))
+        for aq, ipoints in self.groups:
+            eigvec = aq.eigvec[self.layers] / aq.T[self.layers, np.newaxis]
+            for e in aq.elementlist:
+                i = index[id(e)]
+                pot = e.potinfarray(self.x[ipoints], self.y[ipoints], aq)
+                self.infmat[:, ipoints, start[i] : start[i + 1]] += np.moveaxis(
+                    eigvec @ pot, 0, -1
+                )
+        self.fingerprint = self.model.fingerprint(allelements=True)
+        self.ninitialize = self.model.ninitialize
+
+    def head(self):
+        """Head at the observation points.
+
+        Returns
+        -------
+        h : array size `(nlayers, nobs)`, or `(nscenarios, nlayers, nobs)` after
+            `Model.solve_scenarios`
+        """
+        if self.model.ninitialize != self.ninitialize:
+            # the model was solved again, the geometry may have changed
+            if self.model.fingerprint(allelements=True) != self.fingerprint:
+                self.initialize()
+            self.ninitialize = self.model.ninitialize
+        parameters = np.vstack([e.parameters for e in self.elements()])
+        rv = np.moveaxis(self.infmat @ parameters, -1, 0)
+        for aq, ipoints in self.groups:
+            if aq.ltype[0] == "l":
+                # head above leaky layer
+                potstar = aq.constantstar.potstar[..., self.layers]
+                rv[:, :, ipoints] += (potstar / aq.T[self.layers])[..., np.newaxis]
+        if self.model.nscenarios is None:
+            return rv[0]
+        return rv
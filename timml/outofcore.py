@@ -0,0 +1,108 @@
+"""LU factorization of a matrix stored in a memory-mapped file.
+
+For models with many unknowns the matrix does not fit in memory. The rows of the
+matrix are then written by the elements directly into a memory-mapped temporary
+file (see the `mat` argument of the `equation` methods), which is factorized in
+place with a right-looking blocked LU factorization with partial pivoting. Only a
+panel of columns and a tile of rows of the matrix are kept in memory at any time.
+
+Example::
+
+    ml.solve_outofcore(scratchdir="/scratch", blocksize=1024)
+"""
+
+import tempfile
+import warnings
+
+import numpy as np
+from scipy.linalg import LinAlgWarning, lapack, solve_triangular
+
+__all__ = ["OutOfCoreLU"]
+
+
+class OutOfCoreLU:
+    """LU factorization of a matrix stored in a memory-mapped file.
+
+    The matrix is written into `mat`, factorized in place with `factorize` and used
+    to solve systems of equations with `solve`. The file is removed when the object
+    is deleted.
+
+    Parameters
+    ----------
+    neq : integer
+        number of equations
+    scratchdir : string, optional
+        directory of the temporary file (the default temporary directory if None)
+    blocksize : integer, optional
+        number of columns of a panel and number of rows of a tile. The memory used
+        is approximately `4 * blocksize * neq` values
+
+    Attributes
+    ----------
+    mat : np.memmap of size (neq, neq)
+        matrix, overwritten with the L and U factors by `factorize`
+    perm : array
+        row permutation of the factorization
+    """
+
+    def __init__(self, neq, scratchdir=None, blocksize=512):
+        self.neq = neq
+        self.blocksize = blocksize
+        self.file = tempfile.TemporaryFile(dir=scratchdir)
+        self.mat = np.memmap(self.file, dtype="d", mode="w+", shape=(neq, neq))
+        self.perm = np.arange(neq)
+
+    def __repr__(self):
+        return "OutOfCoreLU with " + str(self.neq) + " equations"
+
+    def factorize(self):
+        """Factorize `mat` in place, one panel of `blocksize` columns at a time."""
+        a = self.mat
+        n, b = self.neq, self.blocksize
+        for k in range(0, n, b):
+            kb = min(b, n - k)
+            lu, piv, info = lapack.dgetrf(np.array(a[k:, k : k + kb]))
+            if info > 0:
+                warnings.warn(
+                    f"Diagonal number {k + info} is exactly zero. Singular matrix.",
+                    LinAlgWarning,
+                    stacklevel=2,
+                )
+            a[k:, k : k + kb] = lu
+            # apply the row interchanges of the panel to the other columns
+            for i in range(kb):
+                if piv[i] != i:
+                    rows = [k + i, k + piv[i]]
+                    self.perm[rows] = self.perm[rows[::-1]]
+                    a[rows, :k] = a[rows[::-1], :k]
+                    a[rows, k + kb :] = a[rows[::-1], k + kb :]
+            if k + kb == n:
+                break
+            u12 = solve_triangular(
+                lu[:kb], a[k : k + kb, k + kb :], lower=True, unit_diagonal=True
+            )
+            a[k : k + kb, k + kb :] = u12
+            # update of the trailing matrix, one tile of rows at a time
+            for r in range(k + kb, n, b):
+                re = min(r + b, n)
+                a[r:re, k + kb :] -= lu[r - k : re - k] @ u12
+        a.flush()
+
+    def solve(self, rhs):
+        """Solution for right-hand side `rhs` of size `neq` or `(neq, nrhs)`."""
+        a = self.mat
+        n, b = self.neq, self.blocksize
+        y = np.array(rhs, dtype="d")[self.perm]
+        for r in range(0, n, b):
+            re = min(r + b, n)
+            if r > 0:
+                y[r:re] -= a[r:re, :r] @ y[:r]
+            y[r:re] = solve_triangular(
+                a[r:re, r:re], y[r:re], lower=True, unit_diagonal=True
+            )
+        for r in reversed(range(0, n, b)):
+            re = min(r + b, n)
+            if re < n:
+                y[r:re] -= a[r:re, re:] @ y[re:]
+            y[r:re] = solve_triangular(a[r:re, r:re], y[r:re], lower=False)
+        return y
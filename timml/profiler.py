@@ -0,0 +1,208 @@
+"""Wall time of the phases of a solve and number of calls of influence functions.
+
+The profiler is used through `Model.profile`::
+
+    with ml.profile() as prof:
+        ml.solve()
+    prof.report()  # time per phase
+    prof.callreport()  # calls per element type
+
+The influence functions of the elements (see `timml.element.INFLUENCES`) check
+`model.profiler` of their element and are counted by the profiler of that model
+only, so other models are not affected. The Bessel functions of the line elements
+(`timml.bessel.bessel`) and of the wells are replaced by counting functions while
+at least one profiler is active; their calls are counted for the innermost
+influence function of a profiled element in the same thread and are not counted
+outside influence functions.
+"""
+
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+
+from . import bessel, well
+
+__all__ = ["SolveProfiler"]
+
+# Bessel functions of the wells whose calls are counted
+WELLKERNELS = ("k0", "k1")
+
+# stack of (profiler, element type) of the influence functions of each thread
+local = threading.local()
+# the Bessel functions are replaced while nactive profilers are active; original
+# functions in `patched`
+kernellock = threading.Lock()
+nactive = 0
+patched = []
+
+
+def callstack():
+    stack = getattr(local, "stack", None)
+    if stack is None:
+        stack = local.stack = []
+    return stack
+
+
+def countkernel(func, name):
+    """Bessel function `func` that counts its calls in profiled influence functions."""
+
+    @wraps(func)
+    def counted(*args, **kwargs):
+        stack = getattr(local, "stack", None)
+        if stack:
+            profiler, etype = stack[-1]
+            profiler.count((etype, name))
+        return func(*args, **kwargs)
+
+    return counted
+
+
+class KernelModule:
+    """Module of Bessel functions whose calls are counted."""
+
+    def __init__(self, module):
+        self.module = module
+
+    def __getattr__(self, name):
+        func = getattr(self.module, name)
+        if callable(func):
+            return countkernel(func, name)
+        return func
+
+
+def startkernels():
+    """Replace the Bessel functions by counting functions for the first profiler."""
+    global nactive
+    with kernellock:
+        if nactive == 0:
+            patched.append((bessel, "bessel", bessel.bessel))
+            for name in WELLKERNELS:
+                patched.append((well, name, getattr(well, name)))
+            bessel.bessel = KernelModule(bessel.bessel)
+            for name in WELLKERNELS:
+                setattr(well, name, countkernel(getattr(well, name), name))
+        nactive += 1
+
+
+def stopkernels():
+    """Restore the Bessel functions when the last profiler stops."""
+    global nactive
+    with kernellock:
+        nactive -= 1
+        if nactive == 0:
+            for module, name, func in patched:
+                setattr(module, name, func)
+            patched.clear()
+
+
+class SolveProfiler:
+    """Wall time of phases of a solve and number of calls of influence functions.
+
+    Attributes
+    ----------
+    times : dict
+        wall time in seconds of each phase. The phases are 'initialize aquifers'
+        (including the eigen decomposition), 'create inhomogeneity elements',
+        'initialize elements', 'initialize elementindex', 'assembly' and
+        'right-hand side' for each element type, 'factorization', 'update',
+        'back-substitution' and 'setparams'. When the equations are computed with
+        threads, the times of the assembly of the elements are summed over the
+        threads.
+    counts : dict
+        number of times each phase was entered
+    calls : Counter
+        number of calls by `(element type, function name)`; function names are the
+        influence functions in `timml.element.INFLUENCES` and the Bessel functions
+    """
+
+    def __init__(self):
+        self.times = defaultdict(float)
+        self.counts = Counter()
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.started = False
+
+    def __repr__(self):
+        total = sum(self.times.values())
+        return f"SolveProfiler with {len(self.times)} phases, {total:.3f} seconds"
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager that adds the wall time of the context to `name`."""
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            dt = perf_counter() - t0
+            with self.lock:
+                self.times[name] += dt
+                self.counts[name] += 1
+
+    def count(self, key):
+        with self.lock:
+            self.calls[key] += 1
+
+    def influence(self, func, name, e, *args, **kwargs):
+        """Call influence function `func` of element `e` and count the call.
+
+        Called by the influence functions of the elements of the profiled model
+        (see `timml.element.profiled`).
+        """
+        etype = type(e).__name__
+        self.count((etype, name))
+        stack = callstack()
+        stack.append((self, etype))
+        try:
+            return func(e, *args, **kwargs)
+        finally:
+            stack.pop()
+
+    def start(self):
+        """Start counting the calls of the Bessel functions."""
+        if self.started:
+            raise RuntimeError("profiler already started")
+        startkernels()
+        self.started = True
+
+    def stop(self):
+        """Stop counting the calls of the Bessel functions."""
+        if self.started:
+            self.started = False
+            stopkernels()
+
+    def report(self):
+        """Wall time of each phase.
+
+        Returns
+        -------
+        pandas.DataFrame
+            columns 'time' (seconds), 'count' and 'fraction' (of the total time),
+            sorted by time
+        """
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {
+                "time": pd.Series(self.times, dtype=float),
+                "count": pd.Series(self.counts, dtype=int),
+            }
+        )
+        df["fraction"] = df["time"] / df["time"].sum()
+        return df.sort_values("time", ascending=False)
+
+    def callreport(self):
+        """Number of calls of each function by element type.
+
+        Returns
+        -------
+        pandas.DataFrame
+            element types as index and function names as columns
+        """
+        import pandas as pd
+
+        s = pd.Series(self.calls, dtype=int)
+        if s.empty:
+            return pd.DataFrame(dtype=int)
+        return s.unstack(fill_value=0)
@@ -0,0 +1,59 @@
+"""Uniform grid index of boxes, used to find the elements near a point."""
+
+import numpy as np
+
+__all__ = ["GridIndex"]
+
+
+class GridIndex:
+    """Uniform grid of square cells with, for each cell, the boxes that overlap it.
+
+    Parameters
+    ----------
+    boxes : array size (nbox, 4)
+        boxes as rows `xmin, ymin, xmax, ymax`
+    maxcells : integer, optional
+        maximum number of cells in the x and y directions
+
+    Notes
+    -----
+    The cell size is the median width or height of the boxes, so that most boxes
+    overlap a few cells only, but at least the extent of all boxes divided by
+    `maxcells`.
+    """
+
+    def __init__(self, boxes, maxcells=256):
+        self.boxes = np.atleast_2d(np.asarray(boxes, dtype="d"))
+        self.x0 = np.min(self.boxes[:, 0])
+        self.y0 = np.min(self.boxes[:, 1])
+        extent = max(
+            np.max(self.boxes[:, 2]) - self.x0, np.max(self.boxes[:, 3]) - self.y0
+        )
+        size = np.maximum(
+            self.boxes[:, 2] - self.boxes[:, 0], self.boxes[:, 3] - self.boxes[:, 1]
+        )
+        self.cellsize = max(np.median(size), extent / maxcells)
+        cells = {}
+        i1, j1 = self.cell(self.boxes[:, 0], self.boxes[:, 1])
+        i2, j2 = self.cell(self.boxes[:, 2], self.boxes[:, 3])
+        for ibox in range(len(self.boxes)):
+            for i in range(i1[ibox], i2[ibox] + 1):
+                for j in range(j1[ibox], j2[ibox] + 1):
+                    cells.setdefault((i, j), []).append(ibox)
+        self.cells = {key: np.array(value) for key, value in cells.items()}
+        self.empty = np.zeros(0, dtype="int")
+
+    def cell(self, x, y):
+        """Column and row of the cell that contains `x`, `y`."""
+        i = np.floor((x - self.x0) / self.cellsize).astype("int")
+        j = np.floor((y - self.y0) / self.cellsize).astype("int")
+        return i, j
+
+    def query(self, x, y):
+        """Indices of the boxes that contain the point `x`, `y`, in ascending order."""
+        ibox = self.cells.get(tuple(int(k) for k in self.cell(x, y)))
+        if ibox is None:
+            return self.empty
+        b = self.boxes[ibox]
+        inside = (b[:, 0] <= x) & (x <= b[:, 2]) & (b[:, 1] <= y) & (y <= b[:, 3])
+        return ibox[inside]
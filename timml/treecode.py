@@ -0,0 +1,783 @@
+"""Treecode for the Laplace part of wells, line-sinks and line-doublets.
+
+The Laplace part (the first eigen-mode of an aquifer with a confined top) of wells,
+line-sinks and line-doublets does not decay with distance, so that every element
+contributes at every point. The treecode clusters the elements in a quadtree and
+replaces the contribution of a cluster that is far from the point by a multipole
+expansion of its complex potential. The expansions of the elements are obtained
+from the closed-form Laplace parts of `potbeslsho` and `potbesldho`: the complex
+potential of a line-sink of order `n` is
+
+    (L / (4 pi)) * int_{-1}^{1} X**n log(Z - X) dX
+
+and of a line-doublet of order `n`
+
+    1 / (2 pi i) * int_{-1}^{1} X**n / (X - Z) dX
+
+where `Z` is the local coordinate along the element. Nearby elements are computed
+with the closed-form expressions.
+
+Example::
+
+    with ml.treecode(tol=1e-8):
+        h = ml.headgrid(xg, yg)
+"""
+
+import threading
+
+import numba
+import numpy as np
+
+from .besselaesnumba.besselaesnumba import (
+    PARALLELSIZE,
+    disbesldho,
+    disbeslsho,
+    potbesldho,
+    potbeslsho,
+)
+from .linedoublet import LineDoubletHoBase, LineDoubletStringBase
+from .linesink import (
+    LineSinkBase,
+    LineSinkContainer,
+    LineSinkHoBase,
+    LineSinkStringBase,
+    LineSinkStringBase2,
+)
+from .well import LargeDiameterWell, WellBase
+
+__all__ = ["LaplaceTreecode", "TreecodeMatrix"]
+
+# source type codes
+WELL = 0
+LINESINK = 1
+LINEDOUBLET = 2
+
+
+def sublist(e):
+    """Line elements of string or container `e`, or None for other elements."""
+    if isinstance(e, LineDoubletStringBase):
+        return e.ldlist
+    if isinstance(e, LineSinkStringBase | LineSinkStringBase2 | LineSinkContainer):
+        return e.lslist
+    return None
+
+
+def issupported(e):
+    """True if the Laplace part of element `e` can be computed with the treecode."""
+    if isinstance(e, WellBase):
+        return not isinstance(e, LargeDiameterWell)
+    if isinstance(e, LineSinkBase | LineSinkHoBase | LineDoubletHoBase):
+        return True
+    members = sublist(e)
+    return members is not None and all(issupported(m) for m in members)
+
+
+def nearfield(e, x, y):
+    """Boolean array that is True where the leaky part of element `e` may be nonzero."""
+    members = sublist(e)
+    if members is not None:
+        rv = np.zeros(len(x), dtype="bool")
+        for m in members:
+            rv |= nearfield(m, x, y)
+        return rv
+    if isinstance(e, WellBase):
+        return np.ones(len(x), dtype="bool")
+    return e.nearfield(x, y)
+
+
+class LaplaceTreecode:
+    """Treecode for the Laplace part of the elements in aquifer `aq`.
+
+    Parameters
+    ----------
+    aq : AquiferData object
+        aquifer with a Laplace part (`aq.ilap` is 1)
+    tol : float, optional
+        accuracy of the multipole expansions relative to the total strength of
+        the clustered elements
+    theta : float, optional
+        a cluster is replaced by its expansion when the radius of the cluster is
+        less than `theta` times the distance to the point
+    leafsize : integer, optional
+        maximum number of elements in the smallest clusters
+
+    Notes
+    -----
+    Only the Laplace part of the supported elements (see `elements`) is computed.
+    The result is the contribution to the first eigen-mode, i.e., the first row
+    of `Element.potential` summed over all supported elements. The treecode is
+    also used in the matrix-free products of `Model.solve_iterative` (see
+    `TreecodeMatrix`).
+    """
+
+    def __init__(self, aq, tol=1e-10, theta=0.5, leafsize=16):
+        self.aq = aq
+        self.tol = tol
+        self.theta = theta
+        self.nterms = max(1, int(np.ceil(np.log(tol) / np.log(theta))))
+        self.elements = [e for e in aq.elementlist if issupported(e)]
+        self.stype, self.sorder, self.sz1, self.sz2, self.srw = [], [], [], [], []
+        self.sparam = []  # (element number, first parameter, layers) of sources
+        for ie, e in enumerate(self.elements):
+            self.add_source(e, ie, 0)
+        self.stype = np.array(self.stype, dtype="int")
+        self.sorder = np.array(self.sorder, dtype="int")
+        self.sz1 = np.array(self.sz1, dtype="complex")
+        self.sz2 = np.array(self.sz2, dtype="complex")
+        self.srw = np.array(self.srw, dtype="d")
+        zc = 0.5 * (self.sz1 + self.sz2)
+        halflength = 0.5 * np.abs(self.sz2 - self.sz1)
+        self.build(zc, halflength, leafsize)
+        self.setparameters()
+
+    def __repr__(self):
+        return (
+            "LaplaceTreecode with "
+            + str(len(self.stype))
+            + " sources and "
+            + str(len(self.nodestart))
+            + " clusters"
+        )
+
+    def add_source(self, e, ie, iparam):
+        """Add the sources of element `e`, with parameters starting at `iparam`."""
+        members = sublist(e)
+        if members is not None:
+            for m in members:
+                self.add_source(m, ie, iparam)
+                iparam += m.nparam
+            return
+        if e.aq != self.aq:
+            return
+        if isinstance(e, WellBase):
+            self.stype.append(WELL)
+            self.sorder.append(0)
+            self.sz1.append(e.xw + 1j * e.yw)
+            self.sz2.append(e.xw + 1j * e.yw)
+            self.srw.append(e.rw)
+        else:
+            if isinstance(e, LineDoubletHoBase):
+                self.stype.append(LINEDOUBLET)
+            else:
+                self.stype.append(LINESINK)
+            self.sorder.append(e.order)
+            self.sz1.append(e.z1)
+            self.sz2.append(e.z2)
+            self.srw.append(0.0)
+        self.sparam.append((ie, iparam, e.layers))
+
+    def build(self, zc, halflength, leafsize):
+        """Build the quadtree of the sources with centers `zc`."""
+        self.perm = np.arange(len(zc))
+        self.nodestart, self.nodeend, self.nodecenter, self.noderadius = [], [], [], []
+        self.nodechild = []
+        self.split(zc, halflength, 0, len(zc), leafsize)
+        self.nodestart = np.array(self.nodestart, dtype="int")
+        self.nodeend = np.array(self.nodeend, dtype="int")
+        self.nodecenter = np.array(self.nodecenter, dtype="complex")
+        self.noderadius = np.array(self.noderadius, dtype="d")
+        self.nodechild = np.array(self.nodechild, dtype="int").reshape(-1, 4)
+        self.depth = int(np.ceil(np.log2(max(len(zc), 1)))) + 1
+
+    def split(self, zc, halflength, start, end, leafsize):
+        """Add node with the sources `perm[start:end]` and its children."""
+        inode = len(self.nodestart)
+        index = self.perm[start:end]
+        x, y = zc[index].real, zc[index].imag
+        center = 0.5 * (x.min() + x.max()) + 0.5j * (y.min() + y.max())
+        self.nodestart.append(start)
+        self.nodeend.append(end)
+        self.nodecenter.append(center)
+        self.noderadius.append(np.max(np.abs(zc[index] - center) + halflength[index]))
+        self.nodechild.append([-1, -1, -1, -1])
+        if end - start <= leafsize or (x.min() == x.max() and y.min() == y.max()):
+            return inode
+        quadrant = (x >= center.real) + 2 * (y >= center.imag)
+        order = np.argsort(quadrant, kind="stable")
+        self.perm[start:end] = index[order]
+        counts = np.bincount(quadrant, minlength=4)
+        for q in range(4):
+            if counts[q] > 0:
+                self.nodechild[inode][q] = self.split(
+                    zc, halflength, start, start + counts[q], leafsize
+                )
+            start += counts[q]
+        return inode
+
+    def strength(self):
+        """Strengths of the sources in the first eigen-mode.
+
+        Returns
+        -------
+        array size (nsources, maxorder + 1)
+        """
+        rv = np.zeros((len(self.stype), np.max(self.sorder, initial=0) + 1))
+        coef = self.aq.coef[:, 0]
+        for i, (ie, iparam, layers) in enumerate(self.sparam):
+            norder = self.sorder[i] + 1
+            p = self.parameters[ie][iparam : iparam + norder * len(layers)]
+            rv[i, :norder] = p.reshape(norder, len(layers)) @ coef[layers]
+        return rv
+
+    def setparameters(self, parameters=None):
+        """Compute the expansions of all clusters for the parameters of the elements.
+
+        `parameters` is a list with the parameters of each element of `elements`;
+        by default the current parameters of the elements are used.
+        """
+        if parameters is None:
+            parameters = [e.parameters[:, 0] for e in self.elements]
+        self.parameters = [np.array(p, dtype="d") for p in parameters]
+        self.sstrength = np.ascontiguousarray(self.strength()[self.perm])
+        self.nodemult, self.nodeconst = nodemultipoles(
+            self.nodestart,
+            self.nodeend,
+            self.nodecenter,
+            self.stype[self.perm],
+            self.sorder[self.perm],
+            self.sz1[self.perm],
+            self.sz2[self.perm],
+            self.srw[self.perm],
+            self.sstrength,
+            self.nterms,
+        )
+
+    def isuptodate(self):
+        """True if the expansions are computed for the current element parameters."""
+        return all(
+            np.array_equal(p, e.parameters[:, 0])
+            for p, e in zip(self.parameters, self.elements, strict=True)
+        )
+
+    def kernelargs(self):
+        return (
+            self.nodestart,
+            self.nodeend,
+            self.nodecenter,
+            self.noderadius,
+            self.nodechild,
+            self.nodemult,
+            self.nodeconst,
+            self.theta,
+            self.depth,
+            self.stype[self.perm],
+            self.sorder[self.perm],
+            self.sz1[self.perm],
+            self.sz2[self.perm],
+            self.srw[self.perm],
+            self.sstrength,
+        )
+
+    def evaluate(self, x, y, rv, disvec):
+        """Store the potential or discharge vector at contiguous `x`, `y` in `rv`.
+
+        The points are computed in parallel when called from the main thread and
+        serially from other threads (see `besselarray`).
+        """
+        args = (x, y, self.kernelargs(), rv, disvec)
+        if (
+            len(x) >= PARALLELSIZE
+            and threading.current_thread() is threading.main_thread()
+        ):
+            treekernelparallel(*args, min(len(x), 4 * numba.get_num_threads()))
+        else:
+            treekernel(*args)
+
+    def potential(self, x, y):
+        """Laplace potential at arrays `x`, `y`.
+
+        Returns
+        -------
+        pot : array size `npoints`
+        """
+        x = np.ascontiguousarray(x, dtype="d")
+        y = np.ascontiguousarray(y, dtype="d")
+        rv = np.zeros(len(x))
+        if len(self.stype) > 0:
+            self.evaluate(x, y, rv[np.newaxis], False)
+        return rv
+
+    def disvec(self, x, y):
+        """Laplace discharge vector at arrays `x`, `y`.
+
+        Returns
+        -------
+        qxqy : array size `(2, npoints)`
+        """
+        x = np.ascontiguousarray(x, dtype="d")
+        y = np.ascontiguousarray(y, dtype="d")
+        rv = np.zeros((2, len(x)))
+        if len(self.stype) > 0:
+            self.evaluate(x, y, rv, True)
+        return rv
+
+
+@numba.njit(nogil=True, cache=True)
+def moment(j):
+    """Integral of X**j from -1 to 1."""
+    if j % 2 == 0:
+        return 2.0 / (j + 1)
+    return 0.0
+
+
+@numba.njit(nogil=True, cache=True)
+def sourcemultipole(stype, order, z1, z2, rw, strength, nterms):
+    """Multipole coefficients of a source about its center and constant term.
+
+    The complex potential is `a[0] log(w) + sum_k a[k] w**-k` plus the constant,
+    with `w` the distance from the center of the source.
+    """
+    a = np.zeros(nterms + 1, dtype=np.complex128)
+    const = 0.0
+    if stype == WELL:
+        a[0] = strength[0] / (2 * np.pi)
+        const = -strength[0] * np.log(rw) / (2 * np.pi)
+        return a, const
+    h = 0.5 * (z2 - z1)
+    L = abs(z2 - z1)
+    for n in range(order + 1):
+        if strength[n] == 0.0:
+            continue
+        hk = complex(1.0, 0.0)
+        if stype == LINESINK:
+            c = strength[n] * L / (4 * np.pi)
+            a[0] += c * moment(n)
+            const -= c * moment(n) * np.log(abs(h))
+            for k in range(1, nterms + 1):
+                hk *= h
+                a[k] -= c * moment(n + k) * hk / k
+        else:
+            c = strength[n] * 1j / (2 * np.pi)
+            for k in range(1, nterms + 1):
+                hk *= h
+                a[k] += c * moment(n + k - 1) * hk
+    return a, const
+
+
+@numba.njit(nogil=True, cache=True)
+def nodemultipoles(
+    nodestart, nodeend, nodecenter, stype, sorder, sz1, sz2, srw, sstrength, nterms
+):
+    """Expansions of all clusters, obtained by shifting those of the sources."""
+    binom = np.zeros((nterms + 1, nterms + 1))
+    for n in range(nterms + 1):
+        binom[n, 0] = 1.0
+        for k in range(1, n + 1):
+            binom[n, k] = binom[n - 1, k - 1] + binom[n - 1, k]
+    nnode = len(nodestart)
+    mult = np.zeros((nnode, nterms + 1), dtype=np.complex128)
+    const = np.zeros(nnode)
+    dpow = np.zeros(nterms + 1, dtype=np.complex128)
+    for isrc in range(len(stype)):
+        a, c = sourcemultipole(
+            stype[isrc],
+            sorder[isrc],
+            sz1[isrc],
+            sz2[isrc],
+            srw[isrc],
+            sstrength[isrc],
+            nterms,
+        )
+        zs = 0.5 * (sz1[isrc] + sz2[isrc])
+        for inode in range(nnode):
+            if isrc < nodestart[inode] or isrc >= nodeend[inode]:
+                continue
+            const[inode] += c
+            # shift expansion from zs to center of node
+            d = zs - nodecenter[inode]
+            dpow[0] = 1.0
+            for k in range(1, nterms + 1):
+                dpow[k] = dpow[k - 1] * d
+            mult[inode, 0] += a[0]
+            for m in range(1, nterms + 1):
+                b = -a[0] * dpow[m] / m
+                for k in range(1, m + 1):
+                    b += a[k] * dpow[m - k] * binom[m - 1, k - 1]
+                mult[inode, m] += b
+    return mult, const
+
+
+@numba.njit(nogil=True, cache=True)
+def directsource(x, y, stype, order, z1, z2, rw, strength, disvec):
+    """Potential, or qx and qy, of the Laplace part of one source."""
+    lab = np.zeros(1)
+    rv = np.zeros(2)
+    if stype == WELL:
+        dx = x - z1.real
+        dy = y - z1.imag
+        rsq = dx**2 + dy**2
+        if rsq < rw**2:
+            rsq = rw**2
+            dx = rw
+            dy = 0.0
+        if disvec:
+            rv[0] = -strength[0] / (2 * np.pi) * dx / rsq
+            rv[1] = -strength[0] / (2 * np.pi) * dy / rsq
+        else:
+            rv[0] = strength[0] * np.log(rsq / rw**2) / (4 * np.pi)
+        return rv
+    for n in range(order + 1):
+        if strength[n] == 0.0:
+            continue
+        if disvec:
+            if stype == LINESINK:
+                qxqy = disbeslsho(x, y, z1, z2, lab, n, 1, 1)
+            else:
+                qxqy = disbesldho(x, y, z1, z2, lab, n, 1, 1)
+            rv[0] += strength[n] * qxqy[0, 0]
+            rv[1] += strength[n] * qxqy[1, 0]
+        elif stype == LINESINK:
+            rv[0] += strength[n] * potbeslsho(x, y, z1, z2, lab, n, 1, 1)[0]
+        else:
+            rv[0] += strength[n] * potbesldho(x, y, z1, z2, lab, n, 1, 1)[0]
+    return rv
+
+
+@numba.njit(nogil=True, cache=True)
+def treepoints(x, y, tree, rv, disvec, start, stop):
+    """Potential (rv[0]) or discharge vector (rv[0:2]) at points `start` to `stop`.
+
+    `tree` is the tuple of `LaplaceTreecode.kernelargs`.
+    """
+    (
+        nodestart,
+        nodeend,
+        nodecenter,
+        noderadius,
+        nodechild,
+        nodemult,
+        nodeconst,
+        theta,
+        depth,
+        stype,
+        sorder,
+        sz1,
+        sz2,
+        srw,
+        sstrength,
+    ) = tree
+    nterms = nodemult.shape[1] - 1
+    for i in range(start, stop):
+        z = complex(x[i], y[i])
+        stack = np.empty(3 * depth + 4, dtype=np.int64)
+        stack[0] = 0
+        top = 0
+        val0 = 0.0
+        val1 = 0.0
+        while top >= 0:
+            inode = stack[top]
+            top -= 1
+            w = z - nodecenter[inode]
+            if noderadius[inode] < theta * abs(w):
+                # evaluate expansion
+                u = 1.0 / w
+                mult = nodemult[inode]
+                if disvec:
+                    acc = nterms * mult[nterms]
+                    for m in range(nterms - 1, 0, -1):
+                        acc = acc * u + m * mult[m]
+                    dis = -mult[0] * u + acc * u * u
+                    val0 += dis.real
+                    val1 -= dis.imag
+                else:
+                    acc = mult[nterms]
+                    for m in range(nterms - 1, 0, -1):
+                        acc = acc * u + mult[m]
+                    val0 += (
+                        mult[0].real * np.log(abs(w))
+                        + (acc * u).real
+                        + nodeconst[inode]
+                    )
+            elif np.max(nodechild[inode]) < 0:
+                for isrc in range(nodestart[inode], nodeend[inode]):
+                    val = directsource(
+                        x[i],
+                        y[i],
+                        stype[isrc],
+                        sorder[isrc],
+                        sz1[isrc],
+                        sz2[isrc],
+                        srw[isrc],
+                        sstrength[isrc],
+                        disvec,
+                    )
+                    val0 += val[0]
+                    val1 += val[1]
+            else:
+                for q in range(4):
+                    if nodechild[inode, q] >= 0:
+                        top += 1
+                        stack[top] = nodechild[inode, q]
+        rv[0, i] = val0
+        if disvec:
+            rv[1, i] = val1
+
+
+@numba.njit(nogil=True, cache=True)
+def treekernel(x, y, tree, rv, disvec):
+    treepoints(x, y, tree, rv, disvec, 0, len(x))
+
+
+@numba.njit(nogil=True, parallel=True, cache=True)
+def treekernelparallel(x, y, tree, rv, disvec, nchunk):
+    for ichunk in numba.prange(nchunk):
+        start = ichunk * len(x) // nchunk
+        stop = (ichunk + 1) * len(x) // nchunk
+        treepoints(x, y, tree, rv, disvec, start, stop)
+
+
+class FieldRequests:
+    """Stand-in element that records the influences requested by an equation.
+
+    The potential and discharge vector that the equation of an element evaluates
+    are recorded as requests. When `nvalues` is given, the influence of
+    parameter `i` is one for the `i`-th requested value and zero otherwise, so
+    that the rows of the element computed with this element as the only element
+    of the model (see `Model.bordercolumns`) are the coefficients of the
+    requested values.
+    """
+
+    def __init__(self, model, nvalues=None):
+        self.model = model
+        self.unit = nvalues is not None
+        self.nunknowns = nvalues if self.unit else 1
+        self.requests = []  # (kind, x, y, layers, aq, first value)
+        self.nvalues = 0
+
+    def request(self, kind, x, y, layers, aq):
+        x = np.atleast_1d(np.asarray(x, dtype="d"))
+        y = np.atleast_1d(np.asarray(y, dtype="d"))
+        layers = np.atleast_1d(layers)
+        shape = (2 if kind == "disvec" else 1, len(layers), len(x))
+        n = int(np.prod(shape))
+        self.requests.append((kind, x, y, layers, aq, self.nvalues))
+        rv = np.zeros(shape[:2] + (self.nunknowns, len(x)))
+        if self.unit:
+            ic, il, ip = np.indices(shape)
+            rv[ic, il, self.nvalues + np.arange(n).reshape(shape), ip] = 1.0
+        self.nvalues += n
+        return rv
+
+    def influence(self, kind, x, y, layers, aq):
+        """Record the request and return the influence like `potinflayers`."""
+        if aq is None:
+            if np.ndim(x) > 0:
+                return self.model.aq.evaluate_by_aquifer(
+                    lambda x, y, aq: self.influence(kind, x, y, layers, aq), x, y
+                )
+            aq = self.model.aq.find_aquifer_data(x, y)
+        rv = self.request(kind, x, y, layers, aq)
+        if kind == "potential":
+            rv = rv[0]
+        if np.ndim(layers) == 0:
+            rv = rv[..., 0, :, :]
+        return rv if np.ndim(x) > 0 else rv[..., 0]
+
+    def potinflayers(self, x, y, layers, aq=None):
+        return self.influence("potential", x, y, layers, aq)
+
+    def disvecinflayers(self, x, y, layers, aq=None):
+        return self.influence("disvec", x, y, layers, aq)
+
+
+class OwnInfluence:
+    """Stand-in for element `e` with the influence functions of `e`.
+
+    The rows of `e` computed with this element as the only element of the model
+    contain the influence of `e` on itself, without the terms that the equation
+    of `e` adds for the element itself (e.g., the resistance of a line-sink).
+    """
+
+    def __init__(self, e):
+        self.e = e
+        self.model = e.model
+        self.nunknowns = e.nunknowns
+
+    def potinflayers(self, x, y, layers, aq=None):
+        return self.e.potinflayers(x, y, layers, aq)
+
+    def disvecinflayers(self, x, y, layers, aq=None):
+        return self.e.disvecinflayers(x, y, layers, aq)
+
+
+class TreecodeMatrix:
+    """Matrix of a model as a matrix-free product that uses the treecode.
+
+    The rows of the equations of an element are linear in the potential and
+    discharge vector of the unknown-strength elements at the points where the
+    equation evaluates them (the control points or the Gauss points of the
+    element). These points are recorded once, with stand-in elements (see
+    `FieldRequests`), so that the matrix is the product of the sparse matrix
+    `G` of the coefficients of these values and the matrix of the values. The
+    latter is split in the Laplace part of the supported elements, which is
+    computed with a `LaplaceTreecode` in every product, and a sparse matrix of
+    the leaky part at the points where it may be nonzero and of the elements
+    that are not supported by the treecode. The sparse matrices are computed
+    when the matrix is created.
+
+    Parameters
+    ----------
+    model : Model object
+        initialized model
+    elements : list
+        elements with unknowns, with `jcol` their first column in the matrix
+    tol : float, optional
+        accuracy of the multipole expansions (see `LaplaceTreecode`)
+
+    Attributes
+    ----------
+    diagonal : list of arrays
+        diagonal block of each element, computed with the influence functions
+    compression : float
+        number of stored values relative to the dense matrix
+    """
+
+    def __init__(self, model, elements, tol=1e-10):
+        import scipy.sparse
+
+        self.neq = sum(e.nunknowns for e in elements)
+        self.columns = {id(e): slice(e.jcol, e.jcol + e.nunknowns) for e in elements}
+        self.diagonal = []
+        gblocks, sblocks = [], []
+        requests = []
+        nvalues = 0
+        for e in elements:
+            counter = FieldRequests(model)
+            model.bordercolumns([e], [counter])
+            if counter.nvalues > 0:
+                proxy = FieldRequests(model, counter.nvalues)
+                gblocks.append(model.bordercolumns([e], [proxy]))
+                own = model.bordercolumns([e], [OwnInfluence(e)])
+                for kind, x, y, layers, aq, first in proxy.requests:
+                    requests.append((kind, x, y, layers, aq, nvalues + first))
+                nvalues += proxy.nvalues
+            else:
+                gblocks.append(np.zeros((e.nunknowns, 0)))
+                own = 0.0
+            diag = model.bordercolumns([e], [e])
+            self.diagonal.append(diag)
+            sblocks.append(diag - own)
+        self.G = scipy.sparse.block_diag(gblocks, format="csr")
+        self.nvalues = nvalues
+        self.groups = self.group(requests)
+        self.trees = {}
+        items = []  # (element, group, first mode of the leaky part)
+        for group in self.groups:
+            aq = group[1]
+            members = [e for e in aq.elementlist if id(e) in self.columns]
+            if id(aq) not in self.trees and aq.ilap and any(map(issupported, members)):
+                self.trees[id(aq)] = LaplaceTreecode(aq, tol=tol)
+            first = 1 if id(aq) in self.trees else 0
+            items.extend((e, group, first) for e in members)
+        rows, cols, vals = [], [], []
+        for val in model.threadmap(self.nearcolumns, items):
+            if val is not None:
+                rows.append(val[0])
+                cols.append(val[1])
+                vals.append(val[2])
+        near = scipy.sparse.coo_matrix(
+            (
+                np.concatenate(vals or [np.zeros(0)]),
+                (
+                    np.concatenate(rows or [np.zeros(0, dtype="int")]),
+                    np.concatenate(cols or [np.zeros(0, dtype="int")]),
+                ),
+            ),
+            shape=(nvalues, self.neq),
+        )
+        self.S = (
+            self.G @ near.tocsc() + scipy.sparse.block_diag(sblocks, format="csr")
+        ).tocsr()
+        self.compression = (self.G.nnz + self.S.nnz) / self.neq**2
+
+    def group(self, requests):
+        """Requests grouped by kind and aquifer, with the indices of the values.
+
+        Returns a list of `(kind, aq, x, y, take, values)`: the values `values`
+        are the items `take` of the flattened field of the group, an array size
+        (naq, npoints) for the potential and (2, naq, npoints) for the discharge
+        vector.
+        """
+        bykey = {}
+        for request in requests:
+            bykey.setdefault((request[0], id(request[4])), []).append(request)
+        groups = []
+        for (kind, _), items in bykey.items():
+            aq = items[0][4]
+            x = np.concatenate([item[1] for item in items])
+            y = np.concatenate([item[2] for item in items])
+            ncomp = 2 if kind == "disvec" else 1
+            take, values = [], []
+            start = 0
+            for _, xr, _, layers, _, first in items:
+                index = (
+                    np.arange(ncomp)[:, np.newaxis, np.newaxis] * aq.naq * len(x)
+                    + layers[:, np.newaxis] * len(x)
+                    + start
+                    + np.arange(len(xr))
+                )
+                take.append(index.ravel())
+                values.append(first + np.arange(index.size))
+                start += len(xr)
+            groups.append(
+                (kind, aq, x, y, np.concatenate(take), np.concatenate(values))
+            )
+        return groups
+
+    def nearcolumns(self, item):
+        """Sparse entries of the values of a group in the columns of an element.
+
+        `item` is `(e, group, first)`. The entries are the modes from `first` at
+        the points where the leaky part of a supported element may be nonzero, or
+        all modes at all points for other elements.
+
+        Returns
+        -------
+        tuple of arrays with the rows, columns and values, or None
+        """
+        e, (kind, aq, x, y, take, index), first = item
+        if issupported(e):
+            near = nearfield(e, x, y)
+            if first == aq.naq or not np.any(near):
+                return None
+        else:
+            near = np.ones(len(x), dtype="bool")
+            first = 0
+        if kind == "disvec":
+            inf = e.disvecinfarray(x[near], y[near], aq)
+        else:
+            inf = e.potinfarray(x[near], y[near], aq)[np.newaxis]
+        inf[..., :first, :] = 0.0
+        inf = aq.eigvec @ inf  # modes to layers
+        valueof = np.full(len(inf) * aq.naq * len(x), -1)
+        valueof[take] = index
+        valueof = valueof.reshape(len(inf), 1, aq.naq, len(x))[..., near]
+        irow = np.broadcast_to(valueof, inf.shape)
+        jcol = np.arange(e.jcol, e.jcol + e.nunknowns)[:, np.newaxis, np.newaxis]
+        icol = np.broadcast_to(jcol, inf.shape)
+        keep = irow >= 0
+        return irow[keep], icol[keep], inf[keep]
+
+    def matvec(self, x):
+        """Product of the matrix with vector `x`."""
+        x = np.ravel(x)
+        values = np.zeros(self.nvalues)
+        for tree in self.trees.values():
+            tree.setparameters(
+                [
+                    x[self.columns[id(e)]]
+                    if id(e) in self.columns
+                    else np.zeros(len(e.parameters))
+                    for e in tree.elements
+                ]
+            )
+        for kind, aq, xg, yg, take, index in self.groups:
+            tree = self.trees.get(id(aq))
+            if tree is None:
+                continue
+            if kind == "disvec":
+                mode = tree.disvec(xg, yg)[:, np.newaxis, :]
+            else:
+                mode = tree.potential(xg, yg)
+            values[index] = (aq.eigvec[:, 0, np.newaxis] * mode).ravel()[take]
+        return self.G @ values + self.S @ x
@@ -67,3 +67,17 @@ class Uflow(Element):
             rv[0, 0, 0] = 1.0
             rv[1, 1, 0] = 1.0
         return rv
+
+    def potinfarray(self, x, y, aq):
+        rv = np.zeros((2, aq.naq, len(x)))
+        if aq == self.aq:
+            rv[0, 0] = -x
+            rv[1, 0] = -y
+        return rv
+
+    def disvecinfarray(self, x, y, aq):
+        rv = np.zeros((2, 2, aq.naq, len(x)))
+        if aq == self.aq:
+            rv[0, 0, 0] = 1.0
+            rv[1, 1, 0] = 1.0
+        return rv
@@ -1,10 +1,17 @@
-import matplotlib.pyplot as plt
+from functools import cache
+
 import numpy as np
-from matplotlib.collections import LineCollection
 
 from .trace import timtraceline
 
-plt.rcParams["contour.negative_linestyle"] = "solid"
+
+@cache
+def pyplot():
+    """Module matplotlib.pyplot, imported when the first plot is made."""
+    import matplotlib.pyplot as plt
+
+    plt.rcParams["contour.negative_linestyle"] = "solid"
+    return plt
 
 
 class PlotTim:
@@ -42,6 +49,7 @@ class PlotTim:
         -------
         None
         """
+        plt = pyplot()
         if newfig:
             plt.figure(figsize=figsize)
             ax1 = None
@@ -147,6 +155,7 @@ class PlotTim:
         -------
         cs : list of contour sets for each contoured layer
         """
+        plt = pyplot()
         x1, x2, y1, y2 = win
         if np.isscalar(ngr):
             nx = ny = ngr
@@ -235,6 +244,7 @@ class PlotTim:
         -------
         cs : contour set
         """
+        plt = pyplot()
         x1, x2, y1, y2 = win
         h = self.headalongline(
             np.linspace(x1 + nudge, x2 - nudge, n),
@@ -323,6 +333,9 @@ class PlotTim:
         traces : result
             only if return_traces = True
         """
+        from matplotlib.collections import LineCollection
+
+        plt = pyplot()
         if win is None:
             win = [-1e30, 1e30, -1e30, 1e30]
         if color is None:
@@ -448,6 +461,7 @@ class PlotTim:
         -------
         ax : axis
         """
+        plt = pyplot()
         naq = self.aq.naq
         xflow = np.linspace(x1 + nudge, x2 - nudge, nx)
         Qx = np.empty((naq, nx))
@@ -1,12 +1,12 @@
 import inspect  # Used for storing the input
 
-import matplotlib.pyplot as plt
 import numpy as np
 from scipy.special import k0, k1
 
 from .element import Element
 from .equation import MscreenWellEquation, MscreenWellNoflowEquation, PotentialEquation
 from .trace import timtracelines
+from .util import pyplot
 
 __all__ = ["WellBase", "Well", "HeadWell"]
 
@@ -77,6 +77,20 @@ class WellBase(Element):
             rv[:] = self.aq.coef[self.layers] * pot
         return rv
 
+    def potinfarray(self, x, y, aq):
+        rv = np.zeros((self.nparam, aq.naq, len(x)))
+        if aq == self.aq:
+            pot = np.zeros((aq.naq, len(x)))
+            r = np.sqrt((x - self.xw) ** 2 + (y - self.yw) ** 2)
+            r[r < self.rw] = self.rw  # If at well, set to at radius
+            if aq.ilap:
+                pot[0] = np.log(r / self.rw) / (2 * np.pi)
+                pot[1:] = -k0(r / aq.lab[1:, np.newaxis]) / (2 * np.pi)
+            else:
+                pot[:] = -k0(r / aq.lab[:, np.newaxis]) / (2 * np.pi)
+            rv[:] = self.aq.coef[self.layers, :, np.newaxis] * pot
+        return rv
+
     def disvecinf(self, x, y, aq=None):
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)
@@ -107,6 +121,36 @@ class WellBase(Element):
             rv[1] = self.aq.coef[self.layers] * qy
         return rv
 
+    def disvecinfarray(self, x, y, aq):
+        rv = np.zeros((2, self.nparam, aq.naq, len(x)))
+        if aq == self.aq:
+            qx = np.zeros((aq.naq, len(x)))
+            qy = np.zeros((aq.naq, len(x)))
+            rsq = (x - self.xw) ** 2 + (y - self.yw) ** 2
+            r = np.sqrt(rsq)
+            xminxw = x - self.xw
+            yminyw = y - self.yw
+            inside = r < self.rw
+            r[inside] = self.rw
+            rsq[inside] = self.rw**2
+            xminxw[inside] = self.rw
+            yminyw[inside] = 0.0
+            if aq.ilap:
+                lab = aq.lab[1:, np.newaxis]
+                qx[0] = -1 / (2 * np.pi) * xminxw / rsq
+                qy[0] = -1 / (2 * np.pi) * yminyw / rsq
+                kone = k1(r / lab)
+                qx[1:] = -kone * xminxw / (r * lab) / (2 * np.pi)
+                qy[1:] = -kone * yminyw / (r * lab) / (2 * np.pi)
+            else:
+                lab = aq.lab[:, np.newaxis]
+                kone = k1(r / lab)
+                qx[:] = -kone * xminxw / (r * lab) / (2 * np.pi)
+                qy[:] = -kone * yminyw / (r * lab) / (2 * np.pi)
+            rv[0] = self.aq.coef[self.layers, :, np.newaxis] * qx
+            rv[1] = self.aq.coef[self.layers, :, np.newaxis] * qy
+        return rv
+
     def headinside(self):
         """The head inside the well.
 
@@ -225,7 +269,7 @@ class WellBase(Element):
 
     def plot(self, layer=None):
         if (layer is None) or np.isin(layer, self.layers).any():
-            plt.plot(self.xw, self.yw, "k.")
+            pyplot().plot(self.xw, self.yw, "k.")
 
     def plotcapzone(
         self,
@@ -374,7 +418,6 @@ class Well(WellBase, MscreenWellEquation):
             xc=xc,
             yc=yc,
         )
-        self.Qc = float(Qw)
         if self.nlayers == 1:
             self.nunknowns = 0
         else:
@@ -382,6 +425,7 @@ class Well(WellBase, MscreenWellEquation):
 
     def initialize(self):
         WellBase.initialize(self)
+        self.Qc = float(self.Qw[0])
 
     def setparams(self, sol):
         self.parameters[:, 0] = sol
@@ -526,7 +570,6 @@ class LargeDiameterWell(WellBase, MscreenWellNoflowEquation):
             xc=xc,
             yc=yc,
         )
-        self.Qc = float(Qw)
         self.screened = layers  # layers where well is screened
         self.nscreened = len(self.screened)
         if self.nlayers == 1:
@@ -536,10 +579,15 @@ class LargeDiameterWell(WellBase, MscreenWellNoflowEquation):
 
     def initialize(self):
         WellBase.initialize(self)
+        self.Qc = float(self.Qw[0])
 
     def setparams(self, sol):
         self.parameters[:, 0] = sol
 
+    # vectorized functions of WellBase do not apply to large diameter wells
+    potinfarray = Element.potinfarray
+    disvecinfarray = Element.disvecinfarray
+
     def potinf(self, x, y, aq=None):
         if aq is None:
             aq = self.model.aq.find_aquifer_data(x, y)